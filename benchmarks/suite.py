@@ -0,0 +1,447 @@
+"""End-to-end benchmark of compiling, parsing and writing synthetic inputs.
+
+Inputs of the given sizes are generated for an ini-like, a log and a nested list
+syntax and converted to every output format. Compile time, parse and serialize
+throughput and the peak memory traced by tracemalloc are stored as json. Formats
+written while parsing, like slixml, only report the total of both phases, as
+their parse time includes most of the serializing. The exponent of the time over
+the input size is fitted on a log-log scale to flag superlinear scaling, if at
+least three sizes are large enough for the fit.
+
+Times are the best of `--repeat` runs, but still vary by several percent between
+runs on the same machine, and more for inputs below 100K, where constant
+overhead and timer resolution dominate. Compare results of the same machine only,
+keep the default thresholds of 1.2 for the exponent and 10% for regressions well
+above that noise, and rerun a flagged case before acting on it.
+
+Run with `python -m benchmarks.suite run [--sizes 1K,1M,100M] [-o FILE]` and
+compare two result files with `python -m benchmarks.suite compare OLD NEW`.
+"""
+
+import argparse
+import json
+import math
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from pudding import convert_file
+from pudding.stats import ConversionStats
+
+INI_SYNTAX = r"""
+define nl /\r?\n/
+define ws /[ \t]*/
+define key /\w+/
+define value /[^\r\n]*/
+
+grammar section:
+    match key ws '=' ws value nl:
+        out.add('$0', '$4')
+    skip nl
+
+grammar input:
+    match '[' key ']' nl:
+        out.open('section?name="$1"')
+        section()
+    skip nl
+"""
+
+LOG_SYNTAX = r"""
+define nl /\r?\n/
+define time /\d{4}-\d\d-\d\d \d\d:\d\d:\d\d/
+define level /[A-Z]+/
+define component /\w+/
+define message /[^\r\n]*/
+
+grammar input:
+    match time ' ' level ' [' component '] ' message nl:
+        out.create('entry?time="$0"&level="$2"&component="$4"', '$6')
+"""
+
+NESTED_SYNTAX = r"""
+define ws /[ \r\n]*/
+define word /\w+/
+
+grammar items:
+    match '(' ws:
+        out.open('list')
+        items()
+    match word ws:
+        out.create('item', '$0')
+    match ')' ws:
+        return
+
+grammar input:
+    match '(' ws:
+        out.open('list')
+        items()
+"""
+
+WORDS = ("alpha", "beta", "gamma", "delta", "epsilon", "zeta", "eta", "theta")
+LEVELS = ("DEBUG", "INFO", "INFO", "INFO", "WARNING", "ERROR")
+FORMATS = ("xml", "slixml", "json", "yaml")
+STREAMED_FORMATS = ("slixml",)
+MIN_FIT_SIZES = 3
+SIZE_UNITS = {"K": 1024, "M": 1024**2, "G": 1024**3}
+
+
+def ini_record(rng: random.Random, index: int) -> str:
+    """Return a section with a few keys."""
+    lines = [f"[section{index}]"]
+    for key in range(rng.randint(2, 8)):
+        lines.append(f"key{key} = {' '.join(rng.choices(WORDS, k=3))}")
+    return "\n".join(lines) + "\n\n"
+
+
+def log_record(rng: random.Random, index: int) -> str:
+    """Return a log line."""
+    seconds = index % 86400
+    time = f"2024-01-01 {seconds // 3600:02}:{seconds // 60 % 60:02}:{seconds % 60:02}"
+    message = " ".join(rng.choices(WORDS, k=rng.randint(3, 12)))
+    return f"{time} {rng.choice(LEVELS)} [{rng.choice(WORDS)}] {message}\n"
+
+
+def nested_record(rng: random.Random, index: int, depth: int = 0) -> str:
+    """Return a nested list of words."""
+    items = []
+    for _ in range(rng.randint(1, 4)):
+        if depth < 3 and rng.random() < 0.4:
+            items.append(nested_record(rng, index, depth + 1))
+        else:
+            items.append(rng.choice(WORDS))
+    text = f"({' '.join(items)})"
+    return text + "\n" if depth == 0 else text
+
+
+WORKLOADS: dict[str, tuple[str, Callable[[random.Random, int], str]]] = {
+    "ini": (INI_SYNTAX, ini_record),
+    "log": (LOG_SYNTAX, log_record),
+    "nested": (NESTED_SYNTAX, nested_record),
+}
+
+
+def parse_size(value: str) -> int:
+    """Parse a size like `100K` to bytes."""
+    value = value.strip().upper().removesuffix("B")
+    if value and value[-1] in SIZE_UNITS:
+        return int(float(value[:-1]) * SIZE_UNITS[value[-1]])
+    return int(value)
+
+
+def generate_input(file_path: Path, workload: str, size: int, seed: int) -> None:
+    """Write a synthetic input of at least `size` bytes.
+
+    :param file_path: Path of the input file.
+    :param workload: Name of the workload.
+    :param size: Minimum size of the input in bytes.
+    :param seed: Seed of the random generator.
+    """
+    rng = random.Random(seed)
+    record = WORKLOADS[workload][1]
+    written = 0
+    index = 0
+    with open(file_path, "w", encoding="utf-8", newline="\n") as f:
+        while written < size:
+            chunk = "".join(record(rng, index + i) for i in range(100))
+            index += 100
+            f.write(chunk)
+            written += len(chunk.encode("utf-8"))
+
+
+def measure(
+    syntax_file: Path,
+    input_file: Path,
+    output_format: str,
+    repeat: int,
+    memory: bool,
+) -> dict[str, Any]:
+    """Convert an input and return the best times of all repetitions.
+
+    :param syntax_file: Path of the syntax file.
+    :param input_file: Path of the input file.
+    :param output_format: The output format.
+    :param repeat: Number of conversions to take the best times of.
+    :param memory: Trace the peak memory in an additional conversion.
+    :returns: The measurements.
+    """
+    output_file = input_file.with_suffix(f".{output_format}")
+    runs: list[ConversionStats] = []
+    for _ in range(repeat):
+        runs.append(
+            convert_file(
+                syntax_file, input_file, output_file, output_format, auto_stream=False
+            )
+        )
+    file_stats = [run.files[0] for run in runs]
+    result: dict[str, Any] = {
+        "input_bytes": file_stats[0].input_bytes,
+        "output_bytes": file_stats[0].output_bytes,
+        "node_count": file_stats[0].node_count,
+        "compile_time": min(run.compile_time for run in runs),
+        "parse_time": min(f.parse_time for f in file_stats),
+        "serialize_time": min(f.serialize_time for f in file_stats),
+        "peak_memory": None,
+    }
+    result["total_time"] = min(f.parse_time + f.serialize_time for f in file_stats)
+    result["parse_throughput"] = _throughput(result, "parse_time")
+    result["serialize_throughput"] = _throughput(result, "serialize_time")
+    result["total_throughput"] = _throughput(result, "total_time")
+    if memory:
+        stats = convert_file(
+            syntax_file,
+            input_file,
+            output_file,
+            output_format,
+            auto_stream=False,
+            measure_memory=True,
+        )
+        result["peak_memory"] = stats.files[0].peak_memory
+    output_file.unlink()
+    return result
+
+
+def _throughput(result: dict[str, Any], phase: str) -> float:
+    """Return the megabytes of input per second of a phase."""
+    if not result[phase]:
+        return 0.0
+    return float(result["input_bytes"] / result[phase] / 1e6)
+
+
+def get_phases(output_format: str) -> tuple[str, ...]:
+    """Return the phases measured separately for an output format.
+
+    :param output_format: The output format.
+    :returns: Names of the phases.
+    """
+    if output_format in STREAMED_FORMATS:
+        return ("total",)
+    return ("parse", "serialize", "total")
+
+
+def fit_exponent(points: list[tuple[float, float]]) -> float:
+    """Fit the exponent of `time = c * size ** exponent` by least squares.
+
+    :param points: Tuples of input size and time.
+    :returns: The slope on a log-log scale.
+    """
+    xs = [math.log(size) for size, _ in points]
+    ys = [math.log(max(time, 1e-9)) for _, time in points]
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    variance = sum((x - mean_x) ** 2 for x in xs)
+    if not variance:
+        return 0.0
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / variance
+
+
+def check_scaling(
+    results: list[dict[str, Any]], min_size: int, max_exponent: float
+) -> list[dict[str, Any]]:
+    """Fit the scaling of the phases of every workload and format.
+
+    Small inputs are excluded, as their time is dominated by constant overhead, and
+    fits of fewer than `MIN_FIT_SIZES` sizes are skipped, as two noisy points can
+    give any exponent.
+
+    :param results: The measurements.
+    :param min_size: Minimum input size in bytes to include in the fit.
+    :param max_exponent: Exponent above which the scaling is flagged superlinear.
+    :returns: The fitted exponents.
+    """
+    groups: dict[tuple[str, str], list[dict[str, Any]]] = {}
+    for result in results:
+        if result["input_bytes"] >= min_size:
+            key = (result["workload"], result["format"])
+            groups.setdefault(key, []).append(result)
+    scaling = []
+    for (workload, output_format), group in groups.items():
+        if len({r["input_bytes"] for r in group}) < MIN_FIT_SIZES:
+            continue
+        for phase in get_phases(output_format):
+            points = [(r["input_bytes"], r[f"{phase}_time"]) for r in group]
+            exponent = fit_exponent(points)
+            scaling.append(
+                {
+                    "workload": workload,
+                    "format": output_format,
+                    "phase": phase,
+                    "exponent": exponent,
+                    "superlinear": exponent > max_exponent,
+                }
+            )
+    return scaling
+
+
+def get_commit() -> str | None:
+    """Return the current git commit or None outside of a repository."""
+    try:
+        process = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            check=True,
+            cwd=Path(__file__).parent,
+            text=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return process.stdout.strip()
+
+
+def run(args: argparse.Namespace) -> int:
+    """Run the benchmarks and write the results."""
+    sizes = [parse_size(size) for size in args.sizes.split(",")]
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for workload in args.workloads.split(","):
+            syntax_file = Path(tmp) / f"{workload}.pud"
+            syntax_file.write_text(WORKLOADS[workload][0], "utf-8")
+            for size in sizes:
+                input_file = Path(tmp) / f"{workload}_{size}.txt"
+                generate_input(input_file, workload, size, args.seed)
+                for output_format in args.formats.split(","):
+                    result = {"workload": workload, "format": output_format}
+                    result |= measure(
+                        syntax_file,
+                        input_file,
+                        output_format,
+                        args.repeat,
+                        not args.no_memory,
+                    )
+                    results.append(result)
+                    print(format_result(result), flush=True)
+                input_file.unlink()
+    min_fit_size = parse_size(args.min_fit_size)
+    if len([size for size in sizes if size >= min_fit_size]) < MIN_FIT_SIZES:
+        print(
+            f"Scaling not checked, it needs {MIN_FIT_SIZES} sizes of at least "
+            f"{args.min_fit_size}."
+        )
+    scaling = check_scaling(results, min_fit_size, args.max_exponent)
+    for entry in scaling:
+        flag = "  SUPERLINEAR" if entry["superlinear"] else ""
+        print(
+            f"{entry['workload']:>8} {entry['format']:>7} {entry['phase']:>9}: "
+            f"time ~ size^{entry['exponent']:.2f}{flag}"
+        )
+    data = {
+        "commit": get_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+        "scaling": scaling,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=4)
+    return 1 if any(entry["superlinear"] for entry in scaling) else 0
+
+
+def format_result(result: dict[str, Any]) -> str:
+    """Format a measurement as a line."""
+    memory = ""
+    if result["peak_memory"] is not None:
+        memory = f" {result['peak_memory'] / 1024**2:9.2f} MB peak"
+    throughput = ", ".join(
+        f"{phase} {result[f'{phase}_throughput']:7.2f} MB/s"
+        for phase in get_phases(result["format"])
+    )
+    return (
+        f"{result['workload']:>8} {result['format']:>7} "
+        f"{result['input_bytes'] / 1024:12.1f} KB: "
+        f"compile {result['compile_time'] * 1000:7.2f} ms, {throughput}{memory}"
+    )
+
+
+def compare(args: argparse.Namespace) -> int:
+    """Compare the throughput of two result files."""
+    with open(args.old, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(args.new, encoding="utf-8") as f:
+        new = json.load(f)
+    old_results = {
+        (r["workload"], r["format"], r["input_bytes"]): r for r in old["results"]
+    }
+    regressions = 0
+    print(f"{old['commit']} -> {new['commit']}")
+    for result in new["results"]:
+        key = (result["workload"], result["format"], result["input_bytes"])
+        previous = old_results.get(key)
+        if previous is None:
+            continue
+        for name in get_phases(result["format"]):
+            phase = f"{name}_throughput"
+            if not previous.get(phase):
+                continue
+            change = result[phase] / previous[phase] - 1
+            flag = ""
+            if change < -args.threshold:
+                flag = "  REGRESSION"
+                regressions += 1
+            print(
+                f"{key[0]:>8} {key[1]:>7} {key[2] / 1024:12.1f} KB "
+                f"{phase.removesuffix('_throughput'):>9}: {previous[phase]:8.2f} -> "
+                f"{result[phase]:8.2f} MB/s {change:+7.1%}{flag}"
+            )
+    return 1 if regressions else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build argument parser."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    run_parser = subparsers.add_parser("run", help="Run the benchmarks.")
+    run_parser.add_argument(
+        "--sizes",
+        default="1K,100K,1M,4M",
+        help="Comma separated input sizes, e.g. `1K,1M,1G`.",
+    )
+    run_parser.add_argument("--workloads", default=",".join(WORKLOADS))
+    run_parser.add_argument("--formats", default=",".join(FORMATS))
+    run_parser.add_argument("--repeat", type=int, default=3)
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument(
+        "--no-memory", action="store_true", help="Do not trace the peak memory."
+    )
+    run_parser.add_argument(
+        "--min-fit-size",
+        default="100K",
+        help="Smallest input size included in the scaling fit.",
+    )
+    run_parser.add_argument(
+        "--max-exponent",
+        type=float,
+        default=1.2,
+        help="Exponent of the time above which the scaling is superlinear.",
+    )
+    run_parser.add_argument("-o", "--output", help="Write the results as json.")
+    run_parser.set_defaults(func=run)
+    compare_parser = subparsers.add_parser(
+        "compare", help="Compare the throughput of two result files."
+    )
+    compare_parser.add_argument("old")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="Relative slowdown reported as regression. Default is 0.1.",
+    )
+    compare_parser.set_defaults(func=compare)
+    return parser
+
+
+def main() -> None:
+    """Run the benchmark."""
+    args = build_parser().parse_args()
+    sys.exit(args.func(args))
+
+
+if __name__ == "__main__":
+    main()
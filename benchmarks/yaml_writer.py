@@ -0,0 +1,64 @@
+"""Benchmark comparing the yaml writer to dumping the whole tree at once.
+
+Run with `python -m benchmarks.yaml_writer [--records N]`.
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import yaml
+
+from pudding.writer import Yaml
+from pudding.writer.writers.json import JsonType
+
+
+def build_writer(records: int, file_path: Path) -> Yaml:
+    """Create a yaml writer with a tree of user records.
+
+    :param records: Number of records to create.
+    :param file_path: Path of the output file.
+    :returns: The writer containing the records.
+    """
+    writer = Yaml(file_path)
+    for i in range(records):
+        writer.open_path(f'user?id="{i}"')
+        writer.add_element("name", f"User {i}")
+        writer.add_element("office", f"{i}th Ave")
+        writer.create_element("tag", "admin")
+        writer.create_element("tag", "staff")
+        writer.leave_paths()
+    return writer
+
+
+def write_tree(writer: Yaml) -> None:
+    """Write the output like the previous writer with a single `yaml.dump` call.
+
+    :param writer: Writer containing the tree.
+    """
+    base: JsonType = {}
+    for child in writer.root.get_sorted_children():
+        base = writer.serialize_node(child, base)
+    with open(writer.file_path, "w", encoding=writer.encoding) as f:
+        f.write(yaml.dump(base))
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        writer = build_writer(args.records, Path(tmp) / "output.yaml")
+        for name, write in (("yaml.dump", write_tree), ("Yaml", Yaml.write_output)):
+            start = time.perf_counter()
+            write(writer)
+            elapsed = time.perf_counter() - start
+            size = writer.file_path.stat().st_size / 1024**2
+            print(f"{name:>10}: {elapsed:8.3f}s {size / elapsed:8.2f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
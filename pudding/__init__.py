@@ -1,6 +1,38 @@
-"""The pudding module."""
+"""The pudding module.
 
-from .util import convert_file, convert_files, convert_string
+The conversion functions are imported on first access, so the client of
+`pudding serve` does not import the writers and their dependencies.
+"""
+
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .util import (
+        convert_file,
+        convert_files,
+        convert_string,
+        convert_to_dict,
+        convert_to_node,
+        iter_events,
+        iter_records,
+    )
 
 __author__ = "Moritz Hille"
-__all__ = ["convert_file", "convert_files", "convert_string"]
+__all__ = [
+    "convert_file",
+    "convert_files",
+    "convert_string",
+    "convert_to_dict",
+    "convert_to_node",
+    "iter_events",
+    "iter_records",
+]
+
+
+def __getattr__(name: str) -> Any:
+    """Import a conversion function on first access."""
+    if name not in __all__:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from . import util
+
+    return getattr(util, name)
@@ -1,24 +1,89 @@
 """Main script."""
 
 import argparse
-import datetime
+import json
 import logging
 import os
-from collections.abc import Sequence
+import sys
+from collections.abc import Callable, Sequence
 from pathlib import Path
+from typing import Any
 
-from .util import convert_files
+from .client import (
+    DEFAULT_HOST,
+    DEFAULT_PORT,
+    Address,
+    is_loopback,
+    parse_address,
+    send_request,
+)
 from .version import __version__
 
+# The commands import the compiler, processor and writers themselves, so
+# `pudding --connect` starts without importing them.
+
 DESCRIPTION = """
 Pudding converts text to a structured format, such as XML, JSON or YAML.
 For more information see the documentation at https://pudding.readthedocs.io/latest.
 """
-FORMAT_CHOICES = ["json", "slixml", "xml", "yaml"]
+FORMAT_CHOICES = [
+    "csv",
+    "incxml",
+    "json",
+    "ndjson",
+    "slijson",
+    "slixml",
+    "sqlite",
+    "tsv",
+    "xml",
+    "yaml",
+]
+SIZE_UNITS = {"K": 1024, "M": 1024**2, "G": 1024**3}
+TABLE_FORMATS = ("csv", "tsv")
+RECORD_FORMATS = ("csv", "sqlite", "tsv")
+SHAREABLE_FORMATS = ("json", "xml", "yaml")
+SHARD_FORMATS = tuple(f for f in FORMAT_CHOICES if f not in ("slixml", "yaml"))
 
 logger = logging.getLogger(__name__)
 
 
+def parse_formats(value: str) -> list[str]:
+    """Parse a comma separated list of output formats."""
+    formats = [f.strip().lower() for f in value.split(",")]
+    for output_format in formats:
+        if output_format not in FORMAT_CHOICES:
+            raise argparse.ArgumentTypeError(
+                f"invalid choice: {repr(output_format)} "
+                f"(choose from {', '.join(FORMAT_CHOICES)})"
+            )
+    return formats
+
+
+def parse_size(value: str) -> int:
+    """Parse a size like `100K`, `10M` or `1G`."""
+    value = value.strip().upper()
+    unit = SIZE_UNITS.get(value[-1:], 1)
+    try:
+        return int(float(value.rstrip("".join(SIZE_UNITS))) * unit)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(f"invalid size: {repr(value)}") from e
+
+
+def format_failures(stats: dict[str, Any]) -> str:
+    """Return a summary of the files which failed to convert.
+
+    :param stats: The statistics of the conversion as dict.
+    """
+    failures = [f for f in stats["files"] if f["error"] is not None]
+    lines = [f"Failed to convert {len(failures)} of {len(stats['files'])} files:"]
+    for failure in failures:
+        lines.append(
+            f"  {failure['input_file']}:{failure['line']} "
+            f"(position {failure['position']}): {failure['error']}"
+        )
+    return "\n".join(lines)
+
+
 def build_parser() -> argparse.ArgumentParser:
     """Build argument parser."""
     parser = argparse.ArgumentParser(prog="pudding", description=DESCRIPTION)
@@ -36,13 +101,187 @@ def build_parser() -> argparse.ArgumentParser:
     parser.add_argument(
         "-f",
         "--format",
-        choices=FORMAT_CHOICES,
         default="xml",
         help=(
-            "The output format. "
-            f"Choices are: {', '.join(FORMAT_CHOICES)}. Default is `xml`."
+            "The output format or a comma separated list of the formats "
+            f"{', '.join(SHAREABLE_FORMATS)}, which are written from a single parse "
+            "of the input. "
+            f"Choices are: {', '.join(FORMAT_CHOICES)}. Default is `xml`. "
+            "slixml writes the nodes in the order they were created and can only "
+            "modify the last 10000 unwritten nodes, as it writes them once the "
+            "syntax returns to the root or more nodes are created."
         ),
         metavar="FORMAT",
+        type=parse_formats,
+    )
+    parser.add_argument(
+        "--parallel",
+        action="store_true",
+        help="Write the output of multiple formats in parallel threads.",
+    )
+    parser.add_argument(
+        "--record",
+        default=None,
+        help=(
+            "Path of the nodes written as rows in csv, sqlite or tsv output. "
+            "Default are the top-level nodes. Sqlite output uses a generic node "
+            "table if no record path is given."
+        ),
+        metavar="PATH",
+    )
+    parser.add_argument(
+        "--columns",
+        default=None,
+        help=(
+            "Comma separated paths of the columns relative to a record in csv or tsv "
+            "output, e.g. `@id,name,name/@lang`. Inferred from the first records "
+            "by default."
+        ),
+        metavar="PATHS",
+    )
+    parser.add_argument(
+        "--batch-size",
+        default=None,
+        help="Number of rows inserted at once in sqlite output. Default is 1000.",
+        metavar="SIZE",
+        type=int,
+    )
+    parser.add_argument(
+        "--shard-records",
+        default=None,
+        help="Split the output into files with at most N top-level nodes.",
+        metavar="N",
+        type=int,
+    )
+    parser.add_argument(
+        "--shard-size",
+        default=None,
+        help="Split the output into files of about SIZE bytes, e.g. 64M.",
+        metavar="SIZE",
+        type=parse_size,
+    )
+    parser.add_argument(
+        "--shards",
+        default=None,
+        help="Split the output into N files by the hash of the --shard-key attribute.",
+        metavar="N",
+        type=int,
+    )
+    parser.add_argument(
+        "--shard-key",
+        default=None,
+        help="Attribute of the top-level nodes selecting the shard.",
+        metavar="ATTRIBUTE",
+    )
+    parser.add_argument(
+        "--lazy-text",
+        action="store_true",
+        help=(
+            "Reference matched text in the input instead of copying it. "
+            "Reduces memory usage of syntaxes with many captured values."
+        ),
+    )
+    parser.add_argument(
+        "--buffered",
+        action="store_true",
+        help=(
+            "Always buffer the whole output. By default the output is streamed, "
+            "if the syntax only changes the current top-level node."
+        ),
+    )
+    parser.add_argument(
+        "--profile",
+        const="",
+        default=None,
+        help=(
+            "Collect execution statistics of every grammar and statement. "
+            "Prints a report sorted by time or writes it as json to FILE."
+        ),
+        metavar="FILE",
+        nargs="?",
+    )
+    parser.add_argument(
+        "--reorder",
+        default=None,
+        help=(
+            "Reorder exclusive match statements to try the most matching ones "
+            "first, using the statistics written with --profile to PROFILE."
+        ),
+        metavar="PROFILE",
+    )
+    parser.add_argument(
+        "--strict",
+        action="store_true",
+        help=(
+            "Refuse to run a syntax with patterns which can backtrack "
+            "catastrophically, instead of warning about them."
+        ),
+    )
+    parser.add_argument(
+        "--timeout",
+        default=None,
+        help="Stop converting a file after SECONDS. Converts in worker processes.",
+        metavar="SECONDS",
+        type=float,
+    )
+    parser.add_argument(
+        "--max-tokens",
+        default=None,
+        help="Stop converting a file after executing N statements and functions.",
+        metavar="N",
+        type=int,
+    )
+    parser.add_argument(
+        "--max-memory",
+        default=None,
+        help=(
+            "Stop converting a file if it needs more than SIZE bytes of memory, "
+            "e.g. 512M. Converts in worker processes."
+        ),
+        metavar="SIZE",
+        type=parse_size,
+    )
+    parser.add_argument(
+        "--keep-going",
+        action="store_true",
+        help=(
+            "Continue with the remaining files if a file fails to convert and "
+            "print a summary of the failures."
+        ),
+    )
+    parser.add_argument(
+        "--trace",
+        default=None,
+        help=(
+            "Write a binary trace of every executed statement to FILE. "
+            "Requires a single input file. "
+            "Use `pudding trace summarize FILE` to analyse it."
+        ),
+        metavar="FILE",
+    )
+    parser.add_argument(
+        "--stats",
+        default=None,
+        help=(
+            "Write statistics of the conversion, e.g. sizes, node count and times "
+            "of each file, as json to FILE."
+        ),
+        metavar="FILE",
+    )
+    parser.add_argument(
+        "--measure-memory",
+        action="store_true",
+        help="Add the peak memory of each file to the statistics. Slow.",
+    )
+    parser.add_argument(
+        "--connect",
+        default=None,
+        help=(
+            "Convert with a server started by `pudding serve` listening on "
+            "ADDRESS, which is HOST:PORT or the path of a Unix socket. The token "
+            "of the server is read from the file it wrote."
+        ),
+        metavar="ADDRESS",
     )
     parser.add_argument("--debug", action="store_true", help="Print debug info.")
     parser.add_argument("-V", "--version", action="version", version=__version__)
@@ -60,9 +299,307 @@ def is_valid_path(path: str) -> bool:
     return True
 
 
+def build_trace_parser() -> argparse.ArgumentParser:
+    """Build argument parser of the trace command."""
+    parser = argparse.ArgumentParser(
+        prog="pudding trace", description="Analyse a trace written with --trace."
+    )
+    subparsers = parser.add_subparsers(dest="action", required=True)
+    summarize = subparsers.add_parser(
+        "summarize",
+        help=(
+            "Show hot statements, restarting grammars, grammars without progress "
+            "and the time spent by input position."
+        ),
+    )
+    summarize.add_argument("file", metavar="FILE", help="The trace file.")
+    summarize.add_argument(
+        "-n",
+        "--limit",
+        default=10,
+        help="Maximum number of entries per section. Default is 10.",
+        type=int,
+    )
+    summarize.add_argument(
+        "--json", action="store_true", help="Print the summary as json."
+    )
+    return parser
+
+
+def trace_main(argv: Sequence[str]) -> int:
+    """Run the trace command."""
+    from .processor.trace import Trace, format_summary
+
+    args = build_trace_parser().parse_args(argv)
+    if not is_valid_path(args.file):
+        return 2
+    summary = Trace(Path(args.file)).summarize(args.limit)
+    if args.json:
+        print(json.dumps(summary, indent=4))
+    else:
+        print(format_summary(summary))
+    return 0
+
+
+def build_reorder_parser() -> argparse.ArgumentParser:
+    """Build argument parser of the reorder command."""
+    parser = argparse.ArgumentParser(
+        prog="pudding reorder",
+        description=(
+            "Write a syntax file with exclusive match statements reordered by "
+            "the matches in a profile written with --profile."
+        ),
+    )
+    parser.add_argument("profile", metavar="PROFILE", help="The profile json file.")
+    parser.add_argument(
+        "-s",
+        "--syntax",
+        help="The syntax file to reorder.",
+        metavar="SYNTAX_FILE",
+        required=True,
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default=None,
+        help="The file to write the reordered syntax to. Default is stdout.",
+        metavar="FILE",
+    )
+    return parser
+
+
+def reorder_main(argv: Sequence[str]) -> int:
+    """Run the reorder command."""
+    from .compiler import Compiler
+    from .compiler.patterns import MatchReorderer, load_profile, reorder_source
+
+    args = build_reorder_parser().parse_args(argv)
+    if not is_valid_path(args.profile) or not is_valid_path(args.syntax):
+        return 2
+    syntax_file = Path(args.syntax)
+    syntax = Compiler().compile_file(syntax_file)
+    reorderings = MatchReorderer(syntax, load_profile(Path(args.profile))).reorder()
+    for reordering in reorderings:
+        print(f"Reordered {reordering}", file=sys.stderr)
+    content = reorder_source(
+        syntax_file.read_text("utf-8"), str(syntax_file), reorderings
+    )
+    if args.output is None:
+        print(content, end="")
+    else:
+        Path(args.output).write_text(content, "utf-8")
+    return 0
+
+
+def build_generate_parser() -> argparse.ArgumentParser:
+    """Build argument parser of the generate command."""
+    parser = argparse.ArgumentParser(
+        prog="pudding generate",
+        description=(
+            "Generate random input matching the match statements of a syntax, "
+            "starting at the input grammar."
+        ),
+    )
+    parser.add_argument(
+        "-s",
+        "--syntax",
+        help="The syntax file to generate input for.",
+        metavar="SYNTAX_FILE",
+        required=True,
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default=None,
+        help="The file to write the input to. Default is stdout.",
+        metavar="FILE",
+    )
+    parser.add_argument(
+        "--size",
+        default=1024**2,
+        help="Minimum number of characters, e.g. `100K` or `1G`. Default is 1M.",
+        type=parse_size,
+    )
+    parser.add_argument(
+        "--seed", default=None, help="Seed of the random generator.", type=int
+    )
+    parser.add_argument(
+        "--max-depth",
+        default=5,
+        help="Maximum depth of grammar calls. Default is 5.",
+        type=int,
+    )
+    parser.add_argument(
+        "--max-items",
+        default=5,
+        help="Maximum number of statements per grammar call. Default is 5.",
+        type=int,
+    )
+    return parser
+
+
+def generate_main(argv: Sequence[str]) -> int:
+    """Run the generate command."""
+    from .compiler import Compiler
+    from .compiler.generator import InputGenerator
+
+    args = build_generate_parser().parse_args(argv)
+    if not is_valid_path(args.syntax):
+        return 2
+    syntax = Compiler().compile_file(Path(args.syntax))
+    generator = InputGenerator(
+        syntax, seed=args.seed, max_depth=args.max_depth, max_items=args.max_items
+    )
+    try:
+        if args.output is None:
+            for text in generator.generate(args.size):
+                sys.stdout.write(text)
+        else:
+            generator.write(Path(args.output), args.size)
+    except ValueError as e:
+        logger.error("Generating input failed: %s", e)
+        return 1
+    return 0
+
+
+def build_serve_parser() -> argparse.ArgumentParser:
+    """Build argument parser of the serve command."""
+    parser = argparse.ArgumentParser(
+        prog="pudding serve",
+        description=(
+            "Run a server converting files with compiled syntaxes kept in memory. "
+            "Use `pudding --connect ADDRESS` to convert files with it."
+        ),
+    )
+    parser.add_argument(
+        "--host",
+        default=DEFAULT_HOST,
+        help=(
+            "The host to listen on, which has to be a loopback address like "
+            f"::1 or localhost. Default is {DEFAULT_HOST}."
+        ),
+    )
+    parser.add_argument(
+        "--port",
+        default=DEFAULT_PORT,
+        help=f"The port to listen on. Default is {DEFAULT_PORT}.",
+        type=int,
+    )
+    parser.add_argument(
+        "--socket",
+        default=None,
+        help="Listen on a Unix socket at PATH instead of a port.",
+        metavar="PATH",
+    )
+    parser.add_argument(
+        "--workers",
+        default=None,
+        help="Number of worker processes. Default is the number of CPUs.",
+        type=int,
+    )
+    parser.add_argument("--debug", action="store_true", help="Print debug info.")
+    return parser
+
+
+def serve_main(argv: Sequence[str]) -> int:
+    """Run the serve command."""
+    from .server import ConversionServer
+
+    parser = build_serve_parser()
+    args = parser.parse_args(argv)
+    if args.socket is None and not is_loopback(args.host):
+        parser.error("--host must be a loopback address")
+    logging.basicConfig(
+        format="[%(asctime)s] %(levelname)s: %(message)s",
+        datefmt="%Y-%m-%d %I:%M:%S",
+        level=logging.DEBUG if args.debug else logging.INFO,
+    )
+    address: Address = args.socket or (args.host, args.port)
+    server = ConversionServer(address, args.workers)
+    try:
+        server.start_workers()
+        logger.info(
+            "Listening on %s with %s workers, token in %s",
+            address,
+            server.workers,
+            server.token_file,
+        )
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+    return 0
+
+
+COMMANDS: dict[str, Callable[[Sequence[str]], int]] = {
+    "generate": generate_main,
+    "reorder": reorder_main,
+    "serve": serve_main,
+    "trace": trace_main,
+}
+
+
+def _report(args: argparse.Namespace, stats: dict[str, Any]) -> int:
+    """Write the statistics and print the failures of a conversion.
+
+    :param args: The parsed arguments.
+    :param stats: The statistics of the conversion as dict.
+    :returns: The exit code.
+    """
+    logger.debug("Total: %.6fs", stats["total_time"])
+    if args.stats is not None:
+        with open(args.stats, "w", encoding="utf-8") as f:
+            json.dump(stats, f, indent=4)
+    if stats["failures"]:
+        print(format_failures(stats), file=sys.stderr)
+        return 1
+    return 0
+
+
 def main(argv: Sequence[str] | None = None) -> int:
     """Check cli arguments."""
-    args = build_parser().parse_args(argv)
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv and argv[0] in COMMANDS:
+        return COMMANDS[argv[0]](argv[1:])
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    writer_options: dict[str, Any] = {}
+    if args.record is not None:
+        writer_options["record_path"] = args.record
+    if args.columns is not None:
+        writer_options["columns"] = args.columns.split(",")
+    if args.batch_size is not None:
+        if args.format != ["sqlite"]:
+            parser.error("--batch-size requires format sqlite")
+        writer_options["batch_size"] = args.batch_size
+    if len(args.format) > 1 and not set(args.format) <= set(SHAREABLE_FORMATS):
+        parser.error("multiple formats must be json, xml or yaml")
+    if args.record is not None and not set(args.format) <= set(RECORD_FORMATS):
+        parser.error("--record requires format csv, sqlite or tsv")
+    if args.columns is not None and not set(args.format) <= set(TABLE_FORMATS):
+        parser.error("--columns requires format csv or tsv")
+    if args.trace is not None and len(args.filename) > 1:
+        parser.error("--trace requires a single input file")
+    if args.shards is not None and args.shard_key is None:
+        parser.error("--shards requires --shard-key")
+    if args.shard_key is not None and args.shards is None:
+        parser.error("--shard-key requires --shards")
+    if args.shards is not None and (args.shard_records or args.shard_size):
+        parser.error("--shards conflicts with --shard-records and --shard-size")
+    shard_options: dict[str, Any] = {}
+    sharded = (args.shard_records, args.shard_size, args.shards) != (None,) * 3
+    if sharded and (len(args.format) > 1 or args.format[0] not in SHARD_FORMATS):
+        parser.error(f"sharding requires one of the formats {', '.join(SHARD_FORMATS)}")
+    for option, value in (
+        ("records", args.shard_records),
+        ("size", args.shard_size),
+        ("shards", args.shards),
+        ("key", args.shard_key),
+    ):
+        if value is not None:
+            shard_options[option] = value
 
     log_level = logging.INFO
     if args.debug:
@@ -83,9 +620,84 @@ def main(argv: Sequence[str] | None = None) -> int:
             return 2
         path, _ = os.path.splitext(f)
         ins.append(Path(f))
-        outs.append(Path(f"{path}.{args.format.lower()}"))
+        outs.append(Path(f"{path}.{args.format[0]}"))
 
-    start = datetime.datetime.now()
-    convert_files(Path(args.syntax), ins, outs, args.format)
-    logger.debug("Total: %s", str(datetime.datetime.now() - start))
-    return 0
+    limits: dict[str, Any] | None = None
+    if (args.timeout, args.max_tokens, args.max_memory) != (None, None, None):
+        limits = {
+            "time": args.timeout,
+            "tokens": args.max_tokens,
+            "memory": args.max_memory,
+        }
+        needs_worker = args.timeout is not None or args.max_memory is not None
+        if needs_worker and (args.profile is not None or args.trace):
+            parser.error(
+                "--profile and --trace can not be used with --timeout or --max-memory"
+            )
+
+    output_format = args.format if len(args.format) > 1 else args.format[0]
+    options: dict[str, Any] = {
+        "lazy_text": args.lazy_text,
+        "auto_stream": not args.buffered,
+        "writer_options": writer_options,
+        "parallel": args.parallel,
+        "shard_options": shard_options or None,
+        "measure_memory": args.measure_memory,
+        "strict": args.strict,
+        "keep_going": args.keep_going,
+    }
+    if args.connect is not None:
+        if args.profile is not None or args.trace or args.reorder:
+            parser.error(
+                "--profile, --trace and --reorder can not be used with --connect"
+            )
+        request = {
+            "syntax": str(Path(args.syntax).resolve()),
+            "inputs": [str(path.resolve()) for path in ins],
+            "outputs": [str(path.resolve()) for path in outs],
+            "format": output_format,
+            "options": {**options, "limits": limits},
+        }
+        try:
+            result = send_request(parse_address(args.connect), request)
+        except (OSError, RuntimeError) as e:
+            logger.error("Conversion with server failed: %s", e)
+            return 1
+        return _report(args, result)
+
+    from .processor.hooks import Listener
+    from .processor.limits import FORK_SUPPORTED, FORK_UNSUPPORTED, Limits
+    from .processor.profiler import Profiler
+    from .processor.trace import TraceRecorder
+    from .util import convert_files
+
+    needs_fork = args.timeout is not None or args.max_memory is not None
+    if needs_fork and not FORK_SUPPORTED:
+        parser.error(f"--timeout and --max-memory: {FORK_UNSUPPORTED}")
+    listeners: list[Listener] = []
+    profiler = None if args.profile is None else Profiler()
+    if profiler is not None:
+        listeners.append(profiler)
+    recorder = None if args.trace is None else TraceRecorder(Path(args.trace))
+    if recorder is not None:
+        listeners.append(recorder)
+    try:
+        stats = convert_files(
+            Path(args.syntax),
+            ins,
+            outs,
+            output_format,
+            listeners=listeners,
+            reorder_profile=None if args.reorder is None else Path(args.reorder),
+            limits=None if limits is None else Limits(**limits),
+            **options,
+        )
+    finally:
+        if recorder is not None:
+            recorder.close()
+    if profiler is not None:
+        if args.profile:
+            profiler.write_json(Path(args.profile))
+        else:
+            print(profiler.report())
+    return _report(args, stats.to_dict())
@@ -0,0 +1,130 @@
+"""Client of the server started by `pudding serve`.
+
+Only imports the standard library, so the client starts fast.
+"""
+
+import http.client
+import ipaddress
+import json
+import os
+import socket
+from pathlib import Path
+from typing import Any
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+type Address = str | tuple[str, int]
+
+
+def is_loopback(host: str) -> bool:
+    """Check if a host is `localhost` or a loopback address like `::1`.
+
+    :param host: The host name or IP address, IPv6 addresses optionally in
+        brackets.
+    :returns: If the host is local.
+    """
+    host = host.lower()
+    if host.startswith("[") and host.endswith("]"):
+        host = host[1:-1]
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def parse_address(value: str) -> Address:
+    """Parse the address of a server.
+
+    :param value: `HOST:PORT`, `:PORT` or the path of a Unix socket.
+    :returns: The path of the socket or a tuple of host and port.
+    :raises ValueError: If the port is not a number.
+    """
+    if os.sep in value or ":" not in value:
+        return value
+    host, _, port = value.rpartition(":")
+    return host or DEFAULT_HOST, int(port)
+
+
+def token_path(address: Address) -> Path:
+    """Return the path of the file containing the token of a server.
+
+    The file of a server listening on a Unix socket is next to the socket. Others
+    are in the user's runtime directory, or the cache directory if it is not set.
+
+    :param address: Path of a Unix socket or a tuple of host and port.
+    :returns: The path of the token file.
+    """
+    if isinstance(address, str):
+        return Path(f"{address}.token")
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR") or Path.home() / ".cache"
+    return Path(runtime_dir) / "pudding" / f"server-{address[1]}.token"
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP connection over a Unix socket."""
+
+    def __init__(self, socket_path: str, timeout: float | None = None) -> None:
+        """Init for _UnixHTTPConnection class.
+
+        :param socket_path: Path of the socket.
+        :param timeout: Timeout of the connection in seconds.
+        """
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self) -> None:
+        """Connect to the socket."""
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+def send_request(
+    address: Address,
+    request: dict[str, Any],
+    timeout: float | None = None,
+    token: str | None = None,
+) -> dict[str, Any]:
+    """Send a conversion request to a server.
+
+    :param address: Path of a Unix socket or a tuple of host and port.
+    :param request: The request. See `convert_request`.
+    :param timeout: Timeout of the connection in seconds.
+    :param token: Token of the server. Default is the one in `token_path`.
+    :returns: The statistics of the conversion as dict.
+    :raises OSError: If the token file can not be read.
+    :raises RuntimeError: If the server failed to convert the files.
+    """
+    if token is None:
+        token = token_path(address).read_text(encoding="ascii").strip()
+    connection: http.client.HTTPConnection
+    if isinstance(address, str):
+        connection = _UnixHTTPConnection(address, timeout)
+    else:
+        connection = http.client.HTTPConnection(*address, timeout=timeout)
+    try:
+        try:
+            connection.request(
+                "POST",
+                "/convert",
+                json.dumps(request).encode("utf-8"),
+                {
+                    "Content-Type": "application/json",
+                    "Authorization": f"Bearer {token}",
+                },
+            )
+        except (BrokenPipeError, ConnectionResetError):
+            # the server rejected the request before reading the whole body
+            pass
+        response = connection.getresponse()
+        data = json.loads(response.read())
+    finally:
+        connection.close()
+    if response.status != 200:
+        raise RuntimeError(data.get("error", response.reason))
+    stats: dict[str, Any] = data["stats"]
+    return stats
@@ -0,0 +1,79 @@
+"""Private regex internals of CPython used to analyse patterns.
+
+The parser of the `re` module is not a public API and may change between Python
+versions. Everything the analysis relies on is checked when this module is
+imported, so an unsupported version raises an ImportError here instead of
+failing in the middle of an analysis.
+"""
+
+import sys
+
+OPCODES = (
+    "ANY",
+    "ASSERT",
+    "ASSERT_NOT",
+    "AT",
+    "ATOMIC_GROUP",
+    "BRANCH",
+    "CATEGORY",
+    "CATEGORY_DIGIT",
+    "CATEGORY_NOT_DIGIT",
+    "CATEGORY_NOT_SPACE",
+    "CATEGORY_NOT_WORD",
+    "CATEGORY_SPACE",
+    "CATEGORY_WORD",
+    "GROUPREF",
+    "IN",
+    "LITERAL",
+    "MAX_REPEAT",
+    "MIN_REPEAT",
+    "NEGATE",
+    "NOT_LITERAL",
+    "POSSESSIVE_REPEAT",
+    "RANGE",
+    "SUBPATTERN",
+)
+
+UNSUPPORTED = (
+    f"The regex parser of Python {sys.version.split()[0]} is not supported by the "
+    "pattern analysis"
+)
+
+try:
+    import _sre
+    from re import _casefix, _parser  # type: ignore[attr-defined]
+except ImportError as error:  # pragma: no cover
+    raise ImportError(f"{UNSUPPORTED}: {error}") from error
+
+
+def _check() -> None:
+    """Check that the parser provides the used opcodes and item layout.
+
+    :raises ImportError: If something is missing or has a different layout.
+    """
+    missing = [name for name in OPCODES if not hasattr(_parser, name)]
+    if not hasattr(_sre, "unicode_tolower"):
+        missing.append("_sre.unicode_tolower")
+    if not isinstance(getattr(_casefix, "_EXTRA_CASES", None), dict):
+        missing.append("_casefix._EXTRA_CASES")
+    if missing:
+        raise ImportError(f"{UNSUPPORTED}: missing {', '.join(missing)}")
+    try:
+        parsed = _parser.parse("(?i:a)+", 0)
+        (repeat, (low, high, body)), *_ = parsed
+        (subpattern, (group, add_flags, del_flags, items)), *_ = body
+        valid = (
+            repeat is _parser.MAX_REPEAT
+            and subpattern is _parser.SUBPATTERN
+            and items[0] == (_parser.LITERAL, ord("a"))
+            and isinstance(parsed.state.flags, int)
+        )
+    except (TypeError, ValueError, AttributeError, IndexError) as error:
+        raise ImportError(f"{UNSUPPORTED}: {error}") from error
+    if not valid:
+        raise ImportError(f"{UNSUPPORTED}: unknown layout of parsed patterns")
+
+
+_check()
+
+__all__ = ["_casefix", "_parser", "_sre"]
@@ -0,0 +1,174 @@
+"""Static analysis of the output functions used by a syntax."""
+
+import logging
+
+from ..processor.grammar import Grammar, TokenList
+from ..tokens.functions import grammar_call, out
+from ..tokens.functions.do.do import Do
+from ..tokens.functions.out.out import Out
+from ..tokens.statements.statement import MultiExpStatement, Statement
+from ..tokens.token import BaseToken
+from ..writer.node import Node
+from .compiler import Syntax
+
+STREAMING_FORMATS = {"json": "slijson", "xml": "incxml"}
+ROOT = 0
+TOP_LEVEL = 1
+NESTED = 2
+
+logger = logging.getLogger(__name__)
+
+
+class OutputAnalysis:
+    """Class checking if the output of a syntax can be streamed.
+
+    Streaming writers write a top-level node as soon as all entered paths have been
+    left and group the written nodes by name. This is only equal to buffering the
+    whole output, if all output functions executed at the root only create new
+    top-level nodes, all other functions only change the subtree of the currently
+    open node and the nodes of a name have the same path. Buffered nodes are
+    grouped by their path including the attributes, so neither different
+    attributes in the created paths nor adding attributes to the open top-level
+    node are allowed.
+
+    :var reasons: Reasons why the output has to be buffered.
+    :var top_level_paths: Paths of the created top-level nodes by name.
+    """
+
+    def __init__(self, syntax: Syntax) -> None:
+        """Init for OutputAnalysis class.
+
+        :param syntax: The compiled syntax to analyse.
+        """
+        self.grammars: dict[str, Grammar] = {}
+        for obj in syntax:
+            if isinstance(obj, Grammar):
+                self.grammars[obj.name] = obj
+        self.reasons: list[str] = []
+        self.top_level_paths: dict[str, set[str]] = {}
+        self._visited: set[tuple[str, int]] = set()
+
+    def analyse(self) -> list[str]:
+        """Analyse the syntax starting from the input grammar.
+
+        :returns: Reasons why the output has to be buffered.
+        """
+        if "input" not in self.grammars:
+            self.reasons.append("no input grammar is defined")
+        else:
+            self._visit_grammar("input", ROOT)
+        for name, paths in sorted(self.top_level_paths.items()):
+            if len(paths) > 1:
+                self.reasons.append(
+                    f"top-level nodes {repr(name)} have different attributes"
+                )
+        return self.reasons
+
+    def _visit_grammar(self, name: str, depth: int) -> None:
+        """Analyse a grammar and the grammar it inherits.
+
+        :param name: Name of the grammar.
+        :param depth: If the grammar is executed while the root (ROOT), a top-level
+            node (TOP_LEVEL) or a node below (NESTED) is selected.
+        """
+        if (name, depth) in self._visited:
+            return
+        self._visited.add((name, depth))
+        grammar = self.grammars.get(name)
+        if grammar is None:
+            return
+        if grammar.inherits:
+            self._visit_grammar(grammar.inherits, depth)
+        self._visit_tokens(grammar.tokens, depth)
+
+    def _visit_tokens(self, tokens: TokenList, depth: int) -> None:
+        """Analyse a list of tokens.
+
+        Tokens after out.open() or out.enter() are executed in the opened node until
+        the end of the list.
+
+        :param tokens: The tokens to analyse.
+        :param depth: Depth of the node selected while executing the tokens.
+        """
+        for token in tokens:
+            match token:
+                case tuple():
+                    self._visit_tokens(token[1], depth)
+                case grammar_call.GrammarCall():
+                    self._visit_grammar(token.name, depth)
+                case out.Open() | out.Enter():
+                    if depth == ROOT:
+                        self._check_root_token(token)
+                    depth = min(depth + 1, NESTED)
+                case _:
+                    self._check_token(token, depth)
+
+    def _check_token(self, token: BaseToken, depth: int) -> None:
+        """Check a token which does not change the selected node.
+
+        :param token: The token to check.
+        :param depth: Depth of the node selected while executing the token.
+        """
+        match token:
+            case out.EnqueueAfter() | out.EnqueueBefore() | out.EnqueueOnAdd():
+                self._add_reason(token, "may be executed while the root is selected")
+            case out.SetRootName():
+                self._add_reason(token, "changes the already written root node")
+            case out.ClearQueue() | out.Say():
+                pass
+            case out.AddAttribute() if depth == TOP_LEVEL:
+                path = token.get_string(0).value
+                if "$" in path or path.strip("./") == "":
+                    self._add_reason(token, "changes the path of a top-level node")
+            case Out():
+                if depth == ROOT:
+                    self._check_root_token(token)
+            case MultiExpStatement() | Statement() | Do():
+                pass
+            case _:
+                self._add_reason(token, "is unknown")
+
+    def _check_root_token(self, token: BaseToken) -> None:
+        """Check an output function executed while the root is selected.
+
+        :param token: The token to check.
+        """
+        if not isinstance(token, (out.Create, out.Open)):
+            self._add_reason(token, "may change already written top-level nodes")
+            return
+        path = token.get_string(0).value
+        if "$" in path:
+            self._add_reason(token, "creates top-level nodes with variable names")
+        elif "/" in path.strip("/") or path in (".", ""):
+            self._add_reason(token, "creates nodes in existing top-level nodes")
+        else:
+            node = Node.from_path(path.strip("/"))
+            self.top_level_paths.setdefault(node.name, set()).add(node.node_path)
+
+    def _add_reason(self, token: BaseToken, reason: str) -> None:
+        """Add a reason for buffering the output.
+
+        :param token: The token causing the buffering.
+        :param reason: Description of the problem.
+        """
+        self.reasons.append(f"{token.name}() in line {token.lineno} {reason}")
+
+
+def get_streaming_format(syntax: Syntax, output_format: str) -> str:
+    """Return the streaming variant of an output format if the syntax allows it.
+
+    Logs the reason if the output has to be buffered.
+
+    :param syntax: The compiled syntax.
+    :param output_format: The requested output format.
+    :returns: The streaming output format or the given one.
+    """
+    streaming_format = STREAMING_FORMATS.get(output_format)
+    if streaming_format is None:
+        return output_format
+    reasons = OutputAnalysis(syntax).analyse()
+    if reasons:
+        logger.info("Buffering %s output, because %s.", output_format, reasons[0])
+        return output_format
+    logger.debug("Streaming output using format %s", streaming_format)
+    return streaming_format
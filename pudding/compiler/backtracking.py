@@ -0,0 +1,321 @@
+"""Static analysis of patterns which can backtrack catastrophically."""
+
+import logging
+import re
+from collections import Counter
+from collections.abc import Iterator, Sequence
+from pathlib import Path
+from typing import Any
+
+from ..datatypes import Data, Or, Varname
+from ..processor.context import Context
+from ..processor.grammar import Grammar, TokenList
+from ..reader import Reader
+from ..tokens.functions.out.enqueue import Enqueue
+from ..tokens.statements.define import Define
+from ..tokens.statements.statement import MultiExpStatement
+from ..tokens.token import BaseToken
+from ..writer.writers.writer import Writer
+from ._regex import _parser
+from .compiler import Syntax
+from .patterns import FirstChars, case_key, sequence_first_chars
+
+BACKTRACKING_REPEATS = (_parser.MAX_REPEAT, _parser.MIN_REPEAT)
+SINGLE_CHARS = (_parser.LITERAL, _parser.IN, _parser.NOT_LITERAL, _parser.ANY)
+UNIVERSE = frozenset(chr(code) for code in range(0x250))
+
+NESTED_QUANTIFIERS = "nested quantifiers match the same characters"
+OVERLAPPING_ALTERNATIVES = "alternatives in a repetition match the same characters"
+
+logger = logging.getLogger(__name__)
+
+
+def _contains(first: FirstChars, char: str) -> bool:
+    """Check if a character is one of the first characters."""
+    if char in first.chars or case_key(char) in first.keys:
+        return True
+    return any(regex.match(char) for regex in first.classes)
+
+
+def _overlap(a: FirstChars, b: FirstChars) -> bool:
+    """Check if two sets of first characters have a character in common.
+
+    Character classes are compared on the first 592 unicode characters.
+
+    :param a: The first characters of one sequence.
+    :param b: The first characters of another sequence.
+    :returns: If a common character was found.
+    """
+    candidates = UNIVERSE | a.chars | b.chars | {chr(key) for key in a.keys | b.keys}
+    return any(_contains(a, char) and _contains(b, char) for char in candidates)
+
+
+def _flatten(items: Any) -> list[tuple[Any, Any]]:
+    """Replace groups in a parsed sequence by their items.
+
+    :param items: The parsed sequence.
+    :returns: The flattened sequence.
+    """
+    flat = []
+    for op, av in items:
+        if op is _parser.SUBPATTERN and not av[1] and not av[2]:
+            flat += _flatten(av[3])
+        else:
+            flat.append((op, av))
+    return flat
+
+
+def _positions(items: Any, flags: int) -> tuple[list[FirstChars], bool]:
+    """Return the characters of the leading single character items of a sequence.
+
+    :param items: The parsed sequence.
+    :param flags: Regex flags of the sequence.
+    :returns: The characters by position and if the sequence has no other items.
+    """
+    positions: list[FirstChars] = []
+    for item in _flatten(items):
+        if item[0] not in SINGLE_CHARS:
+            return positions, False
+        result = sequence_first_chars([item], flags)
+        if result is None:
+            return positions, False
+        positions.append(result[0])
+    return positions, True
+
+
+def _alternatives_overlap(
+    branches: list[Any], flags: int, follow: list[FirstChars]
+) -> bool:
+    """Check if two alternatives can match the start of the same text.
+
+    The alternatives are compared character by character. If an alternative ends
+    first, the other one is compared with the characters following the alternation.
+    An alternative which can match the empty string, like the empty alternative
+    CPython factors `(a|aa)` into, can start with the following characters too.
+    Alternatives which can not be analysed are assumed to overlap.
+
+    :param branches: The parsed alternatives.
+    :param flags: Regex flags of the alternatives.
+    :param follow: The characters which can follow the alternation.
+    :returns: If two alternatives overlap.
+    """
+    alternatives = []
+    for branch in branches:
+        first = sequence_first_chars(branch, flags)
+        if first is None:
+            return True
+        starts = [first[0], *follow] if first[1] else [first[0]]
+        alternatives.append((starts, _positions(branch, flags)))
+    for index, (starts_a, (positions_a, complete_a)) in enumerate(alternatives):
+        for starts_b, (positions_b, complete_b) in alternatives[index + 1 :]:
+            if not any(_overlap(a, b) for a in starts_a for b in starts_b):
+                continue
+            if not all(_overlap(a, b) for a, b in zip(positions_a, positions_b)):
+                continue
+            if len(positions_a) > len(positions_b):
+                positions_a, positions_b = positions_b, positions_a
+                complete_a, complete_b = complete_b, complete_a
+            if len(positions_a) == len(positions_b) or not complete_a:
+                return True
+            if any(_overlap(positions_b[len(positions_a)], f) for f in follow):
+                return True
+    return False
+
+
+class BacktrackingAnalysis:
+    r"""Class finding patterns of a syntax which can backtrack catastrophically.
+
+    A repetition backtracks exponentially on input it does not match, if an
+    iteration can be split in several ways. This is assumed, if a repetition in the
+    repeated sequence can match the same first character as the items following it,
+    including the next iteration, like `(\w+\s?)+`, or if alternatives in the
+    repeated sequence start with the same characters, like `(x|\w\w)+`. This is a
+    heuristic, so some reported repetitions may only backtrack polynomially.
+
+    The patterns of defines, statements and enqueue functions are checked with
+    their variables resolved, as they are matched, so repetitions spanning several
+    values or only occurring with the flags of a statement are found too. Problems
+    of a variable are reported at its define only, so a pattern is only reported if
+    it has more problems than its variables.
+
+    :var context: Context holding the variables of the executed defines.
+    :var issues: Descriptions of the found problems.
+    """
+
+    def __init__(self, syntax: Syntax) -> None:
+        """Init for BacktrackingAnalysis class.
+
+        :param syntax: The compiled syntax to analyse.
+        """
+        self.syntax = syntax
+        self.context = Context(Reader(""), Writer(Path()))
+        self.issues: list[str] = []
+
+    def analyse(self) -> list[str]:
+        """Analyse all patterns of the syntax.
+
+        :returns: Descriptions of the found problems.
+        """
+        for obj in self.syntax:
+            if isinstance(obj, Define):
+                self._check_define(obj)
+            elif isinstance(obj, Grammar):
+                self._visit_tokens(obj.tokens)
+        return self.issues
+
+    def _visit_tokens(self, tokens: TokenList) -> None:
+        """Check the patterns of a list of tokens.
+
+        :param tokens: The tokens to check.
+        """
+        for token in tokens:
+            if isinstance(token, tuple):
+                self._check_token(token[0])
+                self._visit_tokens(token[1])
+            else:
+                self._check_token(token)
+
+    def _check_define(self, define: Define) -> None:
+        """Set the variable of a define and check its pattern.
+
+        :param define: The define statement.
+        """
+        try:
+            define.execute(self.context)
+        except (NameError, SyntaxError):
+            return
+        pattern = self.context.variables[define.values[0].value]
+        self._check_pattern(define, pattern, define.values[1:], re.NOFLAG)
+
+    def _check_token(self, token: BaseToken) -> None:
+        """Check the resolved patterns of a token.
+
+        :param token: The token to check.
+        """
+        if isinstance(token, Enqueue):
+            try:
+                pattern = token.get_pattern(self.context).pattern
+            except (NameError, re.error):
+                return
+            self._check_pattern(token, pattern, token.values[:1], re.NOFLAG)
+        elif isinstance(token, MultiExpStatement) and not isinstance(token, Define):
+            alternatives: list[list[Data]] = [[]]
+            for value in token.values:
+                if isinstance(value, Or):
+                    alternatives.append([])
+                else:
+                    alternatives[-1].append(value)
+            try:
+                patterns = list(token.get_patterns(self.context))
+            except NameError:
+                return
+            flags = getattr(token, "re_flag", re.NOFLAG)
+            for pattern, values in zip(patterns, alternatives):
+                self._check_pattern(token, pattern, values, flags)
+
+    def _check_pattern(
+        self, token: BaseToken, pattern: str, values: Sequence[Data], flags: int
+    ) -> None:
+        """Report the first problem of a pattern not caused by its variables.
+
+        :param token: The token the pattern belongs to.
+        :param pattern: The resolved pattern.
+        :param values: The values the pattern is combined from.
+        :param flags: Regex flags of the pattern.
+        """
+        problems = Counter(self._get_problems(pattern, flags))
+        for value in values:
+            if isinstance(value, Varname):
+                variable = self.context.get_var(value)
+                problems -= Counter(self._get_problems(variable, re.NOFLAG))
+        if problems:
+            self.issues.append(
+                f"{token.filename}:{token.lineno}: /{pattern}/ can backtrack "
+                f"catastrophically, because {next(iter(problems))}"
+            )
+
+    def _get_problems(self, pattern: str, flags: int) -> list[str]:
+        """Return the problems of a pattern.
+
+        :param pattern: The pattern.
+        :param flags: Regex flags of the pattern.
+        :returns: The problems or an empty list if the pattern is invalid.
+        """
+        try:
+            parsed = _parser.parse(pattern, flags)
+        except re.error:
+            return []
+        return list(self._find_problems(parsed, parsed.state.flags))
+
+    def _find_problems(self, items: Any, flags: int) -> Iterator[str]:
+        """Find repetitions which can backtrack catastrophically.
+
+        :param items: The parsed sequence.
+        :param flags: Regex flags of the sequence.
+        :returns: Iterator of the problems.
+        """
+        for op, av in items:
+            if op in BACKTRACKING_REPEATS:
+                if av[1] > 1:
+                    problem = self._check_repetition(av[2], flags)
+                    if problem is not None:
+                        yield problem
+                yield from self._find_problems(av[2], flags)
+            elif op is _parser.POSSESSIVE_REPEAT:
+                yield from self._find_problems(av[2], flags)
+            elif op is _parser.ATOMIC_GROUP:
+                yield from self._find_problems(av, flags)
+            elif op is _parser.SUBPATTERN:
+                yield from self._find_problems(av[3], (flags | av[1]) & ~av[2])
+            elif op is _parser.BRANCH:
+                for branch in av[1]:
+                    yield from self._find_problems(branch, flags)
+            elif op in (_parser.ASSERT, _parser.ASSERT_NOT):
+                yield from self._find_problems(av[1], flags)
+
+    def _check_repetition(self, body: Any, flags: int) -> str | None:
+        """Check if an iteration of a repetition can be split in several ways.
+
+        :param body: The parsed sequence of the repetition.
+        :param flags: Regex flags of the sequence.
+        :returns: The problem or None.
+        """
+        sequence = _flatten(body)
+        whole = sequence_first_chars(sequence, flags)
+        if whole is None:
+            return None
+        for index, (op, av) in enumerate(sequence):
+            if op is not _parser.BRANCH and (
+                op not in BACKTRACKING_REPEATS or av[1] <= 1
+            ):
+                continue
+            tail = sequence_first_chars(sequence[index + 1 :], flags)
+            if tail is None:
+                continue
+            follow = [tail[0], whole[0]] if tail[1] else [tail[0]]
+            if op is _parser.BRANCH:
+                if _alternatives_overlap(av[1], flags, follow):
+                    return OVERLAPPING_ALTERNATIVES
+                continue
+            inner = sequence_first_chars(av[2], flags)
+            if inner is not None and any(_overlap(inner[0], f) for f in follow):
+                return NESTED_QUANTIFIERS
+        return None
+
+
+def check_backtracking(syntax: Syntax, strict: bool = False) -> list[str]:
+    """Check the patterns of a syntax for catastrophic backtracking.
+
+    Logs a warning for every problem.
+
+    :param syntax: The compiled syntax.
+    :param strict: Raise an error if a problem was found.
+    :returns: Descriptions of the found problems.
+    :raises SyntaxError: If strict and a problem was found.
+    """
+    issues = BacktrackingAnalysis(syntax).analyse()
+    if strict and issues:
+        raise SyntaxError("\n".join(issues))
+    for issue in issues:
+        logger.warning(issue)
+    return issues
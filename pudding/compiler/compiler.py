@@ -52,7 +52,10 @@ class Compiler:
         line = line.strip()
         for token in self.tokens:
             if token.matches(line):
-                return token.from_string(line, lineno)
+                obj = token.from_string(line, lineno)
+                if hasattr(self, "source_path"):
+                    obj.filename = str(self.source_path)
+                return obj
         raise SyntaxError(f"Invalid statement in line {lineno}")
 
     def _parse_syntax(
@@ -141,7 +144,9 @@ class Compiler:
             """
             if len(token.values) == 2:
                 inherits = token.values[1].value
-            return Grammar(token.lineno, token.values[0].value, sub_tokens, inherits)
+            grammar = Grammar(token.lineno, token.values[0].value, sub_tokens, inherits)
+            grammar.filename = token.filename
+            return grammar
 
         new_syntax: Syntax = []
         sub_tokens: TokenList = []
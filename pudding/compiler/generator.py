@@ -0,0 +1,429 @@
+"""Generator of random input matching a syntax."""
+
+import random
+import string
+from collections.abc import Iterator
+from pathlib import Path
+from re import Pattern
+from typing import Any
+
+from ..processor.context import Context
+from ..processor.grammar import Grammar, TokenList
+from ..processor.processor import Processor
+from ..reader import Reader
+from ..tokens.functions.do.next import Next as DoNext
+from ..tokens.functions.do.return_ import Return as DoReturn
+from ..tokens.functions.grammar_call import GrammarCall
+from ..tokens.statements.match import IMatch, Match
+from ..tokens.statements.next import Next
+from ..tokens.statements.return_ import Return
+from ..tokens.statements.skip import ISkip, Skip
+from ..tokens.token import BaseToken
+from ..writer.writers.writer import Writer
+from ._regex import _parser
+from .compiler import Syntax
+from .patterns import REPEATS, char_class, set_chars
+
+PRINTABLE = string.ascii_letters + string.digits + string.punctuation + " "
+WHITESPACE = "\n\t\r\x0b\x0c"
+
+type Candidate = tuple[BaseToken, TokenList]
+
+
+class RegexGenerator:
+    """Class generating random strings matching a regex.
+
+    Repetitions are limited to `max_repeat` more than their minimum. Character
+    classes which can not be listed are sampled from the printable ascii
+    characters, followed by whitespace. Anchors and lookarounds are ignored, so a
+    generated string is not guaranteed to match.
+    """
+
+    def __init__(self, rng: random.Random, max_repeat: int = 8) -> None:
+        """Init for RegexGenerator class.
+
+        :param rng: Random number generator.
+        :param max_repeat: Maximum number of repetitions above the minimum.
+        """
+        self.rng = rng
+        self.max_repeat = max_repeat
+        self._classes: dict[tuple[Any, int], list[str]] = {}
+        self._parsed: dict[Pattern[str], Any] = {}
+
+    def generate(self, pattern: Pattern[str]) -> str:
+        """Generate a random string for a pattern.
+
+        :param pattern: The compiled pattern.
+        :returns: The generated string.
+        """
+        parsed = self._parsed.get(pattern)
+        if parsed is None:
+            parsed = _parser.parse(pattern.pattern, pattern.flags)
+            self._parsed[pattern] = parsed
+        groups: dict[int, str] = {}
+        return self._generate(parsed, parsed.state.flags, groups)
+
+    def _generate(self, items: Any, flags: int, groups: dict[int, str]) -> str:
+        """Generate a string for a parsed sequence.
+
+        :param items: The parsed sequence.
+        :param flags: Regex flags of the sequence.
+        :param groups: Generated text of the groups by number.
+        :returns: The generated string.
+        """
+        parts = []
+        for op, av in items:
+            if op is _parser.LITERAL:
+                parts.append(chr(av))
+            elif op is _parser.IN:
+                parts.append(self._choose_char(av, flags))
+            elif op is _parser.NOT_LITERAL:
+                negated = [(_parser.NEGATE, None), (_parser.LITERAL, av)]
+                parts.append(self._choose_char(negated, flags))
+            elif op is _parser.ANY:
+                parts.append(self.rng.choice(PRINTABLE))
+            elif op is _parser.SUBPATTERN:
+                text = self._generate(av[3], (flags | av[1]) & ~av[2], groups)
+                if av[0] is not None:
+                    groups[av[0]] = text
+                parts.append(text)
+            elif op is _parser.ATOMIC_GROUP:
+                parts.append(self._generate(av, flags, groups))
+            elif op in REPEATS:
+                maximum = min(av[1], av[0] + self.max_repeat)
+                count = self.rng.randint(av[0], maximum)
+                if len(av[2]) == 1 and av[2][0][0] is _parser.IN:
+                    chars = self._get_chars(av[2][0][1], flags)
+                    if chars:
+                        parts.append("".join(self.rng.choices(chars, k=count)))
+                    continue
+                for _ in range(count):
+                    parts.append(self._generate(av[2], flags, groups))
+            elif op is _parser.BRANCH:
+                parts.append(self._generate(self.rng.choice(av[1]), flags, groups))
+            elif op is _parser.GROUPREF:
+                parts.append(groups.get(av, ""))
+        return "".join(parts)
+
+    def _get_chars(self, items: list[tuple[Any, Any]], flags: int) -> list[str]:
+        """Return the characters to choose from for a parsed set.
+
+        :param items: The parsed items of the set.
+        :param flags: Regex flags of the set.
+        :returns: The characters, which may be empty if none was found.
+        """
+        key = (tuple(items), flags)
+        chars = self._classes.get(key)
+        if chars is None:
+            chars = set_chars(items)
+            if not chars:
+                regex = char_class(items, flags)
+                chars = [char for char in PRINTABLE if regex.match(char)]
+                chars = chars or [char for char in WHITESPACE if regex.match(char)]
+            self._classes[key] = chars
+        return chars
+
+    def _choose_char(self, items: list[tuple[Any, Any]], flags: int) -> str:
+        """Choose a random character of a parsed set.
+
+        :param items: The parsed items of the set.
+        :param flags: Regex flags of the set.
+        :returns: The character or an empty string if none was found.
+        """
+        chars = self._get_chars(items, flags)
+        return self.rng.choice(chars) if chars else ""
+
+
+class InputGenerator:
+    """Class generating random input for a syntax.
+
+    Starting at the input grammar, a random match statement is chosen and text
+    matching one of its patterns is generated. Text matching a preceding statement
+    of the grammar is generated again, so the chosen statement is executed when
+    processing the input. Grammars called in the block are generated recursively
+    until `max_depth`. If a grammar has statements returning from it, one of them
+    ends the grammar after up to `max_items` other statements.
+
+    Text is generated again up to `attempts` times, if a preceding statement or
+    the pattern of one of the last `window` texts would match into it. If no valid
+    text is found, another statement of the grammar is generated instead, and a
+    ValueError is raised if none of them can follow the previous text.
+
+    `when` statements and blocks with `next` are not generated, because they do not
+    consume the input they are executed for. Only the input is generated, the
+    paths used by output functions are not tracked, so converting the input can
+    still fail, e.g. if an attribute is added to a node that was never created.
+    """
+
+    attempts = 10
+    window = 4
+
+    def __init__(
+        self,
+        syntax: Syntax,
+        *,
+        seed: int | None = None,
+        max_depth: int = 5,
+        max_items: int = 5,
+    ) -> None:
+        """Init for InputGenerator class.
+
+        :param syntax: The compiled syntax.
+        :param seed: Seed of the random generator.
+        :param max_depth: Maximum depth of grammar calls.
+        :param max_items: Maximum number of statements generated per grammar call.
+        """
+        self.context = Context(Reader(""), Writer(Path()))
+        Processor(self.context, syntax)
+        self.rng = random.Random(seed)
+        self.regex = RegexGenerator(self.rng)
+        self.max_depth = max_depth
+        self.max_items = max_items
+        self._patterns: dict[int, list[Pattern[str]]] = {}
+        self._recent: list[tuple[Pattern[str], str]] = []
+
+    def _get_patterns(self, condition: BaseToken) -> list[Pattern[str]]:
+        """Return the compiled patterns of a match statement.
+
+        :param condition: The match statement.
+        :returns: The patterns.
+        """
+        key = id(condition)
+        if key not in self._patterns:
+            assert isinstance(condition, (Match, IMatch))
+            self._patterns[key] = list(
+                condition.get_compiled_patterns(self.context, condition.re_flag)
+            )
+        return self._patterns[key]
+
+    def _get_tokens(self, grammar: Grammar) -> TokenList:
+        """Return the tokens of a grammar after the ones of inherited grammars.
+
+        :param grammar: The grammar.
+        :returns: The tokens in order of execution.
+        """
+        if not grammar.inherits:
+            return grammar.tokens
+        return self._get_tokens(self.context.get_grammar(grammar.inherits)) + (
+            grammar.tokens
+        )
+
+    @staticmethod
+    def _get_candidate(token: Any) -> Candidate | None:
+        """Return a token as condition with block if it consumes matched input.
+
+        :param token: The token of a grammar.
+        :returns: The condition and its block or None.
+        """
+        if isinstance(token, (Skip, ISkip)):
+            return (token, [])
+        if not isinstance(token, tuple) or type(token[0]) not in (Match, IMatch):
+            return None
+        if any(isinstance(t, (Next, DoNext)) for t in token[1]):
+            return None
+        return token
+
+    @staticmethod
+    def _is_exit(candidate: Candidate) -> bool:
+        """Check if the block of a condition returns from the grammar."""
+        return any(isinstance(t, (Return, DoReturn)) for t in candidate[1])
+
+    def _calls_grammar(self, tokens: TokenList) -> bool:
+        """Check if a block calls a grammar."""
+        for token in tokens:
+            if isinstance(token, GrammarCall):
+                return True
+            if isinstance(token, tuple) and self._calls_grammar(token[1]):
+                return True
+        return False
+
+    def _generate_match(
+        self, candidate: Candidate, previous: list[Candidate]
+    ) -> str | None:
+        """Generate text matched by a condition, but not by the previous ones.
+
+        The text is also generated again if the pattern of one of the recently
+        generated texts would match into it.
+
+        :param candidate: The condition and its block.
+        :param previous: The conditions executed before.
+        :returns: The generated text or None if no valid text was found within
+            `attempts`.
+        """
+        patterns = self._get_patterns(candidate[0])
+        for _ in range(self.attempts):
+            pattern = self.rng.choice(patterns)
+            text = self.regex.generate(pattern)
+            match = pattern.match(text)
+            if match is None or match.end() != len(text):
+                continue
+            if any(
+                regex.match(text)
+                for condition, _ in previous
+                for regex in self._get_patterns(condition)
+            ):
+                continue
+            recent = self._add_recent(pattern, text)
+            if recent is None:
+                continue
+            self._recent = recent
+            return text
+        return None
+
+    def _generate_first(
+        self, options: list[Candidate], candidates: list[Candidate]
+    ) -> tuple[Candidate, str]:
+        """Generate text for the first of the options which can be matched.
+
+        :param options: The conditions to try in order.
+        :param candidates: All conditions of the grammar or block in order.
+        :returns: The chosen condition and the generated text.
+        :raises ValueError: If no text can be generated for any of the options.
+        """
+        for option in options:
+            index = next(i for i, c in enumerate(candidates) if c is option)
+            text = self._generate_match(option, candidates[:index])
+            if text is not None:
+                return option, text
+        raise ValueError(
+            f"No text matching the statement in line {options[0][0].lineno} can be "
+            "generated after the previous text"
+        )
+
+    def _with_others(
+        self, candidate: Candidate, pool: list[Candidate]
+    ) -> list[Candidate]:
+        """Return a candidate followed by the others of a pool in random order."""
+        others = [c for c in pool if c is not candidate]
+        self.rng.shuffle(others)
+        return [candidate, *others]
+
+    def _add_recent(
+        self, pattern: Pattern[str], text: str
+    ) -> list[tuple[Pattern[str], str]] | None:
+        """Add a text to the recently generated ones, unless a recent match extends.
+
+        If the previous text was generated for the same pattern and the pattern
+        matches both texts completely, they are merged, because they are consumed
+        by a single match.
+
+        :param pattern: The pattern the text was generated for.
+        :param text: The newly generated text.
+        :returns: The recent patterns and texts or None if the pattern of a recent
+            text would match into the new text.
+        """
+        recent = self._recent
+        if recent and recent[-1][0] is pattern:
+            merged = recent[-1][1] + text
+            match = pattern.match(merged)
+            if match is not None and match.end() == len(merged):
+                recent, text = recent[:-1], merged
+        following = text
+        for previous, previous_text in reversed(recent):
+            match = previous.match(previous_text + following)
+            if match is None or match.end() != len(previous_text):
+                return None
+            following = previous_text + following
+        return [*recent[1 - self.window :], (pattern, text)]
+
+    def _generate_block(self, tokens: TokenList, depth: int) -> Iterator[str]:
+        """Generate text for the grammars and conditions in a block.
+
+        A nested condition ends the block after its own block.
+
+        :param tokens: The tokens of the block.
+        :param depth: Current depth of grammar calls.
+        :returns: Iterator of generated text.
+        """
+        nested: list[Candidate] = []
+        for token in tokens:
+            candidate = self._get_candidate(token)
+            if candidate is not None:
+                nested.append(candidate)
+                continue
+            if nested:
+                break
+            if isinstance(token, GrammarCall):
+                yield from self.generate_grammar(token.name, depth + 1)
+        if nested:
+            options = self._with_others(self.rng.choice(nested), nested)
+            candidate, text = self._generate_first(options, nested)
+            yield text
+            yield from self._generate_block(candidate[1], depth)
+
+    def generate_grammar(self, name: str, depth: int = 0) -> Iterator[str]:
+        """Generate text for a call of a grammar.
+
+        :param name: Name of the grammar.
+        :param depth: Current depth of grammar calls.
+        :returns: Iterator of generated text.
+        """
+        if depth > self.max_depth:
+            return
+        candidates = []
+        for token in self._get_tokens(self.context.get_grammar(name)):
+            candidate = self._get_candidate(token)
+            if candidate is not None:
+                candidates.append(candidate)
+        exits = [c for c in candidates if self._is_exit(c)]
+        items = [c for c in candidates if not self._is_exit(c)]
+        if depth == self.max_depth:
+            items = [c for c in items if not self._calls_grammar(c[1])]
+        chosen = []
+        if items:
+            count = self.rng.randint(1, self.max_items)
+            chosen = [(c, items) for c in self.rng.choices(items, k=count)]
+        if exits:
+            chosen.append((self.rng.choice(exits), exits))
+        for candidate, pool in chosen:
+            yield from self._generate_candidate(candidate, pool, candidates, depth)
+
+    def _generate_candidate(
+        self,
+        candidate: Candidate,
+        pool: list[Candidate],
+        candidates: list[Candidate],
+        depth: int,
+    ) -> Iterator[str]:
+        """Generate text for a condition and its block.
+
+        If no text can be generated for the condition after the previous text,
+        another condition of the pool is generated instead.
+
+        :param candidate: The condition and its block.
+        :param pool: The conditions which can be generated instead.
+        :param candidates: All conditions of the grammar in order.
+        :param depth: Current depth of grammar calls.
+        :returns: Iterator of generated text.
+        """
+        options = self._with_others(candidate, pool)
+        candidate, text = self._generate_first(options, candidates)
+        yield text
+        yield from self._generate_block(candidate[1], depth)
+
+    def generate(self, size: int) -> Iterator[str]:
+        """Generate input until it has at least `size` characters.
+
+        :param size: Minimum number of characters.
+        :returns: Iterator of generated text.
+        """
+        generated = 0
+        while generated < size:
+            produced = 0
+            for text in self.generate_grammar("input"):
+                produced += len(text)
+                yield text
+            if not produced:
+                raise ValueError("The input grammar does not generate any text")
+            generated += produced
+
+    def write(self, file_path: Path, size: int, encoding: str = "utf-8") -> None:
+        """Write generated input to a file.
+
+        :param file_path: Path of the file to write to.
+        :param size: Minimum number of characters.
+        :param encoding: Encoding of the file.
+        """
+        with open(file_path, "w", encoding=encoding, newline="") as f:
+            for text in self.generate(size):
+                f.write(text)
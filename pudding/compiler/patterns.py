@@ -0,0 +1,555 @@
+"""Profile guided reordering of match statements."""
+
+import functools
+import json
+import logging
+import re
+from pathlib import Path
+from re import Pattern
+from typing import Any, NamedTuple
+
+from ..processor.context import Context
+from ..processor.grammar import Grammar, TokenList
+from ..reader import Reader
+from ..tokens.functions.do.next import Next as DoNext
+from ..tokens.statements.define import Define
+from ..tokens.statements.match import IMatch, Match
+from ..tokens.statements.next import Next
+from ..tokens.statements.statement import MultiExpStatement
+from ..tokens.token import BaseToken
+from ..writer.writers.writer import Writer
+from ._regex import _casefix, _parser, _sre
+from .compiler import Syntax
+
+CATEGORIES = {
+    _parser.CATEGORY_DIGIT: r"\d",
+    _parser.CATEGORY_NOT_DIGIT: r"\D",
+    _parser.CATEGORY_SPACE: r"\s",
+    _parser.CATEGORY_NOT_SPACE: r"\S",
+    _parser.CATEGORY_WORD: r"\w",
+    _parser.CATEGORY_NOT_WORD: r"\W",
+}
+REPEATS = (_parser.MAX_REPEAT, _parser.MIN_REPEAT, _parser.POSSESSIVE_REPEAT)
+ZERO_WIDTH = (_parser.AT, _parser.ASSERT, _parser.ASSERT_NOT)
+MAX_RANGE = 256
+
+logger = logging.getLogger(__name__)
+
+
+class _Unknown(Exception):
+    """Exception raised for patterns which can not be analysed."""
+
+
+class FirstChars(NamedTuple):
+    """Characters a match of a pattern can start with.
+
+    :var chars: Characters matched case sensitive.
+    :var keys: Case keys of characters matched ignoring case.
+    :var classes: Compiled character classes for sets which can not be listed.
+    """
+
+    chars: frozenset[str]
+    keys: frozenset[int]
+    classes: tuple[Pattern[str], ...]
+
+
+def case_key(char: str) -> int:
+    """Return a key equal for all characters matching each other ignoring case.
+
+    :param char: The character.
+    :returns: The key.
+    """
+    lower = _sre.unicode_tolower(ord(char))
+    return int(min((lower, *_casefix._EXTRA_CASES.get(lower, ()))))
+
+
+def char_class(items: list[tuple[Any, Any]], flags: int) -> Pattern[str]:
+    """Compile the items of a parsed set to a character class.
+
+    :param items: The parsed items of the set.
+    :param flags: Regex flags of the set.
+    :returns: Pattern matching a single character of the set.
+    :raises _Unknown: If the set contains unsupported items.
+    """
+    parts: list[str] = []
+    for op, av in items:
+        if op is _parser.NEGATE:
+            parts.insert(0, "^")
+        elif op is _parser.LITERAL:
+            parts.append(re.escape(chr(av)))
+        elif op is _parser.RANGE:
+            parts.append(f"{re.escape(chr(av[0]))}-{re.escape(chr(av[1]))}")
+        elif op is _parser.CATEGORY and av in CATEGORIES:
+            parts.append(CATEGORIES[av])
+        else:
+            raise _Unknown
+    return re.compile(f"[{''.join(parts)}]", flags & (re.IGNORECASE | re.ASCII))
+
+
+def set_chars(items: list[tuple[Any, Any]]) -> list[str] | None:
+    """Return the characters of a parsed set if it only lists a few.
+
+    :param items: The parsed items of the set.
+    :returns: The characters or None if the set has to be compiled.
+    """
+    chars = []
+    for op, av in items:
+        if op is _parser.LITERAL:
+            chars.append(chr(av))
+        elif op is _parser.RANGE and av[1] - av[0] < MAX_RANGE:
+            chars.extend(chr(code) for code in range(av[0], av[1] + 1))
+        else:
+            return None
+    return chars
+
+
+def _first(
+    items: Any, flags: int
+) -> tuple[set[str], set[int], list[Pattern[str]], bool]:
+    """Collect the first characters of a parsed sequence.
+
+    Zero width assertions are skipped, so the result may contain more characters
+    than possible, but never less.
+
+    :param items: The parsed sequence.
+    :param flags: Regex flags of the sequence.
+    :returns: Characters, case keys, character classes and if the sequence can
+        match the empty string.
+    :raises _Unknown: If the sequence contains unsupported items.
+    """
+    chars: set[str] = set()
+    keys: set[int] = set()
+    classes: list[Pattern[str]] = []
+    ignorecase = bool(flags & re.IGNORECASE)
+    for op, av in items:
+        nullable = False
+        if op is _parser.LITERAL:
+            if ignorecase:
+                keys.add(case_key(chr(av)))
+            else:
+                chars.add(chr(av))
+        elif op is _parser.IN:
+            listed = set_chars(av)
+            if listed is None:
+                classes.append(char_class(av, flags))
+            elif ignorecase:
+                keys.update(case_key(char) for char in listed)
+            else:
+                chars.update(listed)
+        elif op is _parser.NOT_LITERAL:
+            negated = [(_parser.NEGATE, None), (_parser.LITERAL, av)]
+            classes.append(char_class(negated, flags))
+        elif op is _parser.ANY:
+            classes.append(re.compile(".", flags & re.DOTALL))
+        elif op in (_parser.SUBPATTERN, _parser.ATOMIC_GROUP, *REPEATS):
+            if op is _parser.SUBPATTERN:
+                sub_flags = (flags | av[1]) & ~av[2]
+                sub = _first(av[3], sub_flags)
+            elif op is _parser.ATOMIC_GROUP:
+                sub = _first(av, flags)
+            else:
+                sub = _first(av[2], flags)
+            chars |= sub[0]
+            keys |= sub[1]
+            classes += sub[2]
+            nullable = sub[3] or (op in REPEATS and av[0] == 0)
+        elif op is _parser.BRANCH:
+            for branch in av[1]:
+                sub = _first(branch, flags)
+                chars |= sub[0]
+                keys |= sub[1]
+                classes += sub[2]
+                nullable = nullable or sub[3]
+        elif op in ZERO_WIDTH:
+            nullable = True
+        else:
+            raise _Unknown
+        if not nullable:
+            return chars, keys, classes, False
+    return chars, keys, classes, True
+
+
+def sequence_first_chars(items: Any, flags: int) -> tuple[FirstChars, bool] | None:
+    """Return the characters a match of a parsed sequence can start with.
+
+    :param items: The parsed sequence.
+    :param flags: Regex flags of the sequence.
+    :returns: The first characters and if the sequence can match the empty string
+        or None if unknown.
+    """
+    try:
+        chars, keys, classes, nullable = _first(items, flags)
+    except _Unknown:
+        return None
+    return FirstChars(frozenset(chars), frozenset(keys), tuple(classes)), nullable
+
+
+def first_chars(pattern: Pattern[str]) -> FirstChars | None:
+    """Return the characters a match of a pattern can start with.
+
+    :param pattern: The compiled pattern.
+    :returns: The first characters or None if unknown or if the pattern can match
+        the empty string.
+    """
+    parsed = _parser.parse(pattern.pattern, pattern.flags)
+    result = sequence_first_chars(parsed, parsed.state.flags)
+    if result is None or result[1]:
+        return None
+    return result[0]
+
+
+def _prefix(items: Any, flags: int, prefix: list[str]) -> bool:
+    """Collect the literal characters at the start of a parsed sequence.
+
+    :param items: The parsed sequence.
+    :param flags: Regex flags of the pattern.
+    :param prefix: List to append the characters to.
+    :returns: If all items of the sequence are literal.
+    """
+    for op, av in items:
+        if op is _parser.LITERAL:
+            prefix.append(chr(av))
+        elif op is _parser.SUBPATTERN and (flags | av[1]) & ~av[2] == flags:
+            if not _prefix(av[3], flags, prefix):
+                return False
+        elif op is not _parser.AT:
+            return False
+    return True
+
+
+def literal_prefix(pattern: Pattern[str]) -> tuple[str, bool]:
+    """Return the literal string every match of a pattern starts with.
+
+    :param pattern: The compiled pattern.
+    :returns: The prefix and if it is matched ignoring case.
+    """
+    parsed = _parser.parse(pattern.pattern, pattern.flags)
+    flags = parsed.state.flags
+    prefix: list[str] = []
+    _prefix(parsed, flags, prefix)
+    return "".join(prefix), bool(flags & re.IGNORECASE)
+
+
+def _prefixes_differ(a: Pattern[str], b: Pattern[str]) -> bool:
+    """Check if the literal prefixes of two patterns differ in any character.
+
+    :param a: The first pattern.
+    :param b: The second pattern.
+    :returns: If no string can start with both prefixes.
+    """
+    prefix_a, icase_a = literal_prefix(a)
+    prefix_b, icase_b = literal_prefix(b)
+    for char_a, char_b in zip(prefix_a, prefix_b):
+        if icase_a or icase_b:
+            if case_key(char_a) != case_key(char_b):
+                return True
+        elif char_a != char_b:
+            return True
+    return False
+
+
+def _first_chars_disjoint(a: FirstChars, b: FirstChars) -> bool:
+    """Check if two sets of first characters have no character in common.
+
+    :param a: The first characters of one pattern.
+    :param b: The first characters of another pattern.
+    :returns: If the sets are disjoint. False if it can not be proven.
+    """
+    if (a.classes and b.classes) or (a.keys and b.classes) or (a.classes and b.keys):
+        return False
+    if not a.chars.isdisjoint(b.chars) or not a.keys.isdisjoint(b.keys):
+        return False
+    if not b.keys.isdisjoint(case_key(char) for char in a.chars):
+        return False
+    if not a.keys.isdisjoint(case_key(char) for char in b.chars):
+        return False
+    for chars, classes in ((a.chars, b.classes), (b.chars, a.classes)):
+        if any(regex.match(char) for char in chars for regex in classes):
+            return False
+    return True
+
+
+def is_exclusive(a: Pattern[str], b: Pattern[str]) -> bool:
+    """Check if two patterns can never match at the same position.
+
+    The patterns are exclusive, if their literal prefixes differ or if no
+    character can be the first character of both.
+
+    :param a: The first pattern.
+    :param b: The second pattern.
+    :returns: If the patterns are exclusive. False if it can not be proven.
+    """
+    try:
+        if _prefixes_differ(a, b):
+            return True
+    except re.error:
+        return False
+    first_a = first_chars(a)
+    first_b = first_chars(b)
+    if first_a is None or first_b is None:
+        return False
+    return _first_chars_disjoint(first_a, first_b)
+
+
+@functools.cache
+def resolve_filename(filename: str) -> str:
+    """Return the absolute path of a syntax file, so differently given paths match.
+
+    Names of syntaxes compiled from strings, like "<string>", are kept.
+
+    :param filename: Path of the file as given to the compiler.
+    :returns: The resolved path.
+    """
+    if filename.startswith("<"):
+        return filename
+    return str(Path(filename).resolve())
+
+
+def load_profile(file_path: Path) -> dict[tuple[str, int], int]:
+    """Load the number of matches per statement from a profile.
+
+    :param file_path: Path of a json file written by the `Profiler`.
+    :returns: Number of matches by resolved file path and line number.
+    """
+    with open(file_path, "r", encoding="utf-8") as f:
+        entries = json.load(f)
+    hits: dict[tuple[str, int], int] = {}
+    for entry in entries:
+        key = (resolve_filename(entry["file"]), entry["line"])
+        hits[key] = hits.get(key, 0) + entry["matches"]
+    return hits
+
+
+class Reordering(NamedTuple):
+    """Reordered conditions of a grammar.
+
+    :var grammar: The reordered grammar.
+    :var before: Line numbers of the conditions before reordering.
+    :var after: Line numbers of the conditions after reordering.
+    """
+
+    grammar: Grammar
+    before: list[int]
+    after: list[int]
+
+    def __str__(self) -> str:
+        """Return a description of the reordering."""
+        before = ", ".join(str(line) for line in self.before)
+        after = ", ".join(str(line) for line in self.after)
+        return (
+            f"grammar {self.grammar.name} ({self.grammar.filename}:"
+            f"{self.grammar.lineno}): lines {before} -> {after}"
+        )
+
+
+class MatchReorderer:
+    """Class reordering match statements of grammars by their number of matches.
+
+    A grammar tries its conditions in order and restarts after the block of a
+    matching condition. Adjacent match statements whose blocks always end the
+    grammar run, because they contain no condition or `next`, can be swapped
+    without changing the result if their patterns are exclusive. Conditions are
+    moved in front of less matching ones as long as they are exclusive with every
+    condition they pass, so the most matching patterns are tried first.
+
+    Conditions in blocks are not reordered, because a condition not matching in a
+    block ends the block.
+    """
+
+    def __init__(self, syntax: Syntax, hits: dict[tuple[str, int], int]) -> None:
+        """Init for MatchReorderer class.
+
+        :param syntax: The compiled syntax to reorder.
+        :param hits: Number of matches by resolved file path and line number of a
+            condition.
+        """
+        self.syntax = syntax
+        self.hits = hits
+        self.context = Context(Reader(""), Writer(Path()))
+        self._patterns: dict[int, list[Pattern[str]] | None] = {}
+        self._exclusive: dict[tuple[int, int], bool] = {}
+
+    def reorder(self) -> list[Reordering]:
+        """Reorder the conditions of all grammars in place.
+
+        :returns: The changed orders.
+        """
+        reorderings = []
+        for obj in self.syntax:
+            if isinstance(obj, Define):
+                obj.execute(self.context)
+            elif isinstance(obj, Grammar):
+                reorderings += self._reorder_grammar(obj)
+        return reorderings
+
+    def _reorder_grammar(self, grammar: Grammar) -> list[Reordering]:
+        """Reorder the runs of adjacent conditions of a grammar.
+
+        :param grammar: The grammar to reorder.
+        :returns: The changed orders.
+        """
+        reorderings = []
+        tokens: TokenList = []
+        run: list[tuple[BaseToken, TokenList]] = []
+        for token in [*grammar.tokens, None]:
+            if isinstance(token, tuple) and self._is_reorderable(token):
+                run.append(token)
+                continue
+            ordered = self._sort_run(run)
+            if ordered != run:
+                reorderings.append(
+                    Reordering(
+                        grammar,
+                        [condition.lineno for condition, _ in run],
+                        [condition.lineno for condition, _ in ordered],
+                    )
+                )
+            tokens += ordered
+            run = []
+            if token is not None:
+                tokens.append(token)
+        grammar.tokens = tokens
+        return reorderings
+
+    def _is_reorderable(self, token: tuple[BaseToken, TokenList]) -> bool:
+        """Check if the block of a match statement always ends the grammar run.
+
+        :param token: Tuple with condition and tokens of its block.
+        :returns: If the condition can be reordered.
+        """
+        condition, sub_tokens = token
+        if type(condition) not in (Match, IMatch):
+            return False
+        for sub_token in sub_tokens:
+            if isinstance(sub_token, (tuple, Next, DoNext, MultiExpStatement)):
+                return False
+        return self._get_patterns(condition) is not None
+
+    def _get_patterns(self, condition: BaseToken) -> list[Pattern[str]] | None:
+        """Return the compiled patterns of a condition.
+
+        :param condition: The match statement.
+        :returns: The patterns or None if they can not be compiled.
+        """
+        key = id(condition)
+        if key not in self._patterns:
+            assert isinstance(condition, (Match, IMatch))
+            try:
+                self._patterns[key] = list(
+                    condition.get_compiled_patterns(self.context, condition.re_flag)
+                )
+            except (NameError, re.error):
+                self._patterns[key] = None
+        return self._patterns[key]
+
+    def is_exclusive(self, a: BaseToken, b: BaseToken) -> bool:
+        """Check if two conditions can never match at the same position.
+
+        :param a: The first match statement.
+        :param b: The second match statement.
+        :returns: If all patterns of both are exclusive.
+        """
+        key = (id(a), id(b)) if id(a) < id(b) else (id(b), id(a))
+        if key not in self._exclusive:
+            patterns_a = self._get_patterns(a) or []
+            patterns_b = self._get_patterns(b) or []
+            self._exclusive[key] = bool(patterns_a and patterns_b) and all(
+                is_exclusive(pa, pb) for pa in patterns_a for pb in patterns_b
+            )
+        return self._exclusive[key]
+
+    def _get_hits(self, condition: BaseToken) -> int:
+        """Return the number of matches of a condition in the profile.
+
+        :param condition: The condition.
+        :returns: The number of matches.
+        """
+        key = (resolve_filename(condition.filename), condition.lineno)
+        return self.hits.get(key, 0)
+
+    def _sort_run(
+        self, run: list[tuple[BaseToken, TokenList]]
+    ) -> list[tuple[BaseToken, TokenList]]:
+        """Sort adjacent conditions by matches, only swapping exclusive ones.
+
+        :param run: The adjacent conditions.
+        :returns: The sorted conditions.
+        """
+        ordered: list[tuple[BaseToken, TokenList]] = []
+        for token in run:
+            hits = self._get_hits(token[0])
+            index = len(ordered)
+            while (
+                index > 0
+                and self._get_hits(ordered[index - 1][0]) < hits
+                and self.is_exclusive(ordered[index - 1][0], token[0])
+            ):
+                index -= 1
+            ordered.insert(index, token)
+        return ordered
+
+
+def reorder_syntax(syntax: Syntax, profile: Path) -> list[Reordering]:
+    """Reorder the match statements of a syntax by the matches in a profile.
+
+    Logs every changed order.
+
+    :param syntax: The compiled syntax to reorder in place.
+    :param profile: Path of a json file written by the `Profiler`.
+    :returns: The changed orders.
+    """
+    reorderings = MatchReorderer(syntax, load_profile(profile)).reorder()
+    for reordering in reorderings:
+        logger.info("Reordered %s", reordering)
+    return reorderings
+
+
+def _block_end(lines: list[str], start: int) -> int:
+    """Return the index after the last line of a block.
+
+    Trailing empty lines and comments are not part of the block.
+
+    :param lines: Lines of the syntax file.
+    :param start: Index of the line of the condition.
+    :returns: The end index of the block.
+    """
+    indent = len(lines[start]) - len(lines[start].lstrip())
+    end = start + 1
+    for index in range(start + 1, len(lines)):
+        stripped = lines[index].strip()
+        if not stripped or stripped.startswith("#"):
+            continue
+        if len(lines[index]) - len(lines[index].lstrip()) <= indent:
+            break
+        end = index + 1
+    return end
+
+
+def reorder_source(content: str, filename: str, reorderings: list[Reordering]) -> str:
+    """Apply reorderings to the content of a syntax file.
+
+    The blocks of the conditions are moved, while empty lines and comments between
+    them stay in place.
+
+    :param content: Content of the syntax file.
+    :param filename: Name of the file the syntax was compiled from.
+    :param reorderings: The reorderings of the syntax.
+    :returns: The reordered content.
+    """
+    lines = content.splitlines(True)
+    for reordering in reorderings:
+        if resolve_filename(reordering.grammar.filename) != resolve_filename(filename):
+            continue
+        blocks = {}
+        for lineno in reordering.before:
+            blocks[lineno] = lines[lineno - 1 : _block_end(lines, lineno - 1)]
+        new_lines = lines[: reordering.before[0] - 1]
+        for index, lineno in enumerate(reordering.before):
+            new_lines += blocks[reordering.after[index]]
+            end = lineno - 1 + len(blocks[lineno])
+            if index + 1 < len(reordering.before):
+                new_lines += lines[end : reordering.before[index + 1] - 1]
+            else:
+                new_lines += lines[end:]
+        lines = new_lines
+    return "".join(lines)
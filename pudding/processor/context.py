@@ -2,16 +2,17 @@
 
 import re
 
-from ..datatypes.varname import Varname
-
 from ..datatypes.string import String
+from ..datatypes.varname import Varname
 from ..reader.reader import Reader
+from ..reader.span import Span, Text
 from ..writer import Writer
 from .grammar import Grammar
 from .triggers import TriggerQueue
 
 STRING_VAR_RE = r"([^\d]?\$(\d+)[^\$]?)"
 # match chars before and after to not match $1 and $10 when replacing $1
+SINGLE_VAR_RE = re.compile(r"\$(\d+)")
 
 
 class Context:
@@ -20,19 +21,25 @@ class Context:
     :var grammars: Grammars defined in the syntax.
     :var queue: Queue for triggers created by enqueued statements.
     :var variables: Variables defined in the syntax.
+    :var lazy_text: If text values consisting of a single variable are passed to
+        the writer as a Span referencing the content instead of a copy.
     """
 
-    def __init__(self, reader: Reader, writer: Writer) -> None:
+    def __init__(
+        self, reader: Reader, writer: Writer, *, lazy_text: bool = False
+    ) -> None:
         """Init for Context class.
 
         :param reader: Reader with content of the file to convert.
         :param writer: Writer for generating output.
+        :param lazy_text: Reference matched text instead of copying it.
         """
         self.grammars: dict[str, Grammar] = {}
         self.queue: TriggerQueue = TriggerQueue()
         self.variables: dict[str, str] = {}
         self.reader = reader
         self.writer = writer
+        self.lazy_text = lazy_text
 
     def get_grammar(self, name: str) -> Grammar:
         """Get a grammar by name.
@@ -82,5 +89,24 @@ class Context:
                     f"Not enough matches in {matches} to replace variable '${number}'."
                 )
             replacement = replace.replace(f"${number}", matches[int(number)], 1)
-            new_string = re.sub(re.escape(replace), replacement, new_string, count=1)
+            new_string = new_string.replace(replace, replacement, 1)
         return new_string
+
+    def get_text(self, string: String) -> Text:
+        """Get the text value of a string for the writer.
+
+        If lazy_text is enabled and the string consists of exactly one variable,
+        a Span referencing the matched text in the content is returned.
+        Otherwise the variables are replaced like in `replace_string_vars`.
+
+        :param string: String to get the text of.
+        :returns: The text as a string or Span.
+        """
+        last_match = self.reader.last_match
+        if self.lazy_text and last_match is not None:
+            var = SINGLE_VAR_RE.fullmatch(string.value)
+            if var is not None and int(var.group(1)) < last_match.re.groups:
+                start, end = last_match.span(int(var.group(1)) + 1)
+                if start != -1:
+                    return Span(self.reader.content, start, end - start)
+        return self.replace_string_vars(string)
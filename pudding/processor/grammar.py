@@ -12,8 +12,11 @@ class Grammar:
     :var name: Name of the grammar.
     :var tokens: Tokens in this grammar.
     :var inherits: Name of the inherited grammar or None.
+    :var filename: Path of the file the grammar is defined in.
     """
 
+    filename = "<string>"
+
     def __init__(
         self,
         lineno: int,
@@ -0,0 +1,191 @@
+"""Module defining listeners for instrumenting the processing of a syntax."""
+
+import logging
+from re import Match, Pattern
+
+from ..compiler.compiler import Syntax
+from ..tokens.token import BaseToken
+from . import PAction
+from .context import Context
+from .grammar import Grammar, TokenList
+from .processor import Processor
+from .triggers import Trigger
+
+logger = logging.getLogger(__name__)
+
+
+class Listener:
+    """Base class for listeners notified while processing a syntax.
+
+    All methods do nothing, so subclasses only override the events they need.
+    """
+
+    def on_match_attempt(
+        self, regex: Pattern[str], pos: int, match: Match[str] | None, elapsed: float
+    ) -> None:
+        """Handle an attempt of the reader to match a pattern.
+
+        :param regex: The pattern.
+        :param pos: Position in the content the pattern was matched at.
+        :param match: The match object or None if it did not match.
+        :param elapsed: Time of the attempt in seconds.
+        """
+
+    def on_grammar_enter(self, grammar: Grammar, pos: int) -> None:
+        """Handle the start of a grammar.
+
+        :param grammar: The grammar.
+        :param pos: Current position in the content.
+        """
+
+    def on_grammar_exit(self, grammar: Grammar, pos: int, restarts: int) -> None:
+        """Handle the end of a grammar.
+
+        :param grammar: The grammar.
+        :param pos: Current position in the content.
+        :param restarts: Number of times the grammar was restarted.
+        """
+
+    def on_token(self, token: BaseToken, pos: int) -> None:
+        """Handle the start of a token or condition.
+
+        :param token: The token.
+        :param pos: Current position in the content.
+        """
+
+    def on_token_exit(self, token: BaseToken, pos: int, action: PAction) -> None:
+        """Handle the end of a token.
+
+        :param token: The token.
+        :param pos: Current position in the content.
+        :param action: The returned action.
+        """
+
+    def on_condition_exit(
+        self, condition: BaseToken, pos: int, action: PAction
+    ) -> None:
+        """Handle the end of a condition before the tokens of its block.
+
+        :param condition: The condition.
+        :param pos: Current position in the content.
+        :param action: The returned action, PAction.ENTER if the block is executed.
+        """
+
+    def on_trigger(self, trigger: Trigger, pos: int) -> None:
+        """Handle a matching trigger before its token is executed.
+
+        :param trigger: The trigger.
+        :param pos: Current position in the content.
+        """
+
+
+class DebugLogListener(Listener):
+    """Listener logging the processing at debug level."""
+
+    def on_match_attempt(
+        self, regex: Pattern[str], pos: int, match: Match[str] | None, elapsed: float
+    ) -> None:
+        """Log a match attempt."""
+        result = "no match" if match is None else repr(match.group(0)[:35])
+        logger.debug("Trying to match /%s/ at %s: %s", regex.pattern, pos, result)
+
+    def on_grammar_enter(self, grammar: Grammar, pos: int) -> None:
+        """Log the start of a grammar."""
+        logger.debug("-> Executing %s", grammar)
+
+    def on_grammar_exit(self, grammar: Grammar, pos: int, restarts: int) -> None:
+        """Log the end of a grammar."""
+        logger.debug("<- Leaving grammar %s", grammar.name)
+
+    def on_token(self, token: BaseToken, pos: int) -> None:
+        """Log the start of a token."""
+        logger.debug("Executing %s", token)
+
+    def on_trigger(self, trigger: Trigger, pos: int) -> None:
+        """Log a matching trigger."""
+        logger.debug("Triggered trigger %s", trigger)
+
+
+class ListeningProcessor(Processor):
+    """Processor notifying listeners of the processing.
+
+    Only used if listeners are registered, so the Processor and Reader do not pay
+    for the instrumentation otherwise.
+    """
+
+    def __init__(
+        self, context: Context, syntax: Syntax, listeners: list[Listener]
+    ) -> None:
+        """Init for ListeningProcessor class.
+
+        :param context: The context to process.
+        :param syntax: The compiled syntax.
+        :param listeners: The listeners to notify.
+        """
+        super().__init__(context, syntax)
+        self.listeners = listeners
+        context.reader.set_match_callback(self._on_match_attempt)
+
+    def _on_match_attempt(
+        self, regex: Pattern[str], pos: int, match: Match[str] | None, elapsed: float
+    ) -> None:
+        """Notify the listeners of a match attempt."""
+        for listener in self.listeners:
+            listener.on_match_attempt(regex, pos, match, elapsed)
+
+    def execute_grammar(self, name: str) -> PAction:
+        """Execute a grammar by name and notify the listeners.
+
+        :param name: Name of the grammar.
+        :returns: PAction of the executed grammar.
+        """
+        grammar = self.context.get_grammar(name)
+        for listener in self.listeners:
+            listener.on_grammar_enter(grammar, self.reader.current_pos)
+        restarts = self._loop_grammar(grammar)
+        for listener in self.listeners:
+            listener.on_grammar_exit(grammar, self.reader.current_pos, restarts)
+        if restarts > 0:
+            return PAction.RESTART
+        return PAction.CONTINUE
+
+    def execute_condition(self, token: tuple[BaseToken, TokenList]) -> PAction:
+        """Execute a condition and notify the listeners.
+
+        :param token: Tuple with condition and tokens to execute.
+        :returns: ProcessingAction.
+        """
+        condition, sub_tokens = token
+        for listener in self.listeners:
+            listener.on_token(condition, self.reader.current_pos)
+        action = condition.execute(self.context)
+        for listener in self.listeners:
+            listener.on_condition_exit(condition, self.reader.current_pos, action)
+        if not action == PAction.ENTER:
+            return action
+        sub_action = self._execute_tokens(sub_tokens)
+        if sub_action == PAction.CONTINUE:
+            return PAction.RESTART
+        return sub_action
+
+    def execute_token(self, token: BaseToken) -> PAction:
+        """Execute a token and notify the listeners.
+
+        :param token: Token to execute.
+        :returns: PAction of the executed token.
+        """
+        for listener in self.listeners:
+            listener.on_token(token, self.reader.current_pos)
+        action = super().execute_token(token)
+        for listener in self.listeners:
+            listener.on_token_exit(token, self.reader.current_pos, action)
+        return action
+
+    def execute_trigger(self, trigger: Trigger) -> None:
+        """Execute the token of a matching trigger and notify the listeners.
+
+        :param trigger: The trigger to execute.
+        """
+        for listener in self.listeners:
+            listener.on_trigger(trigger, self.reader.current_pos)
+        super().execute_trigger(trigger)
@@ -0,0 +1,272 @@
+"""Module defining limits of the conversion of a single file."""
+
+import multiprocessing
+import signal
+import threading
+import warnings
+from collections.abc import Callable
+from multiprocessing.connection import Connection
+from multiprocessing.process import BaseProcess
+from typing import Any, NamedTuple
+
+from ..stats import FileStats
+from ..tokens.token import BaseToken
+from . import PAction
+from .hooks import Listener
+
+try:
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None  # type: ignore[assignment]
+
+FORK_SUPPORTED = "fork" in multiprocessing.get_all_start_methods()
+FORK_UNSUPPORTED = "Time and memory limits are not supported on this platform"
+TERMINATE_TIMEOUT = 1.0
+
+
+class LimitExceeded(RuntimeError):
+    """Exception raised if the conversion of a file exceeds a limit."""
+
+
+class Limits(NamedTuple):
+    """Limits of the conversion of a single file.
+
+    The token limit is checked while processing. The time and memory limits are
+    enforced by converting each file in a forked worker process, which is
+    terminated after `time` seconds and may allocate `memory` bytes of address space in
+    addition to the memory inherited from the parent process. They are only
+    supported on platforms with the fork start method and should not be used while
+    other threads are running, as forking a multi-threaded process can deadlock
+    the worker.
+
+    :var time: Maximum wall time in seconds.
+    :var tokens: Maximum number of executed tokens and conditions.
+    :var memory: Maximum additional memory in bytes.
+    """
+
+    time: float | None = None
+    tokens: int | None = None
+    memory: int | None = None
+
+    @property
+    def needs_worker(self) -> bool:
+        """If the limits are enforced in a worker process."""
+        return self.time is not None or self.memory is not None
+
+
+class LimitListener(Listener):
+    """Listener enforcing the token limit and recording the position reached.
+
+    Notifying listeners slows down the processing, so the listener only has to be
+    attached to the processor if it enforces a token limit. Otherwise the
+    conversion records the position where it failed with `update`, which includes
+    a worker process terminated at the time limit.
+
+    :var tokens: Number of executed tokens and conditions.
+    :var position: The furthest position in the content reached.
+    """
+
+    def __init__(self, max_tokens: int | None = None, shared: Any = None) -> None:
+        """Init for LimitListener class.
+
+        :param max_tokens: Maximum number of executed tokens and conditions.
+        :param shared: Shared integer value the position is also written to, so it
+            is available if a worker process is killed.
+        """
+        self.max_tokens = max_tokens
+        self.shared = shared
+        self.tokens = 0
+        self.position = 0
+
+    @property
+    def needed(self) -> bool:
+        """If the listener has to be notified while processing."""
+        return self.max_tokens is not None
+
+    def update(self, pos: int) -> None:
+        """Record a position reached in the content."""
+        if pos > self.position:
+            self.position = pos
+            if self.shared is not None:
+                self.shared.value = pos
+
+    def on_token(self, token: BaseToken, pos: int) -> None:
+        """Count the token and raise an error if there are too many.
+
+        :raises LimitExceeded: If the token limit is exceeded.
+        """
+        self.update(pos)
+        self.tokens += 1
+        if self.max_tokens is not None and self.tokens > self.max_tokens:
+            raise LimitExceeded(
+                f"Token limit of {self.max_tokens} exceeded in line {token.lineno}"
+            )
+
+    def on_token_exit(self, token: BaseToken, pos: int, action: PAction) -> None:
+        """Record the position after a token."""
+        self.update(pos)
+
+    def on_condition_exit(
+        self, condition: BaseToken, pos: int, action: PAction
+    ) -> None:
+        """Record the position after a condition."""
+        self.update(pos)
+
+
+type Conversion = Callable[[LimitListener], FileStats]
+type Outcome = tuple[FileStats | None, BaseException | None, int | None]
+
+
+def _raise_time_limit(signum: int, frame: Any) -> None:
+    """Signal handler stopping the conversion of a terminated worker process.
+
+    :raises LimitExceeded: Always.
+    """
+    raise LimitExceeded("Time limit exceeded")
+
+
+def _set_memory_limit(memory: int) -> None:
+    """Limit the address space of the current process.
+
+    :param memory: Bytes which may be allocated in addition to the current size.
+    :raises ValueError: If limiting the memory is not supported.
+    """
+    if resource is None:
+        raise ValueError("Memory limits are not supported on this platform")
+    try:
+        with open("/proc/self/statm", encoding="ascii") as f:
+            current = int(f.read().split()[0]) * resource.getpagesize()
+    except OSError:
+        current = 0
+    hard = resource.getrlimit(resource.RLIMIT_AS)[1]
+    soft = current + memory
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (soft, hard))
+
+
+def _work(
+    conversion: Conversion,
+    listener: LimitListener,
+    limits: Limits,
+    connection: Connection,
+) -> None:
+    """Run a conversion in a worker process and send the outcome to the parent.
+
+    :param conversion: The conversion to run.
+    :param listener: The listener enforcing the token limit.
+    :param limits: The limits.
+    :param connection: Connection to send the outcome with.
+    """
+    outcome: Outcome
+    try:
+        signal.signal(signal.SIGTERM, _raise_time_limit)
+        if limits.memory is not None:
+            _set_memory_limit(limits.memory)
+        result = conversion(listener)
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        outcome = (result, None, listener.position)
+    except MemoryError:
+        message = f"Memory limit of {limits.memory} bytes exceeded"
+        outcome = (None, LimitExceeded(message), listener.position)
+    except Exception as error:
+        outcome = (None, error, listener.position)
+    try:
+        connection.send(outcome)
+    except Exception as error:
+        connection.send((None, RuntimeError(repr(error)), listener.position))
+    connection.close()
+
+
+def _terminate(process: BaseProcess, receiver: Connection, limits: Limits) -> Outcome:
+    """Terminate a worker process which exceeded the time limit.
+
+    :param process: The worker process.
+    :param receiver: Connection the worker sends its outcome with.
+    :param limits: The limits.
+    :returns: The outcome with the position reported by the worker or None.
+    """
+    process.terminate()
+    position = None
+    try:
+        if receiver.poll(TERMINATE_TIMEOUT):
+            result, error, position = receiver.recv()
+            if error is None:
+                return result, None, position
+    except EOFError:
+        pass
+    process.kill()
+    message = f"Time limit of {limits.time}s exceeded"
+    return None, LimitExceeded(message), position
+
+
+def _run_worker(conversion: Conversion, limits: Limits) -> Outcome:
+    """Run a conversion in a forked worker process.
+
+    A worker exceeding the time limit is terminated and reports the position
+    where its conversion was stopped. If it does not report within
+    `TERMINATE_TIMEOUT` seconds, it is killed and the position is only known if
+    the listener is notified while processing.
+
+    :param conversion: The conversion to run.
+    :param limits: The limits.
+    :returns: The outcome of the conversion.
+    :raises ValueError: If the fork start method is not supported.
+    """
+    if not FORK_SUPPORTED:
+        raise ValueError(FORK_UNSUPPORTED)
+    if threading.active_count() > 1:
+        warnings.warn(
+            "Forking a worker process while other threads are running can "
+            "deadlock it",
+            RuntimeWarning,
+            stacklevel=3,
+        )
+    ctx = multiprocessing.get_context("fork")
+    shared = ctx.Value("q", 0, lock=False)
+    listener = LimitListener(limits.tokens, shared)
+    receiver, sender = ctx.Pipe(duplex=False)
+    process = ctx.Process(
+        target=_work, args=(conversion, listener, limits, sender), daemon=True
+    )
+    process.start()
+    sender.close()
+    outcome: Outcome
+    try:
+        if receiver.poll(limits.time):
+            outcome = receiver.recv()
+        else:
+            outcome = _terminate(process, receiver, limits)
+            if outcome[2] is None and listener.needed:
+                outcome = (None, outcome[1], shared.value)
+    except EOFError:
+        process.join()
+        position = shared.value if listener.needed else None
+        message = f"Worker process exited with code {process.exitcode}"
+        outcome = (None, LimitExceeded(message), position)
+    finally:
+        receiver.close()
+        process.join()
+    return outcome
+
+
+def run_limited(conversion: Conversion, limits: Limits) -> Outcome:
+    """Run a conversion within limits.
+
+    The conversion has to notify the given listener while processing if it is
+    `needed`, or else update it with the position where the conversion failed.
+    Errors are returned instead of raised, together with the position reached in
+    the content or None if unknown.
+
+    :param conversion: Function running the conversion with a listener.
+    :param limits: The limits.
+    :returns: The result or None, the error or None and the position reached.
+    :raises ValueError: If time or memory limits are not supported.
+    """
+    if limits.needs_worker:
+        return _run_worker(conversion, limits)
+    listener = LimitListener(limits.tokens)
+    try:
+        return conversion(listener), None, listener.position
+    except Exception as error:
+        return None, error, listener.position
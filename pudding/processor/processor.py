@@ -17,11 +17,17 @@ logger = logging.getLogger(__name__)
 
 
 class Processor:
-    """Class processing tokens."""
+    """Class processing tokens.
+
+    :var grammar_calls: Number of executed grammars.
+    :var restarts: Number of grammar restarts.
+    """
 
     def __init__(self, context: Context, syntax: Syntax) -> None:
         """Class processing the syntax."""
         self.context = context
+        self.grammar_calls = 0
+        self.restarts = 0
         self._init_syntax(syntax)
 
     def _init_syntax(self, syntax: Syntax) -> None:
@@ -90,19 +96,26 @@ class Processor:
         :returns: PAction.RESTART if grammar restarted at least once
             else PAction.CONTINUE.
         """
-        grammar = self.context.get_grammar(name)
-        logger.debug("-> Executing %s", grammar)
+        if self._loop_grammar(self.context.get_grammar(name)) > 0:
+            return PAction.RESTART
+        return PAction.CONTINUE
+
+    def _loop_grammar(self, grammar: Grammar) -> int:
+        """Execute a grammar until it does not restart anymore.
+
+        :param grammar: The grammar to execute.
+        :returns: Number of restarts.
+        """
         action = PAction.RESTART
-        restarts: int = 0
+        restarts = -1
         while action == PAction.RESTART:
             restarts += 1
             if grammar.inherits:
                 self.execute_grammar(grammar.inherits)
             action = self._execute_grammar(grammar)
-        logger.debug("<- Leaving grammar %s", name)
-        if restarts > 1:
-            return PAction.RESTART
-        return PAction.CONTINUE
+        self.grammar_calls += 1
+        self.restarts += restarts
+        return restarts
 
     def execute_condition(self, token: tuple[BaseToken, TokenList]) -> PAction:
         """Execute a condition.
@@ -152,7 +165,6 @@ class Processor:
         action = PAction.EXIT
         entered = 0
         for token in grammar.tokens:
-            logger.debug("Executing %s", token)
             match token:
                 case tuple():
                     action = self.execute_condition(token)
@@ -181,7 +193,6 @@ class Processor:
         action = PAction.CONTINUE
         entered = 0
         for token in tokens:
-            logger.debug("Executing %s", token)
             match token:
                 case tuple():
                     action = self.execute_condition(token)
@@ -207,7 +218,13 @@ class Processor:
             if not self.reader.would_match(trigger.match):
                 untriggered.append(trigger)
                 continue
-            logger.debug("Triggered trigger %s", trigger)
-            self.reader.match(trigger.match)
-            trigger.token.execute(self.context)
+            self.execute_trigger(trigger)
         self.context.queue[timing] = untriggered
+
+    def execute_trigger(self, trigger: Trigger) -> None:
+        """Execute the token of a matching trigger.
+
+        :param trigger: The trigger to execute.
+        """
+        self.reader.match(trigger.match)
+        trigger.token.execute(self.context)
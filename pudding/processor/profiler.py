@@ -0,0 +1,198 @@
+"""Module defining profiler classes."""
+
+import json
+from pathlib import Path
+from re import Match, Pattern
+from time import perf_counter
+from typing import Any
+
+from ..tokens.token import BaseToken
+from . import PAction
+from .grammar import Grammar
+from .hooks import Listener
+
+
+class Stats:
+    """Execution statistics of a statement or grammar.
+
+    :var filename: Path of the file the statement is defined in.
+    :var lineno: Line number of the statement.
+    :var name: Name of the statement or grammar.
+    :var calls: Number of executions.
+    :var matches: Number of executions of a condition entering its block.
+    :var misses: Number of executions of a condition not entering its block.
+    :var time: Total execution time in seconds. For grammars this includes the time
+        of all executed statements.
+    :var regex_time: Time of the match attempts of the reader in seconds. Like
+        `time`, this includes the attempts of all executed statements of a grammar.
+    :var consumed_chars: Total number of consumed characters.
+    """
+
+    def __init__(self, filename: str, lineno: int, name: str) -> None:
+        """Init for Stats class.
+
+        :param filename: Path of the file the statement is defined in.
+        :param lineno: Line number of the statement.
+        :param name: Name of the statement or grammar.
+        """
+        self.filename = filename
+        self.lineno = lineno
+        self.name = name
+        self.calls = 0
+        self.matches = 0
+        self.misses = 0
+        self.time = 0.0
+        self.regex_time = 0.0
+        self.consumed_chars = 0
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the statistics as a dict."""
+        return {
+            "file": self.filename,
+            "line": self.lineno,
+            "name": self.name,
+            "calls": self.calls,
+            "matches": self.matches,
+            "misses": self.misses,
+            "time": self.time,
+            "regex_time": self.regex_time,
+            "consumed_chars": self.consumed_chars,
+        }
+
+
+class Profiler(Listener):
+    """Listener collecting execution statistics of grammars and statements.
+
+    The time of a condition only includes the condition itself, not its block.
+
+    :var stats: Statistics by file, line number and name.
+    """
+
+    def __init__(self) -> None:
+        """Init for Profiler class."""
+        self.stats: dict[tuple[str, int, str], Stats] = {}
+        self._started: list[tuple[float, int]] = []
+        self._regex_times: list[float] = []
+
+    def _start(self, pos: int) -> None:
+        """Remember the start of a grammar or token.
+
+        :param pos: Current position in the content.
+        """
+        self._started.append((perf_counter(), pos))
+        self._regex_times.append(0.0)
+
+    def _stop(self, obj: BaseToken | Grammar, pos: int) -> Stats:
+        """Add the execution since the last start to the statistics.
+
+        :param obj: The executed token or grammar.
+        :param pos: Current position in the content.
+        :returns: The statistics object.
+        """
+        start, start_pos = self._started.pop()
+        regex_time = self._regex_times.pop()
+        if self._regex_times:
+            self._regex_times[-1] += regex_time
+        stats = self.get_stats(obj)
+        stats.time += perf_counter() - start
+        stats.regex_time += regex_time
+        stats.calls += 1
+        stats.consumed_chars += pos - start_pos
+        return stats
+
+    def on_match_attempt(
+        self, regex: Pattern[str], pos: int, match: Match[str] | None, elapsed: float
+    ) -> None:
+        """Add the time of a match attempt to the current grammar or token."""
+        if self._regex_times:
+            self._regex_times[-1] += elapsed
+
+    def on_grammar_enter(self, grammar: Grammar, pos: int) -> None:
+        """Start measuring a grammar."""
+        self._start(pos)
+
+    def on_grammar_exit(self, grammar: Grammar, pos: int, restarts: int) -> None:
+        """Add the execution of a grammar to the statistics."""
+        self._stop(grammar, pos)
+
+    def on_token(self, token: BaseToken, pos: int) -> None:
+        """Start measuring a token."""
+        self._start(pos)
+
+    def on_token_exit(self, token: BaseToken, pos: int, action: PAction) -> None:
+        """Add the execution of a token to the statistics."""
+        self._stop(token, pos)
+
+    def on_condition_exit(
+        self, condition: BaseToken, pos: int, action: PAction
+    ) -> None:
+        """Add the execution of a condition to the statistics."""
+        stats = self._stop(condition, pos)
+        if action == PAction.ENTER:
+            stats.matches += 1
+        else:
+            stats.misses += 1
+
+    def get_stats(self, obj: BaseToken | Grammar) -> Stats:
+        """Return the statistics of a token or grammar.
+
+        :param obj: The token or grammar.
+        :returns: The statistics object.
+        """
+        name = f"grammar {obj.name}" if isinstance(obj, Grammar) else obj.name
+        key = (obj.filename, obj.lineno, name)
+        stats = self.stats.get(key)
+        if stats is None:
+            stats = Stats(*key)
+            self.stats[key] = stats
+        return stats
+
+    def get_sorted_stats(self) -> list[Stats]:
+        """Return the statistics sorted by time descending."""
+        return sorted(self.stats.values(), key=lambda s: s.time, reverse=True)
+
+    def report(self, limit: int | None = None) -> str:
+        """Create a report of the statistics sorted by time.
+
+        :param limit: Maximum number of rows.
+        :returns: The report as a table.
+        """
+        header = (
+            "location",
+            "statement",
+            "calls",
+            "matches",
+            "misses",
+            "ms",
+            "regex ms",
+            "chars",
+        )
+        rows = [header]
+        for stats in self.get_sorted_stats()[:limit]:
+            rows.append(
+                (
+                    f"{stats.filename}:{stats.lineno}",
+                    stats.name,
+                    str(stats.calls),
+                    str(stats.matches),
+                    str(stats.misses),
+                    f"{stats.time * 1000:.3f}",
+                    f"{stats.regex_time * 1000:.3f}",
+                    str(stats.consumed_chars),
+                )
+            )
+        widths = [max(len(row[i]) for row in rows) for i in range(len(header))]
+        lines = []
+        for row in rows:
+            cells = [row[0].ljust(widths[0]), row[1].ljust(widths[1])]
+            cells += [cell.rjust(width) for cell, width in zip(row[2:], widths[2:])]
+            lines.append("  ".join(cells).rstrip())
+        return "\n".join(lines)
+
+    def write_json(self, file_path: Path) -> None:
+        """Write the statistics sorted by time to a json file.
+
+        :param file_path: Path of the file to write to.
+        """
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump([s.to_dict() for s in self.get_sorted_stats()], f, indent=4)
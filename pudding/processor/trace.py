@@ -0,0 +1,267 @@
+"""Module defining the trace recorder and summarizer."""
+
+import json
+import struct
+from pathlib import Path
+from time import perf_counter
+from typing import Any, BinaryIO
+
+from ..tokens.token import BaseToken
+from . import PAction
+from .grammar import Grammar
+from .hooks import Listener
+
+MAGIC = b"PUDTRACE\x02"
+RECORD = struct.Struct("<BIQQBf")
+FOOTER = struct.Struct("<Q")
+
+GRAMMAR = 0
+CONDITION = 1
+TOKEN = 2
+KIND_NAMES = ("grammar", "condition", "token")
+
+
+class TraceRecorder(Listener):
+    """Listener writing a compact binary trace of the processing.
+
+    Every executed grammar, condition and token is written as a record of kind,
+    statement id, input offset, consumed characters, outcome and duration. The
+    outcome is the value of the returned PAction or the number of restarts of a
+    grammar. The table of statements and the source lines of the syntax files are
+    appended as json when the recorder is closed, followed by its length::
+
+        MAGIC record* json_table json_length
+
+    The offsets are positions in a single content, so a recorder must only be
+    attached to the conversion of one file.
+
+    :var buffer_size: Number of bytes buffered before writing to the file.
+    """
+
+    buffer_size = 1 << 16
+
+    def __init__(self, file_path: Path) -> None:
+        """Init for TraceRecorder class.
+
+        :param file_path: Path of the trace file.
+        """
+        self.file: BinaryIO = open(file_path, "wb")
+        self.file.write(MAGIC)
+        self.buffer = bytearray()
+        self.ids: dict[tuple[str, int, str], int] = {}
+        self._started: list[tuple[float, int]] = []
+
+    def _get_id(self, obj: BaseToken | Grammar) -> int:
+        """Return the id of a token or grammar.
+
+        :param obj: The token or grammar.
+        :returns: The statement id.
+        """
+        name = f"grammar {obj.name}" if isinstance(obj, Grammar) else obj.name
+        key = (obj.filename, obj.lineno, name)
+        statement_id = self.ids.get(key)
+        if statement_id is None:
+            statement_id = len(self.ids)
+            self.ids[key] = statement_id
+        return statement_id
+
+    def _start(self, pos: int) -> None:
+        """Remember the start of a grammar or token.
+
+        :param pos: Current position in the content.
+        """
+        self._started.append((perf_counter(), pos))
+
+    def _record(
+        self, kind: int, obj: BaseToken | Grammar, pos: int, outcome: int
+    ) -> None:
+        """Write the record of an execution since the last start.
+
+        :param kind: Kind of the record.
+        :param obj: The executed token or grammar.
+        :param pos: Current position in the content.
+        :param outcome: The outcome of the execution.
+        """
+        start, start_pos = self._started.pop()
+        self.buffer += RECORD.pack(
+            kind,
+            self._get_id(obj),
+            start_pos,
+            pos - start_pos,
+            min(outcome, 255),
+            perf_counter() - start,
+        )
+        if len(self.buffer) >= self.buffer_size:
+            self.file.write(self.buffer)
+            self.buffer.clear()
+
+    def on_grammar_enter(self, grammar: Grammar, pos: int) -> None:
+        """Start recording a grammar."""
+        self._start(pos)
+
+    def on_grammar_exit(self, grammar: Grammar, pos: int, restarts: int) -> None:
+        """Record a grammar."""
+        self._record(GRAMMAR, grammar, pos, restarts)
+
+    def on_token(self, token: BaseToken, pos: int) -> None:
+        """Start recording a token."""
+        self._start(pos)
+
+    def on_token_exit(self, token: BaseToken, pos: int, action: PAction) -> None:
+        """Record a token."""
+        self._record(TOKEN, token, pos, action.value)
+
+    def on_condition_exit(
+        self, condition: BaseToken, pos: int, action: PAction
+    ) -> None:
+        """Record a condition."""
+        self._record(CONDITION, condition, pos, action.value)
+
+    def close(self) -> None:
+        """Write the statement table and close the file."""
+        statements = sorted(self.ids, key=lambda key: self.ids[key])
+        sources: dict[str, list[str]] = {}
+        for filename, _, _ in statements:
+            if filename in sources or not Path(filename).is_file():
+                continue
+            sources[filename] = Path(filename).read_text("utf-8").splitlines()
+        table = json.dumps(
+            {"statements": [list(key) for key in statements], "sources": sources}
+        ).encode("utf-8")
+        self.file.write(self.buffer)
+        self.file.write(table)
+        self.file.write(FOOTER.pack(len(table)))
+        self.file.close()
+
+
+class Trace:
+    """Class reading a trace written by the TraceRecorder.
+
+    :var statements: Tuples of file, line number and name by statement id.
+    :var sources: Lines of the syntax files by file name.
+    :var records: Tuples of kind, statement id, offset, consumed characters,
+        outcome and duration.
+    """
+
+    def __init__(self, file_path: Path) -> None:
+        """Init for Trace class.
+
+        :param file_path: Path of the trace file.
+        :raises ValueError: If the file is not a trace.
+        """
+        data = Path(file_path).read_bytes()
+        if not data.startswith(MAGIC):
+            raise ValueError(f"{file_path} is not a pudding trace")
+        (length,) = FOOTER.unpack_from(data, len(data) - FOOTER.size)
+        table_start = len(data) - FOOTER.size - length
+        table = json.loads(data[table_start : len(data) - FOOTER.size])
+        self.statements: list[tuple[str, int, str]] = [
+            (s[0], s[1], s[2]) for s in table["statements"]
+        ]
+        self.sources: dict[str, list[str]] = table["sources"]
+        records = memoryview(data)[len(MAGIC) : table_start]
+        self.records = list(RECORD.iter_unpack(records))
+
+    def get_source(self, statement_id: int) -> str:
+        """Return the source line of a statement.
+
+        :param statement_id: Id of the statement.
+        :returns: The stripped source line or an empty string if unknown.
+        """
+        filename, lineno, _ = self.statements[statement_id]
+        lines = self.sources.get(filename, [])
+        if 0 < lineno <= len(lines):
+            return lines[lineno - 1].strip()
+        return ""
+
+    def describe(self, statement_id: int) -> str:
+        """Return the location and source of a statement.
+
+        :param statement_id: Id of the statement.
+        :returns: The description.
+        """
+        filename, lineno, name = self.statements[statement_id]
+        source = self.get_source(statement_id) or name
+        return f"{filename}:{lineno}  {source}"
+
+    def summarize(self, limit: int = 10, buckets: int = 10) -> dict[str, Any]:
+        """Summarize the trace.
+
+        :param limit: Maximum number of entries per section.
+        :param buckets: Number of input ranges to split the time into.
+        :returns: Dict with the hot statements, restarting grammars, grammars
+            without progress and the time spent per input range.
+        """
+        stats: dict[int, list[float]] = {}
+        grammars: dict[int, list[int]] = {}
+        end = max((r[2] + r[3] for r in self.records), default=0)
+        size = max(1, -(-end // buckets))
+        ranges = [0.0] * buckets
+        for kind, statement_id, offset, consumed, outcome, duration in self.records:
+            if kind == GRAMMAR:
+                calls, restarts, stalls = grammars.get(statement_id, [0, 0, 0])
+                grammars[statement_id] = [
+                    calls + 1,
+                    restarts + outcome,
+                    stalls + (consumed == 0),
+                ]
+                continue
+            entry = stats.setdefault(statement_id, [0, 0.0])
+            entry[0] += 1
+            entry[1] += duration
+            ranges[min(offset // size, buckets - 1)] += duration
+        hot = sorted(stats.items(), key=lambda item: item[1][1], reverse=True)
+        restarting = sorted(grammars.items(), key=lambda item: item[1][1], reverse=True)
+        stalling = sorted(grammars.items(), key=lambda item: item[1][2], reverse=True)
+        return {
+            "hot": [
+                {"statement": self.describe(i), "calls": s[0], "time": s[1]}
+                for i, s in hot[:limit]
+            ],
+            "restarts": [
+                {"grammar": self.describe(i), "calls": g[0], "restarts": g[1]}
+                for i, g in restarting[:limit]
+                if g[1]
+            ],
+            "no_progress": [
+                {"grammar": self.describe(i), "calls": g[0], "without_progress": g[2]}
+                for i, g in stalling[:limit]
+                if g[2]
+            ],
+            "positions": [
+                {"start": n * size, "end": min((n + 1) * size, end), "time": time}
+                for n, time in enumerate(ranges)
+                if n * size < end
+            ],
+        }
+
+
+def format_summary(summary: dict[str, Any]) -> str:
+    """Format a trace summary as text.
+
+    :param summary: The summary created by `Trace.summarize`.
+    :returns: The formatted summary.
+    """
+    lines = ["Hot statements:"]
+    for entry in summary["hot"]:
+        time = entry["time"] * 1000
+        lines.append(
+            f"  {time:10.3f} ms {entry['calls']:8} calls  {entry['statement']}"
+        )
+    lines.append("Restarting grammars:")
+    for entry in summary["restarts"]:
+        lines.append(
+            f"  {entry['restarts']:8} restarts {entry['calls']:8} calls  "
+            f"{entry['grammar']}"
+        )
+    lines.append("Grammars without progress:")
+    for entry in summary["no_progress"]:
+        lines.append(
+            f"  {entry['without_progress']:8} of {entry['calls']:8} calls  "
+            f"{entry['grammar']}"
+        )
+    lines.append("Time by input position:")
+    for entry in summary["positions"]:
+        time = entry["time"] * 1000
+        lines.append(f"  {entry['start']:10}-{entry['end']:<10} {time:10.3f} ms")
+    return "\n".join(lines)
@@ -1,5 +1,6 @@
 """Package for reading the input file."""
 
 from .reader import Reader
+from .span import Span, Text
 
-__all__ = ["Reader"]
+__all__ = ["Reader", "Span", "Text"]
@@ -1,9 +1,10 @@
 """Module defining Reader class."""
 
-import logging
+from collections.abc import Callable
 from re import Match, Pattern
+from time import perf_counter
 
-logger = logging.getLogger(__name__)
+type MatchCallback = Callable[[Pattern[str], int, Match[str] | None, float], None]
 
 
 class Reader:
@@ -40,16 +41,35 @@ class Reader:
         :param regex: The pattern to match.
         :returns: The match object or None.
         """
-        logger.debug(
-            "Trying to match /%s/ on %s...",
-            regex.pattern,
-            repr(self.content[self.current_pos : self.current_pos + 35]),
-        )
         if self.eof:
             return None
         self.last_match = regex.match(self.content, self.current_pos)
         return self.last_match
 
+    def _match_with_callback(self, regex: Pattern[str]) -> Match[str] | None:
+        """Match a regex like `_match` and pass the attempt to the match callback.
+
+        :param regex: The pattern to match.
+        :returns: The match object or None.
+        """
+        pos = self.current_pos
+        start = perf_counter()
+        match = Reader._match(self, regex)
+        self.match_callback(regex, pos, match, perf_counter() - start)
+        return match
+
+    def set_match_callback(self, callback: MatchCallback) -> None:
+        """Set a function called after every match attempt.
+
+        The function is called with the pattern, the position, the match object or
+        None and the time of the attempt in seconds. Without a callback the reader
+        does not measure the attempts at all.
+
+        :param callback: The function to call.
+        """
+        self.match_callback = callback
+        self._match = self._match_with_callback  # type: ignore[method-assign]
+
     def find(self, regex: Pattern[str]) -> Match[str] | None:
         """Try matching a regex in the content ahead.
 
@@ -80,5 +100,4 @@ class Reader:
         :param trigger: The trigger object.
         :returns: Boolean if trigger matches.
         """
-        logger.debug("Testing match /%s/", regex.pattern)
         return regex.match(self.content, self.current_pos) is not None
@@ -0,0 +1,49 @@
+"""Module defining Span class."""
+
+type Text = str | Span
+
+
+class Span:
+    """Class referencing a part of the read content without copying it.
+
+    The referenced text is only materialized when converting the span to a string.
+
+    :var content: Content the span refers to.
+    :var offset: Position of the first character in the content.
+    :var length: Number of characters of the span.
+    """
+
+    __slots__ = ("content", "offset", "length")
+
+    def __init__(self, content: str, offset: int, length: int) -> None:
+        """Init for Span class.
+
+        :param content: Content the span refers to.
+        :param offset: Position of the first character in the content.
+        :param length: Number of characters of the span.
+        """
+        self.content = content
+        self.offset = offset
+        self.length = length
+
+    def __str__(self) -> str:
+        """Return the referenced text."""
+        return self.content[self.offset : self.offset + self.length]
+
+    def __len__(self) -> int:
+        """Return length of the referenced text."""
+        return self.length
+
+    def __eq__(self, other: object) -> bool:
+        """Compare the referenced text to a string or another span."""
+        if isinstance(other, (str, Span)):
+            return str(self) == str(other)
+        return False
+
+    def __hash__(self) -> int:
+        """Return hash of the referenced text."""
+        return hash(str(self))
+
+    def __repr__(self) -> str:
+        """Return string representation of this object."""
+        return f"<Span offset={self.offset} length={self.length} {repr(str(self))}>"
@@ -0,0 +1,308 @@
+"""Server converting files with compiled syntaxes kept in memory."""
+
+import hmac
+import json
+import logging
+import multiprocessing
+import os
+import secrets
+import socket
+import socketserver
+from concurrent.futures import Executor, ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from time import perf_counter
+from typing import Any
+from urllib.parse import urlsplit
+
+from .client import Address, is_loopback, token_path
+from .compiler import Compiler
+from .compiler.compiler import Syntax
+from .processor.limits import Limits
+from .util import check_syntax, convert_files
+
+OPTIONS = (
+    "auto_stream",
+    "keep_going",
+    "lazy_text",
+    "measure_memory",
+    "parallel",
+    "shard_options",
+    "strict",
+    "writer_options",
+)
+WRITER_OPTIONS = ("batch_size", "columns", "record_path")
+MAX_REQUEST_SIZE = 16 * 1024**2
+
+logger = logging.getLogger(__name__)
+
+
+class SyntaxCache:
+    """Cache of compiled syntaxes by path.
+
+    A syntax is compiled again if the modification time of its file changed. Files
+    imported by the syntax are not checked.
+    """
+
+    def __init__(self) -> None:
+        """Init for SyntaxCache class."""
+        self._syntaxes: dict[Path, tuple[int, Syntax, list[str]]] = {}
+
+    def get(self, syntax_file: Path, strict: bool = False) -> Syntax:
+        """Return the compiled syntax of a file.
+
+        :param syntax_file: Path of the ".pud" file.
+        :param strict: Raise an error if a pattern can backtrack catastrophically.
+        :returns: The compiled syntax.
+        :raises SyntaxError: If strict and a pattern can backtrack catastrophically.
+        """
+        mtime = syntax_file.stat().st_mtime_ns
+        entry = self._syntaxes.get(syntax_file)
+        if entry is None or entry[0] != mtime:
+            syntax = Compiler().compile_file(syntax_file)
+            entry = (mtime, syntax, check_syntax(syntax))
+            self._syntaxes[syntax_file] = entry
+            logger.info("Compiled %s", syntax_file)
+        if strict and entry[2]:
+            raise SyntaxError("\n".join(entry[2]))
+        return entry[1]
+
+
+_cache = SyntaxCache()
+
+
+def convert_request(request: dict[str, Any]) -> dict[str, Any]:
+    """Convert the files of a request with a cached syntax.
+
+    The request contains the absolute paths of the `syntax` file, the `inputs` and
+    the `outputs`, the output `format` and keyword arguments of `convert_files` as
+    `options`, where `limits` are given as dict. The `writer_options` only contain
+    node paths like `record_path`, which do not depend on the working directory of
+    the client.
+
+    :param request: The request.
+    :returns: The statistics of the conversion as dict.
+    :raises ValueError: If an option is not supported or a path is not absolute.
+    """
+    options = dict(request.get("options", {}))
+    limits = options.pop("limits", None)
+    for option in [*options, *(options.get("writer_options") or {})]:
+        if option not in OPTIONS + WRITER_OPTIONS:
+            raise ValueError(f"Unsupported option {repr(option)}")
+    for path in [request["syntax"], *request["inputs"], *request["outputs"]]:
+        if not Path(path).is_absolute():
+            raise ValueError(f"Path {repr(path)} is not absolute")
+    syntax_file = Path(request["syntax"])
+    start = perf_counter()
+    # the cache checks the patterns once per compiled syntax
+    syntax = _cache.get(syntax_file, options.pop("strict", False))
+    compile_time = perf_counter() - start
+    stats = convert_files(
+        syntax_file,
+        [Path(path) for path in request["inputs"]],
+        [Path(path) for path in request["outputs"]],
+        request["format"],
+        limits=None if limits is None else Limits(**limits),
+        syntax=syntax,
+        **options,
+    )
+    stats.compile_time = compile_time
+    return stats.to_dict()
+
+
+def _init_worker(level: int) -> None:
+    """Configure the logging of a worker process like the one of the server."""
+    logging.basicConfig(
+        format="[%(asctime)s] %(levelname)s: %(message)s",
+        datefmt="%Y-%m-%d %I:%M:%S",
+        level=level,
+    )
+
+
+def _start_worker() -> None:
+    """Do nothing, to start a worker process."""
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Handler of the requests to a server.
+
+    `POST /convert` converts the files of a json request with `convert_request`.
+    It requires the token of the server as bearer token and a body of at most
+    `MAX_REQUEST_SIZE` bytes. `GET /health` returns the status of the server.
+    Requests with another host than a loopback address, e.g. from a website
+    resolving its domain to it, are rejected.
+    """
+
+    pool: Executor
+    token: str
+
+    def _respond(self, status: int, data: dict[str, Any]) -> None:
+        """Send a json response."""
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _check_host(self) -> bool:
+        """Respond with an error if the host of the request is not local."""
+        host = self.headers.get("Host", "")
+        try:
+            hostname = urlsplit(f"//{host}").hostname
+        except ValueError:
+            hostname = None
+        if hostname is not None and is_loopback(hostname):
+            return True
+        self._respond(403, {"error": f"Invalid host {host}"})
+        return False
+
+    def do_GET(self) -> None:
+        """Handle a GET request."""
+        if not self._check_host():
+            return
+        if self.path != "/health":
+            self._respond(404, {"error": f"Unknown path {self.path}"})
+            return
+        self._respond(200, {"status": "ok"})
+
+    def _read_body(self) -> bytes | None:
+        """Read the body or respond with an error if its length is invalid."""
+        try:
+            length = int(self.headers.get("Content-Length", ""))
+        except ValueError:
+            length = -1
+        if length < 0:
+            self._respond(400, {"error": "Missing or invalid Content-Length"})
+            return None
+        if length > MAX_REQUEST_SIZE:
+            message = f"Request is larger than {MAX_REQUEST_SIZE} bytes"
+            self._respond(413, {"error": message})
+            return None
+        return self.rfile.read(length)
+
+    def do_POST(self) -> None:
+        """Handle a POST request.
+
+        The body is only read once the request is authorized.
+        """
+        if not self._check_host():
+            return
+        if self.path != "/convert":
+            self._respond(404, {"error": f"Unknown path {self.path}"})
+            return
+        authorization = self.headers.get("Authorization", "")
+        if not hmac.compare_digest(authorization, f"Bearer {self.token}"):
+            self._respond(401, {"error": "Invalid token"})
+            return
+        content_type = self.headers.get_content_type()
+        if content_type != "application/json":
+            self._respond(415, {"error": f"Unsupported content type {content_type}"})
+            return
+        body = self._read_body()
+        if body is None:
+            return
+        try:
+            request = json.loads(body)
+        except ValueError as error:
+            self._respond(400, {"error": f"Invalid request: {error}"})
+            return
+        try:
+            stats = self.pool.submit(convert_request, request).result()
+        except Exception as error:
+            self._respond(500, {"error": f"{type(error).__name__}: {error}"})
+            return
+        self._respond(200, {"stats": stats})
+
+    def log_message(self, format: str, *args: Any) -> None:
+        """Log a request at debug level."""
+        logger.debug(format, *args)
+
+
+class _UnixHTTPServer(socketserver.ThreadingUnixStreamServer):
+    """HTTP server listening on a Unix socket only accessible by the user."""
+
+    daemon_threads = True
+
+    def server_bind(self) -> None:
+        """Bind the socket and restrict its permissions."""
+        super().server_bind()
+        os.chmod(self.socket.getsockname(), 0o600)
+
+
+class _IPv6HTTPServer(ThreadingHTTPServer):
+    """HTTP server listening on an IPv6 address."""
+
+    address_family = socket.AF_INET6
+
+
+class ConversionServer:
+    """Server converting files in a pool of worker processes.
+
+    Every worker keeps the syntaxes it compiled in a `SyntaxCache`, so requests
+    only pay for converting their files once the workers are warm. The files are
+    read and written by the server, so paths have to be absolute.
+
+    Conversions require a random token, which is written to a file only readable
+    by the user at `token_path` of the address and read from there by the client.
+    A server listening on a port only accepts a loopback address as host, like
+    `127.0.0.1` or `::1`, as the requests contain paths of the server's file
+    system.
+
+    :var address: The address the server listens on.
+    :var token_file: Path of the file containing the token.
+    """
+
+    def __init__(self, address: Address, workers: int | None = None) -> None:
+        """Init for ConversionServer class.
+
+        :param address: Path of a Unix socket or a tuple of host and port.
+        :param workers: Number of worker processes. Default is the number of CPUs.
+        :raises ValueError: If the host is not a loopback address.
+        """
+        if not isinstance(address, str) and not is_loopback(address[0]):
+            raise ValueError(f"Host {address[0]} is not a loopback address")
+        self.address = address
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = ProcessPoolExecutor(
+            self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(logging.getLogger().getEffectiveLevel(),),
+        )
+        token = secrets.token_urlsafe(32)
+        handler = type("Handler", (_Handler,), {"pool": self.pool, "token": token})
+        self.httpd: socketserver.BaseServer
+        if isinstance(address, str):
+            self.httpd = _UnixHTTPServer(address, handler)
+        elif ":" in address[0]:
+            self.httpd = _IPv6HTTPServer((address[0].strip("[]"), address[1]), handler)
+        else:
+            self.httpd = ThreadingHTTPServer(address, handler)
+        self.token_file = token_path(address)
+        self.token_file.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        self.token_file.unlink(missing_ok=True)
+        fd = os.open(self.token_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "w", encoding="ascii") as file:
+            file.write(token)
+
+    def start_workers(self) -> None:
+        """Start the worker processes, so the first requests are not delayed."""
+        for future in [self.pool.submit(_start_worker) for _ in range(self.workers)]:
+            future.result()
+
+    def serve_forever(self) -> None:
+        """Handle requests until `shutdown` is called from another thread."""
+        self.httpd.serve_forever()
+
+    def shutdown(self) -> None:
+        """Stop handling requests."""
+        self.httpd.shutdown()
+
+    def close(self) -> None:
+        """Close the socket and stop the worker processes."""
+        self.httpd.server_close()
+        self.pool.shutdown(cancel_futures=True)
+        self.token_file.unlink(missing_ok=True)
+        if isinstance(self.address, str):
+            Path(self.address).unlink(missing_ok=True)
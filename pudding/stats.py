@@ -0,0 +1,133 @@
+"""Module defining conversion statistics."""
+
+import json
+from pathlib import Path
+from typing import Any
+
+
+class FileStats:
+    """Statistics of converting a single file.
+
+    :var input_file: Path of the converted file.
+    :var output_files: Paths of the written files.
+    :var input_bytes: Size of the input file.
+    :var output_bytes: Total size of the written files.
+    :var node_count: Number of created nodes, if the writer counts them.
+    :var grammar_calls: Number of executed grammars.
+    :var restarts: Number of grammar restarts.
+    :var parse_time: Time of processing the input in seconds.
+    :var serialize_time: Time of writing the output in seconds.
+    :var peak_memory: Peak traced memory in bytes or None if not measured.
+    :var error: Description of the error if the conversion failed or None.
+    :var position: Position in the input reached before the conversion failed.
+    :var line: Line of the position reached before the conversion failed.
+    """
+
+    def __init__(self, input_file: Path, output_files: list[Path]) -> None:
+        """Init for FileStats class.
+
+        :param input_file: Path of the converted file.
+        :param output_files: Paths of the written files.
+        """
+        self.input_file = input_file
+        self.output_files = output_files
+        self.input_bytes = 0
+        self.output_bytes = 0
+        self.node_count = 0
+        self.grammar_calls = 0
+        self.restarts = 0
+        self.parse_time = 0.0
+        self.serialize_time = 0.0
+        self.peak_memory: int | None = None
+        self.error: str | None = None
+        self.position: int | None = None
+        self.line: int | None = None
+
+    @property
+    def throughput(self) -> float:
+        """Converted megabytes of input per second."""
+        total = self.parse_time + self.serialize_time
+        if not total:
+            return 0.0
+        return self.input_bytes / total / 1e6
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the statistics as a dict."""
+        return {
+            "input_file": str(self.input_file),
+            "output_files": [str(path) for path in self.output_files],
+            "input_bytes": self.input_bytes,
+            "output_bytes": self.output_bytes,
+            "node_count": self.node_count,
+            "grammar_calls": self.grammar_calls,
+            "restarts": self.restarts,
+            "parse_time": self.parse_time,
+            "serialize_time": self.serialize_time,
+            "peak_memory": self.peak_memory,
+            "throughput": self.throughput,
+            "error": self.error,
+            "position": self.position,
+            "line": self.line,
+        }
+
+
+class ConversionStats:
+    """Statistics of a conversion returned by `convert_files`.
+
+    :var syntax_file: Path of the used syntax file.
+    :var compile_time: Time of compiling the syntax in seconds.
+    :var files: Statistics of each converted file.
+    """
+
+    def __init__(self, syntax_file: Path) -> None:
+        """Init for ConversionStats class.
+
+        :param syntax_file: Path of the used syntax file.
+        """
+        self.syntax_file = syntax_file
+        self.compile_time = 0.0
+        self.files: list[FileStats] = []
+
+    @property
+    def failures(self) -> list[FileStats]:
+        """Statistics of the files which failed to convert."""
+        return [f for f in self.files if f.error is not None]
+
+    @property
+    def input_bytes(self) -> int:
+        """Total size of all input files."""
+        return sum(f.input_bytes for f in self.files)
+
+    @property
+    def total_time(self) -> float:
+        """Total time of compiling and converting in seconds."""
+        return self.compile_time + sum(
+            f.parse_time + f.serialize_time for f in self.files
+        )
+
+    @property
+    def throughput(self) -> float:
+        """Converted megabytes of input per second, including compiling."""
+        if not self.total_time:
+            return 0.0
+        return self.input_bytes / self.total_time / 1e6
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the statistics as a dict."""
+        return {
+            "syntax_file": str(self.syntax_file),
+            "compile_time": self.compile_time,
+            "total_time": self.total_time,
+            "input_bytes": self.input_bytes,
+            "throughput": self.throughput,
+            "failures": len(self.failures),
+            "files": [f.to_dict() for f in self.files],
+        }
+
+    def write_json(self, file_path: Path) -> None:
+        """Write the statistics to a json file.
+
+        :param file_path: Path of the file to write to.
+        """
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=4)
@@ -5,9 +5,4 @@ from .next import Next
 from .return_ import Return
 from .say import Say
 
-__all__ = [
-    'Fail',
-    'Next',
-    'Return',
-    'Say'
-]
+__all__ = ["Fail", "Next", "Return", "Say"]
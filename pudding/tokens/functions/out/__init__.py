@@ -1,7 +1,7 @@
 """Package containing tokens for output generating functions."""
 
-from .add_attribute import AddAttribute
 from .add import Add
+from .add_attribute import AddAttribute
 from .clear_queue import ClearQueue
 from .create import Create
 from .enqueue import EnqueueAfter, EnqueueBefore, EnqueueOnAdd
@@ -13,17 +13,17 @@ from .say import Say
 from .set_root_name import SetRootName
 
 __all__ = [
-    'AddAttribute',
-    'Add',
-    'ClearQueue',
-    'Create',
-    'EnqueueAfter',
-    'EnqueueBefore',
-    'EnqueueOnAdd',
-    'Enter',
-    'Open',
-    'Remove',
-    'Replace',
-    'Say',
-    'SetRootName'
+    "AddAttribute",
+    "Add",
+    "ClearQueue",
+    "Create",
+    "EnqueueAfter",
+    "EnqueueBefore",
+    "EnqueueOnAdd",
+    "Enter",
+    "Open",
+    "Remove",
+    "Replace",
+    "Say",
+    "SetRootName",
 ]
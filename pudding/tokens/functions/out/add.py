@@ -26,7 +26,7 @@ class Add(Out):
         """
         value = None
         if self.get_value(1):
-            value = context.replace_string_vars(self.get_string(1))
+            value = context.get_text(self.get_string(1))
         context.writer.add_element(
             context.replace_string_vars(self.get_string(0)), value
         )
@@ -29,7 +29,7 @@ class Create(Out):
         """
         value = None
         if self.get_value(1):
-            value = context.replace_string_vars(self.get_string(1))
+            value = context.get_text(self.get_string(1))
         context.writer.create_element(
             context.replace_string_vars(self.get_string(0)),
             value,
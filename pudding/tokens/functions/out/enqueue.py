@@ -2,10 +2,10 @@
 
 import re
 
+from ....datatypes import Regex, String, Varname
 from ....processor import PAction
 from ....processor.context import Context
 from ....processor.triggers import Timing, Trigger
-from ....datatypes import Regex, String, Varname
 from .add import Add
 from .out import Out
 
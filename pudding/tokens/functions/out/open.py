@@ -27,8 +27,6 @@ class Open(Out):
         """
         value = None
         if self.get_value(1):
-            value = context.replace_string_vars(self.get_string(1))
-        context.writer.open_path(
-            context.replace_string_vars(self.get_string(0)), value
-        )
+            value = context.get_text(self.get_string(1))
+        context.writer.open_path(context.replace_string_vars(self.get_string(0)), value)
         return PAction.CONTINUE
@@ -2,9 +2,9 @@
 
 import re
 
+from ....datatypes import String
 from ....processor import PAction
 from ....processor.context import Context
-from ....datatypes import String
 from .out import Out
 
 
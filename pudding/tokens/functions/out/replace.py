@@ -25,7 +25,7 @@ class Replace(Out):
         """
         value = None
         if self.get_value(1):
-            value = context.replace_string_vars(self.get_string(1))
+            value = context.get_text(self.get_string(1))
         context.writer.replace_element(
             context.replace_string_vars(self.get_string(0)), value
         )
@@ -2,11 +2,10 @@
 
 import re
 
-from ....writer import Xml
-
 from ....datatypes import String
 from ....processor import PAction
 from ....processor.context import Context
+from ....writer.writers.xml import IncXml, Xml
 from .out import Out
 
 
@@ -24,6 +23,6 @@ class SetRootName(Out):
         :param context: Current context object.
         :returns: PAction.CONTINUE
         """
-        if isinstance(context.writer, Xml):
+        if isinstance(context.writer, (IncXml, Xml)):
             context.writer.root_name = self.get_string(0).value
         return PAction.CONTINUE
@@ -7,7 +7,7 @@ from .import_ import FromImport, Import
 from .match import IMatch, Match
 from .next import Next
 from .return_ import Return
-from .skip import Skip, ISkip
+from .skip import ISkip, Skip
 from .when import IWhen, When
 
 __all__ = [
@@ -3,9 +3,8 @@
 import re
 from typing import Self
 
-from ...datatypes.util import string_to_datatype
-
 from ...datatypes import String
+from ...datatypes.util import string_to_datatype
 from ...processor import PAction
 from ...processor.context import Context
 from .statement import Statement
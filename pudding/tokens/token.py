@@ -21,10 +21,12 @@ class BaseToken:
         in a line.
     :var value_delim_re: Regex matching the delimiter between values in the string
         matched by the match_re in group two.
+    :var filename: Path of the file the token is defined in.
     """
 
     match_re: Pattern[str]
     value_delim_re: Pattern[str]
+    filename = "<string>"
 
     def __init__(self, lineno: int, name: str, values: tuple[Data, ...]) -> None:
         """Init function for Token class.
@@ -66,13 +68,13 @@ class BaseToken:
         values: list[str] = []
         while match is not None:
             values.append(match.group(0))
-            value_string = value_string[len(match[0]):]
+            value_string = value_string[len(match[0]) :]
             if not value_string:
                 return values
             delim = re.match(cls.value_delim_re, value_string)
             if not delim:
                 raise SyntaxError("Invalid syntax of values in token.")
-            value_string = value_string[len(delim[0]):]
+            value_string = value_string[len(delim[0]) :]
             match = re.match(EXP_VAR, value_string)
             if not match:
                 raise SyntaxError("Invalid syntax of values in token.")
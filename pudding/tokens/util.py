@@ -2,7 +2,7 @@
 
 import re
 
-from ..datatypes import Regex, String, Varname, Or
+from ..datatypes import Or, Regex, String, Varname
 
 INDENTATION_RE = re.compile(r"^(\s|\t)+")
 
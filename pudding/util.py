@@ -1,26 +1,194 @@
 """Utility functions."""
 
-import datetime
 import logging
+import queue
+import threading
+import tracemalloc
+from collections.abc import Callable, Generator
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-
-from .writer.util import get_writer_from_format
+from time import perf_counter
+from typing import Any
 
 from .compiler import Compiler
+from .compiler.analysis import (
+    STREAMING_FORMATS,
+    OutputAnalysis,
+    get_streaming_format,
+)
+from .compiler.compiler import Syntax
 from .processor.context import Context
+from .processor.hooks import DebugLogListener, Listener, ListeningProcessor
+from .processor.limits import (
+    FORK_SUPPORTED,
+    FORK_UNSUPPORTED,
+    LimitListener,
+    Limits,
+    run_limited,
+)
 from .processor.processor import Processor
 from .reader import Reader
+from .stats import ConversionStats, FileStats
+from .writer.node import Node
+from .writer.util import get_shareable_writer, get_writer_from_format
+from .writer.writers.event import CallbackWriter, Event, EventWriter
+from .writer.writers.json import Json, JsonType, _to_json
+from .writer.writers.sharded import ShardedWriter
+from .writer.writers.writer import BufferedWriter, Writer
+from .writer.writers.xml import Xml
+
+try:
+    from .compiler.backtracking import check_backtracking
+    from .compiler.patterns import reorder_syntax
+except ImportError as error:  # pragma: no cover
+    pattern_error: ImportError | None = error
+else:
+    pattern_error = None
 
 logger = logging.getLogger(__name__)
 
 
+class _Cancelled(Exception):
+    """Exception stopping a conversion whose results are no longer consumed."""
+
+
+def check_syntax(syntax: Syntax, strict: bool = False) -> list[str]:
+    """Check the patterns of a syntax for catastrophic backtracking.
+
+    The check is skipped with a warning if the pattern analysis does not support
+    the regex parser of the running Python version.
+
+    :param syntax: The compiled syntax.
+    :param strict: Raise an error if a problem was found or the check is skipped.
+    :returns: Descriptions of the found problems.
+    :raises SyntaxError: If strict and a problem was found.
+    :raises ValueError: If strict and the check is not supported.
+    """
+    if pattern_error is not None:
+        if strict:
+            raise ValueError(str(pattern_error))
+        logger.warning("Skipping the backtracking check. %s", pattern_error)
+        return []
+    return check_backtracking(syntax, strict)
+
+
+def _get_listeners(listeners: list[Listener] | None) -> list[Listener]:
+    """Return the listeners with the debug log listener if debug logging is enabled.
+
+    :param listeners: The listeners given by the user.
+    :returns: The listeners to notify.
+    """
+    listeners = list(listeners or [])
+    if logging.getLogger(__package__).isEnabledFor(logging.DEBUG):
+        listeners.append(DebugLogListener())
+    return listeners
+
+
+def _get_processor(
+    context: Context, syntax: Syntax, listeners: list[Listener]
+) -> Processor:
+    """Return a processor notifying the listeners.
+
+    The instrumented processor is only used if there are listeners.
+
+    :param context: The context to process.
+    :param syntax: The compiled syntax.
+    :param listeners: The listeners to notify.
+    :returns: The processor.
+    """
+    if listeners:
+        return ListeningProcessor(context, syntax, listeners)
+    return Processor(context, syntax)
+
+
+def _collect_stats(
+    stats: FileStats, processor: Processor, writers: list[Writer]
+) -> None:
+    """Collect the statistics of a converted file.
+
+    :param stats: The statistics to fill.
+    :param processor: The processor which converted the file.
+    :param writers: The writers of the file.
+    """
+    stats.input_bytes = stats.input_file.stat().st_size
+    stats.grammar_calls = processor.grammar_calls
+    stats.restarts = processor.restarts
+    if isinstance(writers[0], BufferedWriter):
+        stats.node_count = writers[0].node_count
+    for writer in writers:
+        if isinstance(writer, ShardedWriter):
+            stats.output_files = writer.shard_paths
+    stats.output_bytes = sum(
+        path.stat().st_size for path in stats.output_files if path.is_file()
+    )
+
+
+def _record_failure(
+    stats: FileStats, error: BaseException, position: int | None, encoding: str
+) -> None:
+    """Record the error and position of a failed conversion.
+
+    :param stats: The statistics of the file.
+    :param error: The error.
+    :param position: The position reached in the input or None if unknown.
+    :param encoding: Encoding of the input file.
+    """
+    stats.error = f"{type(error).__name__}: {error}"
+    stats.position = position
+    if position is None:
+        return
+    try:
+        with open(stats.input_file, "r", encoding=encoding) as file:
+            content = file.read()
+    except (OSError, ValueError):
+        return
+    stats.input_bytes = len(content.encode(encoding))
+    stats.line = content.count("\n", 0, position) + 1
+
+
+def _write_outputs(writers: list[Writer], parallel: bool) -> None:
+    """Write the output of writers sharing the node tree of the first one.
+
+    :param writers: The writers, where the first one contains the converted tree.
+    :param parallel: Write the outputs in parallel threads.
+    """
+    primary = writers[0]
+    if len(writers) > 1 and isinstance(primary, BufferedWriter):
+        primary.leave_paths(len(primary.prev_roots))
+        if isinstance(primary, Xml):
+            primary.release_nodes = False
+        for writer in writers[1:]:
+            if isinstance(writer, BufferedWriter):
+                writer.root = primary.root
+    if not parallel or len(writers) == 1:
+        for writer in writers:
+            writer.write_output()
+        return
+    with ThreadPoolExecutor(len(writers)) as executor:
+        for future in [executor.submit(w.write_output) for w in writers]:
+            future.result()
+
+
 def convert_files(
     syntax_file: Path,
     input_files: list[Path],
     output_files: list[Path],
-    output_format: str,
+    output_format: str | list[str],
     encoding: str = "utf-8",
-) -> None:
+    *,
+    lazy_text: bool = False,
+    auto_stream: bool = True,
+    writer_options: dict[str, Any] | None = None,
+    parallel: bool = False,
+    shard_options: dict[str, Any] | None = None,
+    listeners: list[Listener] | None = None,
+    measure_memory: bool = False,
+    reorder_profile: Path | None = None,
+    strict: bool = False,
+    limits: Limits | None = None,
+    keep_going: bool = False,
+    syntax: Syntax | None = None,
+) -> ConversionStats:
     """Convert multiple files.
 
     :param syntax_file: Path of the ".pud" file.
@@ -29,53 +197,423 @@ def convert_files(
         List of paths to write to, where the index corresponds to index of the
         input filepaths. E.g. the converted output of the first file in `input_files`
         will be written to the first path in this list.
-    :param output_format: Format of the output.
+    :param output_format: Format of the output or a list of formats. Every input is
+        parsed once and written in all formats, where the suffix of the output path
+        is replaced by the name of the format.
     :param encoding: Encoding of the input and output files.
+    :param lazy_text: Reference matched text in the input instead of copying it.
+    :param auto_stream: Use the streaming variant of the output format, if the syntax
+        only changes the subtree of the current top-level node.
+    :param writer_options: Additional keyword arguments for the writer, e.g. the
+        `record_path` and `columns` of the csv writer.
+    :param parallel: Write the output of multiple formats in parallel threads.
+    :param shard_options: Split the output into multiple files using the
+        streaming variant of the format. See `ShardedWriter` for the options.
+    :param listeners: Listeners notified while processing, e.g. a `Profiler`.
+        Debug logging is added as a listener if enabled.
+    :param measure_memory: Trace the peak memory of each file with tracemalloc.
+        Slows down the conversion considerably.
+    :param reorder_profile: Path of a profile written by the `Profiler`. Exclusive
+        match statements are reordered to try the most matching ones first.
+    :param strict: Raise an error instead of logging a warning, if a pattern of the
+        syntax can backtrack catastrophically.
+    :param limits: Limits of the conversion of each file. Time and memory limits
+        convert each file in a forked worker process, where the listeners are
+        notified, so the given listeners must not be used with them.
+    :param keep_going: Continue with the remaining files if the conversion of a
+        file fails. The error and the position reached are recorded in the
+        statistics of the file.
+    :param syntax: The already compiled syntax of `syntax_file`, e.g. from a cache.
+        It is used as is, so `reorder_profile` is ignored and its patterns are
+        only checked if `strict`.
+    :returns: Statistics of the conversion.
+    :raises SyntaxError: If strict and a pattern can backtrack catastrophically.
+    :raises ValueError: If listeners are given with time or memory limits, time or
+        memory limits are not supported on the platform, or the pattern analysis
+        needed for `strict` or `reorder_profile` is not supported.
+    :raises LimitExceeded: If a limit is exceeded and not keep_going.
     """
-    start = datetime.datetime.now()
-    syntax = Compiler().compile_file(syntax_file)
-    logger.debug("Compiled syntax in %s", str(datetime.datetime.now() - start))
-    writer_cls = get_writer_from_format(output_format)
+    if limits is not None and limits.needs_worker:
+        if listeners:
+            raise ValueError("Listeners can not be used with time or memory limits")
+        if not FORK_SUPPORTED:
+            raise ValueError(FORK_UNSUPPORTED)
+    stats = ConversionStats(syntax_file)
+    if syntax is None:
+        start = perf_counter()
+        syntax = Compiler().compile_file(syntax_file)
+        check_syntax(syntax, strict)
+        if reorder_profile is not None:
+            if pattern_error is not None:
+                raise ValueError(str(pattern_error))
+            reorder_syntax(syntax, reorder_profile)
+        stats.compile_time = perf_counter() - start
+        logger.debug("Compiled syntax in %.6fs", stats.compile_time)
+    elif strict:
+        check_syntax(syntax, strict)
+    formats = [output_format] if isinstance(output_format, str) else output_format
+    writer_classes: list[type[Writer]]
+    if writer_options is None:
+        writer_options = {}
+    listeners = _get_listeners(listeners)
+    if len(formats) > 1:
+        if shard_options is not None:
+            raise ValueError("Multiple output formats can not be sharded")
+        # the xml writer has to create the tree, as only it supports a root name
+        formats = sorted(dict.fromkeys(formats), key=lambda f: f != "xml")
+        writer_classes = [get_shareable_writer(f) for f in formats]
+    elif shard_options is not None:
+        reasons = OutputAnalysis(syntax).analyse()
+        if reasons:
+            logger.warning("Shards may be incomplete, because %s.", reasons[0])
+        writer_options = {
+            "output_format": STREAMING_FORMATS.get(formats[0], formats[0]),
+            "writer_options": writer_options,
+            **shard_options,
+        }
+        writer_classes = [ShardedWriter]
+    else:
+        output_format = formats[0]
+        if auto_stream:
+            output_format = get_streaming_format(syntax, output_format)
+        writer_classes = [get_writer_from_format(output_format)]
+
+    def convert(file_stats: FileStats, limit: LimitListener | None = None) -> FileStats:
+        """Convert a file and fill its statistics.
+
+        The limit listener is only notified if it enforces a token limit, so the
+        processor without listeners can be used otherwise.
+        """
+        if measure_memory:
+            tracemalloc.start()
+        try:
+            start = perf_counter()
+            with open(file_stats.input_file, "r", encoding=encoding) as file:
+                content = file.read()
+            writers = [
+                writer_cls(path, encoding=encoding, **writer_options)
+                for writer_cls, path in zip(writer_classes, file_stats.output_files)
+            ]
+            context = Context(Reader(content), writers[0], lazy_text=lazy_text)
+            file_listeners = listeners
+            if limit is not None and limit.needed:
+                file_listeners = [*listeners, limit]
+            processor = _get_processor(context, syntax, file_listeners)
+            try:
+                processor.convert()
+            except Exception:
+                if limit is not None:
+                    limit.update(context.reader.current_pos)
+                raise
+            file_stats.parse_time = perf_counter() - start
+            start = perf_counter()
+            _write_outputs(writers, parallel)
+            file_stats.serialize_time = perf_counter() - start
+            if measure_memory:
+                file_stats.peak_memory = tracemalloc.get_traced_memory()[1]
+        finally:
+            if measure_memory:
+                tracemalloc.stop()
+        _collect_stats(file_stats, processor, writers)
+        return file_stats
+
     for input_file, output_file in zip(input_files, output_files):
-        with open(input_file, "r", encoding=encoding) as file:
-            content = file.read()
-        context = Context(Reader(content), writer_cls(output_file, encoding=encoding))
-        writer = Processor(context, syntax).convert()
-        writer.write_output()
-    logger.debug("Finished in %s", str(datetime.datetime.now() - start))
+        paths = [output_file]
+        if len(formats) > 1:
+            paths = [output_file.with_suffix(f".{f}") for f in formats]
+        file_stats = FileStats(input_file, paths)
+        if limits is None and not keep_going:
+            convert(file_stats)
+        else:
+            result, error, position = run_limited(
+                lambda limit: convert(file_stats, limit), limits or Limits()
+            )
+            if error is not None:
+                _record_failure(file_stats, error, position, encoding)
+                if not keep_going:
+                    raise error
+                logger.error(
+                    "Failed to convert %s in line %s: %s",
+                    input_file,
+                    file_stats.line,
+                    file_stats.error,
+                )
+            elif result is not None:
+                file_stats = result
+        stats.files.append(file_stats)
+        logger.debug(
+            "Converted %s in %.6fs",
+            input_file,
+            file_stats.parse_time + file_stats.serialize_time,
+        )
+    return stats
 
 
 def convert_file(
     syntax_file: Path,
     input_file: Path,
     output_file: Path,
-    output_format: str,
+    output_format: str | list[str],
     encoding: str = "utf-8",
-) -> None:
+    *,
+    lazy_text: bool = False,
+    auto_stream: bool = True,
+    writer_options: dict[str, Any] | None = None,
+    parallel: bool = False,
+    shard_options: dict[str, Any] | None = None,
+    listeners: list[Listener] | None = None,
+    measure_memory: bool = False,
+    reorder_profile: Path | None = None,
+    strict: bool = False,
+    limits: Limits | None = None,
+    keep_going: bool = False,
+) -> ConversionStats:
     """Convert a single file.
 
     :param syntax_file: Path of the ".pud" file.
     :param input_file: Path of the file to convert.
     :param output_file: Path of the file to write to.
-    :param output_format: Format of the output.
+    :param output_format: Format of the output or a list of formats. See
+        `convert_files`.
     :param encoding: Encoding of the input and output file.
+    :param lazy_text: Reference matched text in the input instead of copying it.
+    :param auto_stream: Use the streaming variant of the output format, if the syntax
+        only changes the subtree of the current top-level node.
+    :param writer_options: Additional keyword arguments for the writer, e.g. the
+        `record_path` and `columns` of the csv writer.
+    :param parallel: Write the output of multiple formats in parallel threads.
+    :param shard_options: Split the output into multiple files using the
+        streaming variant of the format. See `ShardedWriter` for the options.
+    :param listeners: Listeners notified while processing, e.g. a `Profiler`.
+        Debug logging is added as a listener if enabled.
+    :param measure_memory: Trace the peak memory with tracemalloc.
+    :param reorder_profile: Path of a profile written by the `Profiler` to reorder
+        exclusive match statements by.
+    :param strict: Raise an error if a pattern can backtrack catastrophically.
+    :param limits: Limits of the conversion. See `convert_files`.
+    :param keep_going: Record an error in the statistics instead of raising it.
+    :returns: Statistics of the conversion.
     """
     return convert_files(
-        syntax_file, [input_file], [output_file], output_format, encoding
+        syntax_file,
+        [input_file],
+        [output_file],
+        output_format,
+        encoding,
+        lazy_text=lazy_text,
+        auto_stream=auto_stream,
+        writer_options=writer_options,
+        parallel=parallel,
+        shard_options=shard_options,
+        listeners=listeners,
+        measure_memory=measure_memory,
+        reorder_profile=reorder_profile,
+        strict=strict,
+        limits=limits,
+        keep_going=keep_going,
     )
 
 
-def convert_string(syntax: str, content: str, output_format: str) -> str:
+def _convert(
+    syntax: str | Syntax,
+    content: str,
+    writer: Writer,
+    lazy_text: bool,
+    strict: bool = False,
+) -> Writer:
+    """Convert a string with the given writer.
+
+    :param syntax: Content of a ".pud" file or an already compiled syntax.
+    :param content: String to convert.
+    :param writer: Writer to write the output with.
+    :param lazy_text: Reference matched text in the input instead of copying it.
+    :param strict: Raise an error if a pattern can backtrack catastrophically.
+    :returns: The writer containing the output.
+    :raises SyntaxError: If strict and a pattern can backtrack catastrophically.
+    :raises ValueError: If strict and the pattern analysis is not supported.
+    """
+    if isinstance(syntax, str):
+        start = perf_counter()
+        syntax = Compiler().compile(syntax)
+        logger.debug("Compiled syntax in %.6fs", perf_counter() - start)
+    if strict:
+        check_syntax(syntax, strict)
+    context = Context(Reader(content), writer, lazy_text=lazy_text)
+    return _get_processor(context, syntax, _get_listeners(None)).convert()
+
+
+def convert_string(
+    syntax: str | Syntax,
+    content: str,
+    output_format: str,
+    *,
+    lazy_text: bool = False,
+    strict: bool = False,
+) -> str:
     """Convert a string.
 
-    :param syntax: Content of a ".pud" file.
+    :param syntax: Content of a ".pud" file or an already compiled syntax.
     :param content: String to convert.
     :param output_format: Format of the output.
+    :param lazy_text: Reference matched text in the input instead of copying it.
+    :param strict: Raise an error if a pattern can backtrack catastrophically.
+    :raises SyntaxError: If strict and a pattern can backtrack catastrophically.
     """
-    start = datetime.datetime.now()
-    compiler = Compiler().compile(syntax)
-    logger.debug("Compiled syntax in %s", str(datetime.datetime.now() - start))
     writer_cls = get_writer_from_format(output_format)
-    context = Context(Reader(content), writer_cls(Path()))
-    writer = Processor(context, compiler).convert()
+    writer = _convert(syntax, content, writer_cls(Path()), lazy_text, strict)
     return writer.generate_output()
+
+
+def convert_to_dict(
+    syntax: str | Syntax, content: str, *, lazy_text: bool = False
+) -> JsonType:
+    """Convert a string to python objects.
+
+    The result has the same layout as the json output, without serializing it.
+
+    :param syntax: Content of a ".pud" file or an already compiled syntax.
+    :param content: String to convert.
+    :param lazy_text: Reference matched text in the input instead of copying it.
+    :returns: The converted dict.
+    """
+    writer = Json(Path())
+    _convert(syntax, content, writer, lazy_text)
+    return writer.to_dict()
+
+
+def convert_to_node(
+    syntax: str | Syntax, content: str, *, lazy_text: bool = False
+) -> Node:
+    """Convert a string to a tree of nodes.
+
+    :param syntax: Content of a ".pud" file or an already compiled syntax.
+    :param content: String to convert.
+    :param lazy_text: Reference matched text in the input instead of copying it.
+    :returns: The root node of the tree.
+    """
+    writer = BufferedWriter(Path())
+    _convert(syntax, content, writer, lazy_text)
+    writer.leave_paths(len(writer.prev_roots))
+    return writer.root
+
+
+def _iterate[T](
+    produce: Callable[[Callable[[T], None]], None], queue_size: int
+) -> Generator[T, None, None]:
+    """Run a producer in a thread and yield the emitted items.
+
+    The producer blocks if `queue_size` items have not been consumed yet. If the
+    iterator is closed before all items are consumed, the producer is stopped at
+    the next emitted item. Exceptions of the producer are raised by the iterator.
+
+    :param produce: Function called in the thread with the function emitting items.
+    :param queue_size: Maximum number of items waiting to be consumed.
+    :returns: Iterator over the emitted items.
+    """
+    items: queue.Queue[tuple[bool, Any]] = queue.Queue(queue_size)
+    stop = threading.Event()
+
+    def put(entry: tuple[bool, Any]) -> bool:
+        """Put an entry into the queue unless the iterator was closed.
+
+        :returns: If the entry was put into the queue.
+        """
+        while not stop.is_set():
+            try:
+                items.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def emit(item: T) -> None:
+        """Put an item into the queue or stop if the iterator was closed."""
+        if not put((False, item)):
+            raise _Cancelled
+
+    def run() -> None:
+        """Run the producer and pass its result to the iterator."""
+        try:
+            produce(emit)
+        except _Cancelled:
+            return
+        except BaseException as e:
+            put((True, e))
+            return
+        put((True, None))
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    try:
+        while True:
+            done, item = items.get()
+            if done:
+                if item is not None:
+                    raise item
+                return
+            yield item
+    finally:
+        stop.set()
+        thread.join()
+
+
+def iter_events(
+    syntax: str | Syntax, content: str, *, queue_size: int = 1000
+) -> Generator[Event, None, None]:
+    """Convert a string and iterate over the output events.
+
+    The conversion runs in a thread and pauses if `queue_size` events have not been
+    consumed yet. See `EventWriter` for the emitted events.
+
+    :param syntax: Content of a ".pud" file or an already compiled syntax.
+    :param content: String to convert.
+    :param queue_size: Maximum number of events waiting to be consumed.
+    :returns: Iterator over the events.
+    """
+
+    def produce(emit: Callable[[Event], None]) -> None:
+        """Convert the content emitting the events."""
+        _convert(syntax, content, EventWriter(emit), False).write_output()
+
+    return _iterate(produce, queue_size)
+
+
+def iter_records(
+    syntax: str | Syntax,
+    source: str | Path,
+    *,
+    as_dict: bool = False,
+    encoding: str = "utf-8",
+    lazy_text: bool = False,
+    queue_size: int = 100,
+) -> Generator[Node | JsonType, None, None]:
+    """Convert a string or file and iterate over the completed top-level nodes.
+
+    The conversion runs in a thread and pauses if `queue_size` records have not
+    been consumed yet. Records are removed from the tree as soon as all entered
+    paths have been left, so only the current record is kept in memory.
+
+    :param syntax: Content of a ".pud" file or an already compiled syntax.
+    :param source: String or path of the file to convert.
+    :param as_dict: Yield the records as `{name: value}` in the layout of the json
+        output instead of Node objects.
+    :param encoding: Encoding of the input file.
+    :param lazy_text: Reference matched text in the input instead of copying it.
+    :param queue_size: Maximum number of records waiting to be consumed.
+    :returns: Iterator over the records.
+    """
+    if isinstance(source, Path):
+        with open(source, "r", encoding=encoding) as file:
+            source = file.read()
+    content = source
+
+    def produce(emit: Callable[[Node | JsonType], None]) -> None:
+        """Convert the content emitting the completed top-level nodes."""
+
+        def handler(node: Node) -> None:
+            """Emit a completed top-level node."""
+            emit({node.name: _to_json(node)} if as_dict else node)
+
+        _convert(syntax, content, CallbackWriter(handler), lazy_text).write_output()
+
+    return _iterate(produce, queue_size)
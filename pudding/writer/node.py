@@ -1,13 +1,19 @@
 """Node class for caching generated output."""
 
-from itertools import chain
 import re
+from itertools import chain, count
 from typing import Self
 
+from ..reader.span import Text
+
 
 class Node:
-    """Class representing a node."""
+    """Class representing a node.
+
+    :var index: Number increasing with every created node, giving the creation order.
+    """
 
+    _counter = count()
     attribute_re = re.compile(r"([?&]([\w\-\_]+)=\"((?:\\\"|[^\"])+)\")")
     node_re = re.compile(
         r"(([./]?)([\w\-\_ ]+)((?:[?&][\w\-\_]+=\"(?:\\\"|[^\"])+\")*))"
@@ -17,7 +23,7 @@ class Node:
         self,
         name: str,
         attributes: dict[str, str] | None = None,
-        text: str | None = None,
+        text: Text | None = None,
     ) -> None:
         """Init for Node class.
 
@@ -32,6 +38,7 @@ class Node:
         self.children: dict[str, list[Self]] = {}
         self.text = text
         self.parent: Self | None = None
+        self.index = next(self._counter)
 
     def __eq__(self, other: object) -> bool:
         """Compare Node object to other object.
@@ -50,7 +57,7 @@ class Node:
         return f"<Node name={repr(self.name)} {self.attribs} children={self.children}>"
 
     @classmethod
-    def from_path(cls, path: str, text: str | None = None) -> Self:
+    def from_path(cls, path: str, text: Text | None = None) -> Self:
         """Parse node object from path.
 
         :param path: Node path of the object.
@@ -97,7 +104,7 @@ class Node:
                 groups = match.groups("")[:4]
                 if len(groups) == 4:  # needed for typing
                     matches.append(groups)
-                path = path[len(match.group(0)):]
+                path = path[len(match.group(0)) :]
                 match = cls.node_re.match(path)
             if matches:
                 return matches
@@ -111,7 +118,7 @@ class Node:
             attributes += f'{k}="{v}"&'
         return f"{self.name}{attributes[:-1]}"
 
-    def add_child(self, node_path: str, text: str | None = None) -> Self:
+    def add_child(self, node_path: str, text: Text | None = None) -> Self:
         """Create a child node of this node.
 
         :param node_path: Path of the node to add.
@@ -164,6 +171,36 @@ class Node:
         """
         return self.attribs.get(name, default)
 
+    def to_record(self) -> dict[str, str]:
+        """Flatten this node to a flat mapping of relative paths to values.
+
+        Attributes are stored as "@name", the text of this node as "#text", the text
+        of children as "child" and their attributes as "child/@name". Only the first
+        child with the same name is used.
+
+        :returns: The flattened node.
+        """
+        record: dict[str, str] = {}
+        for k, v in self.attribs.items():
+            record[f"@{k}"] = v
+        if self.text is not None:
+            record["#text"] = str(self.text)
+        stack = [(child, child.name) for child in reversed(self.get_children())]
+        while stack:
+            node, path = stack.pop()
+            if node.text is not None:
+                record.setdefault(path, str(node.text))
+            for k, v in node.attribs.items():
+                record.setdefault(f"{path}/@{k}", v)
+            for child in reversed(node.get_children()):
+                stack.append((child, f"{path}/{child.name}"))
+        return record
+
+    def get_children(self) -> list[Self]:
+        """Return a list of children in the order they were created."""
+        childs = chain(*self.children.values())
+        return sorted(childs, key=lambda x: x.index)
+
     def get_sorted_children(self) -> list[Self]:
         """Return a list of children sorted by name."""
         childs = chain(*self.children.values())
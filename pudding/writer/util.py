@@ -1,21 +1,52 @@
 """Utility functions for writer package."""
 
-from .writers.json import Json
-from .writers.writer import Writer
-from .writers.xml import SliXml, Xml
+from .writers.json import Json, NdJson, SliJson
+from .writers.sqlite import Sqlite
+from .writers.table import Csv, Tsv
+from .writers.writer import BufferedWriter, StreamingWriter, Writer
+from .writers.xml import IncXml, SliXml, Xml
 from .writers.yaml import Yaml
 
 
 def get_writer_from_format(output_format: str) -> type[Writer]:
     """Return writer class for a output format."""
     match output_format:
+        case "csv":
+            return Csv
+        case "incxml":
+            return IncXml
         case "slixml":
             return SliXml
         case "json":
             return Json
+        case "ndjson":
+            return NdJson
+        case "slijson":
+            return SliJson
+        case "sqlite":
+            return Sqlite
+        case "tsv":
+            return Tsv
         case "xml":
             return Xml
         case "yaml":
             return Yaml
         case _:
             raise ValueError(f"Unsupported output format {output_format}")
+
+
+def get_shareable_writer(output_format: str) -> type[BufferedWriter]:
+    """Return writer class for a output format which can share its node tree.
+
+    :param output_format: The output format.
+    :returns: The writer class.
+    :raises ValueError: If the writer does not keep the whole node tree.
+    """
+    writer_cls = get_writer_from_format(output_format)
+    if not issubclass(writer_cls, BufferedWriter) or issubclass(
+        writer_cls, (SliXml, StreamingWriter)
+    ):
+        raise ValueError(
+            f"Output format {output_format} can not be combined with other formats"
+        )
+    return writer_cls
@@ -0,0 +1,193 @@
+"""Module defining event writer class."""
+
+from collections.abc import Callable
+from enum import Enum
+from pathlib import Path
+from typing import NamedTuple
+
+from ...reader.span import Text
+from ..node import Node
+from .writer import StreamingWriter, Writer
+
+
+class EventType(Enum):
+    """Types of events emitted by the EventWriter."""
+
+    START = "start"
+    TEXT = "text"
+    ATTRIBUTE = "attribute"
+    END = "end"
+
+
+class Event(NamedTuple):
+    """Event emitted by the EventWriter.
+
+    :var type: Type of the event.
+    :var name: Name of the element or attribute.
+    :var value: Text of a text event or value of an attribute event.
+    :var attributes: Attributes of the element of a start event.
+    :var path: Path of the element of an attribute event relative to the current
+        element.
+    """
+
+    type: EventType
+    name: str
+    value: str | None = None
+    attributes: dict[str, str] | None = None
+    path: str = "."
+
+
+type EventHandler = Callable[[Event], None]
+
+
+class EventWriter(Writer):
+    """Writer class passing every operation as events to a handler.
+
+    No tree is built, so only the names of the entered elements are kept. Every
+    operation emits start events for all elements in its path, a text event for the
+    value and end events for the elements which are not entered. Therefore elements
+    are never merged with already emitted elements and they can not be modified or
+    deleted afterwards. Attributes are emitted with their path, because the element
+    may already have children.
+    """
+
+    def __init__(self, handler: EventHandler, *, root_name: str = "root") -> None:
+        """Init for EventWriter class.
+
+        :param handler: Function called with every event.
+        :param root_name: Name of the root element, if it exists.
+        """
+        super().__init__(Path(), root_name=root_name)
+        self.handler = handler
+        self.entered: list[list[str]] = []
+
+    def _current_name(self) -> str:
+        """Return the name of the current element or the root name."""
+        for names in reversed(self.entered):
+            if names:
+                return names[-1]
+        return self.root_name
+
+    def _start_path(self, path: str, value: Text | None) -> list[str]:
+        """Emit the start events of a path and the text event of the value.
+
+        :param path: Path of the element.
+        :param value: Value of the element or None if it has no value.
+        :returns: The names of the started elements.
+        """
+        names: list[str] = []
+        if path.strip("./"):
+            for node_path, _, _, _ in Node.split_path(path):
+                name, attributes = Node.parse_node_path(node_path)
+                self.handler(Event(EventType.START, name, attributes=attributes))
+                names.append(name)
+        if value is not None:
+            name = names[-1] if names else self._current_name()
+            self.handler(Event(EventType.TEXT, name, str(value)))
+        return names
+
+    def _end_path(self, names: list[str]) -> None:
+        """Emit the end events of a path.
+
+        :param names: The names of the started elements.
+        """
+        for name in reversed(names):
+            self.handler(Event(EventType.END, name))
+
+    def add_attribute(self, path: str, name: str, value: str) -> None:
+        """Emit an attribute event.
+
+        :param path: Path of the element.
+        :param name: Name of the attribute.
+        :param value: Value of the attribute.
+        """
+        self.handler(Event(EventType.ATTRIBUTE, name, value, path=path))
+
+    def create_element(self, path: str, value: Text | None = None) -> None:
+        """Emit the events of an element.
+
+        :param path: Path of the element.
+        :param value: Value of the element or None if it has no value.
+        """
+        self._end_path(self._start_path(path, value))
+
+    def add_element(self, path: str, value: Text | None = None) -> None:
+        """Emit the events of an element.
+
+        :param path: Path to the element.
+        :param value: Value of the element or None if it has no value.
+        """
+        self._end_path(self._start_path(path, value))
+
+    def enter_path(self, path: str, value: Text | None = None) -> None:
+        """Emit the start events of a path.
+
+        :param path: Path to the element.
+        :param value: Value of the element or None if it has no value.
+        """
+        self.entered.append(self._start_path(path, value))
+
+    def open_path(self, path: str, value: Text | None = None) -> None:
+        """Emit the start events of a path.
+
+        :param path: Path to the element.
+        :param value: Value of the element or None if it has no value.
+        """
+        self.entered.append(self._start_path(path, value))
+
+    def leave_paths(self, amount: int = 1) -> None:
+        """Emit the end events of the previously entered paths.
+
+        :param amount: Number of paths to leave.
+        """
+        for _ in range(amount):
+            self._end_path(self.entered.pop())
+
+    def delete_element(self, path: str) -> None:
+        """Delete an element.
+
+        :param path: Path of the element.
+        :raises ValueError: Because emitted elements can not be deleted.
+        """
+        raise ValueError(f"Can not delete already emitted element {repr(path)}.")
+
+    def replace_element(self, path: str, value: Text | None = None) -> None:
+        """Replace an element.
+
+        :param path: Path of the element.
+        :param value: Value of the replaced element or None if it has no value.
+        :raises ValueError: Because emitted elements can not be replaced.
+        """
+        raise ValueError(f"Can not replace already emitted element {repr(path)}.")
+
+    def write_output(self) -> None:
+        """Emit the end events of all entered paths."""
+        self.leave_paths(len(self.entered))
+
+
+class CallbackWriter(StreamingWriter):
+    """Writer class passing completed top-level nodes to a handler.
+
+    The nodes are removed from the tree before they are passed to the handler.
+    """
+
+    def __init__(
+        self, handler: Callable[[Node], None], *, root_name: str = "root"
+    ) -> None:
+        """Init for CallbackWriter class.
+
+        :param handler: Function called with every completed top-level node.
+        :param root_name: Name of the root element, if it exists.
+        """
+        super().__init__(Path(), root_name=root_name)
+        self.handler = handler
+
+    def flush_node(self, node: Node) -> None:
+        """Pass a completed top-level node to the handler.
+
+        :param node: The completed node.
+        """
+        self.handler(node)
+
+    def close(self) -> None:
+        """Do nothing, as there is no output to finish."""
@@ -1,13 +1,24 @@
 """Module defining json writer class."""
 
 import json
+from pathlib import Path
 
-from .writer import BufferedWriter
 from ..node import Node
+from .writer import BufferedWriter, SpillFile, StreamingWriter
 
 type JsonType = dict[str, JsonType | list[JsonType] | str]
 
 
+def _dumps(value: JsonType, level: int) -> str:
+    """Dump a json type object indented by the given level.
+
+    :param value: The JsonType object.
+    :param level: Indentation level of the object.
+    :returns: The json string.
+    """
+    return json.dumps(value, indent=4).replace("\n", f"\n{'    ' * level}")
+
+
 def _to_json(node: Node) -> JsonType:
     """Create a json type objects from node.
 
@@ -18,7 +29,7 @@ def _to_json(node: Node) -> JsonType:
     for k, v in node.attribs.items():
         elem[f"@{k}"] = v
     if node.text is not None:
-        elem["#text"] = node.text
+        elem["#text"] = str(node.text)
     for child in node.get_sorted_children():
         existing = elem.get(child.name)
         if isinstance(existing, str):
@@ -50,9 +61,153 @@ class Json(BufferedWriter):
         parent[node.name] = existing
         return parent
 
-    def generate_output(self) -> str:
-        """Generate output in specified format."""
+    def to_dict(self) -> JsonType:
+        """Convert the tree to python objects in the layout of the json output."""
         base: JsonType = {}
         for child in self.root.get_sorted_children():
             base = self.serialize_node(child, base)
-        return json.dumps(base, indent=4)
+        return base
+
+    def generate_output(self) -> str:
+        """Generate output in specified format."""
+        return json.dumps(self.to_dict(), indent=4)
+
+
+class SliJson(StreamingWriter):
+    """Writer class for slim json output.
+
+    Top-level nodes are written as soon as all entered paths have been left. Nodes
+    with the name of the first top-level node are written to the file directly,
+    nodes with other names to a single spill file, which is copied to the file
+    grouped by name when the writer is closed. Like in the json output, top-level
+    nodes with the same name are merged into a list and the names are sorted, so
+    only a name sorting before the first one requires copying the file once.
+    """
+
+    def __init__(
+        self, file_path: Path, *, encoding: str = "utf-8", root_name: str = "root"
+    ) -> None:
+        """Init for SliJson class."""
+        super().__init__(file_path, encoding=encoding, root_name=root_name)
+        self.file = self.open_text()
+        self.counts: dict[str, int] = {}
+        self.first: str | None = None
+        self.first_value: JsonType | None = None
+        self.start = 0
+
+    def flush_node(self, node: Node) -> None:
+        """Write a top-level node.
+
+        The first node of the first name is buffered until the next one is flushed,
+        because the value is converted to a list if there are more nodes with the
+        name. Nodes of other names are written to the spill file as list items.
+
+        :param node: The node to write.
+        """
+        value = _to_json(node)
+        count = self.counts.get(node.name, 0)
+        self.counts[node.name] = count + 1
+        if self.first is None:
+            self.first = node.name
+        if node.name != self.first:
+            if self.spill is None:
+                self.spill = SpillFile()
+            item = f",\n        {_dumps(value, 2)}" if count else _dumps(value, 2)
+            self.spill.write(node.name, item.encode(self.encoding))
+            return
+        if count == 0:
+            self.first_value = value
+            return
+        if self.first_value is not None:
+            assert self.counter is not None
+            self.file.write("{")
+            self.start = self.counter.bytes_written
+            self.file.write(f"\n    {json.dumps(node.name)}: [\n        ")
+            self.file.write(_dumps(self.first_value, 2))
+            self.first_value = None
+        self.file.write(f",\n        {_dumps(value, 2)}")
+
+    def _write_entry(self, name: str) -> None:
+        """Write a top-level name and its values from the spill file.
+
+        :param name: The top-level name.
+        """
+        self.file.write(f"\n    {json.dumps(name)}: ")
+        if name == self.first and self.first_value is not None:
+            self.file.write(_dumps(self.first_value, 1))
+            return
+        assert self.spill is not None
+        if self.counts[name] == 1:
+            item = self.spill.read(name).decode(self.encoding)
+            self.file.write(item.replace("\n        ", "\n    "))
+            return
+        self.file.write("[\n        ")
+        self.spill.copy(name, self.file.buffer)
+        self.file.write("\n    ]")
+
+    def _write_entries(self, names: list[str]) -> None:
+        """Write top-level names separated by commas.
+
+        :param names: The top-level names.
+        """
+        for index, name in enumerate(names):
+            if index:
+                self.file.write(",")
+            self._write_entry(name)
+
+    def close(self) -> None:
+        """Write the spilled values and the end of the json object."""
+        if self.first is None:
+            self.file.write("{}")
+            self.file.close()
+            return
+        names = sorted(self.counts)
+        if self.first_value is not None:
+            self.file.write("{")
+            self._write_entries(names)
+        else:
+            self.file.write("\n    ]")
+            index = names.index(self.first)
+            if index:
+
+                def prepend() -> None:
+                    """Write the names sorting before the first one."""
+                    self._write_entries(names[:index])
+                    self.file.write(",")
+
+                self.insert(self.start, prepend)
+            for name in names[index + 1 :]:
+                self.file.write(",")
+                self._write_entry(name)
+        self.file.write("\n}")
+        self.file.close()
+        if self.spill is not None:
+            self.spill.close()
+            self.spill = None
+
+
+class NdJson(StreamingWriter):
+    """Writer class for newline delimited json output.
+
+    Every top-level node is written as a compact json object on its own line as
+    soon as all entered paths have been left.
+    """
+
+    def __init__(
+        self, file_path: Path, *, encoding: str = "utf-8", root_name: str = "root"
+    ) -> None:
+        """Init for NdJson class."""
+        super().__init__(file_path, encoding=encoding, root_name=root_name)
+        self.file = self.open_text()
+
+    def flush_node(self, node: Node) -> None:
+        """Write a top-level node as a single line.
+
+        :param node: The node to write.
+        """
+        line = json.dumps({node.name: _to_json(node)}, separators=(",", ":"))
+        self.file.write(f"{line}\n")
+
+    def close(self) -> None:
+        """Close the file."""
+        self.file.close()
@@ -0,0 +1,134 @@
+"""Module defining sharded writer class."""
+
+import zlib
+from pathlib import Path
+from typing import Any
+
+from ..node import Node
+from ..util import get_writer_from_format
+from .writer import StreamingWriter
+
+
+class ShardedWriter(StreamingWriter):
+    """Writer class splitting the top-level nodes into multiple files.
+
+    Every shard is written by its own streaming writer, so each file is a complete
+    document of the output format. The shards are named like the output file with
+    their index before the suffix, e.g. "output.00000.xml".
+
+    A new shard is started after a number of top-level nodes or when the file
+    reached a size, whatever comes first. The size is counted from the bytes the
+    shard writer passed to its file, so it is only approximate if the writer
+    buffers content itself, like lxml for xml output. Alternatively
+    the nodes are distributed to a fixed number of shards by the crc32 hash of an
+    attribute, so nodes with the same attribute value end up in the same shard.
+
+    :var shard_paths: Paths of the created shards.
+    """
+
+    def __init__(
+        self,
+        file_path: Path,
+        *,
+        encoding: str = "utf-8",
+        root_name: str = "root",
+        output_format: str = "incxml",
+        records: int | None = None,
+        size: int | None = None,
+        shards: int | None = None,
+        key: str | None = None,
+        writer_options: dict[str, Any] | None = None,
+    ) -> None:
+        """Init for ShardedWriter class.
+
+        :param output_format: Streaming output format of the shards.
+        :param records: Maximum number of top-level nodes per shard.
+        :param size: Size in bytes after which a new shard is started.
+        :param shards: Number of shards to distribute the nodes to by `key`.
+        :param key: Name of the attribute whose hash selects the shard.
+        :param writer_options: Additional keyword arguments for the shard writers.
+        :raises ValueError: If the format is not streamed or the options conflict.
+        """
+        super().__init__(file_path, encoding=encoding, root_name=root_name)
+        writer_cls = get_writer_from_format(output_format)
+        if not issubclass(writer_cls, StreamingWriter):
+            raise ValueError(f"Output format {output_format} can not be sharded")
+        if shards is not None and (key is None or records or size):
+            raise ValueError("Shards by hash need a key and no record or size limit")
+        if shards is None and records is None and size is None:
+            raise ValueError("Missing number of records, size or shards")
+        self.writer_cls = writer_cls
+        self.records = records
+        self.size = size
+        self.shards = shards
+        self.key = key
+        self.writer_options = writer_options or {}
+        self.writers: dict[int, StreamingWriter] = {}
+        self.shard_paths: list[Path] = []
+        self.current = 0
+        self.current_records = 0
+
+    def get_shard_path(self, index: int) -> Path:
+        """Return the path of a shard.
+
+        :param index: Index of the shard.
+        :returns: The path of the shard file.
+        """
+        path = self.file_path
+        return path.with_name(f"{path.stem}.{index:05d}{path.suffix}")
+
+    def _get_writer(self, index: int) -> StreamingWriter:
+        """Return the writer of a shard and create it if necessary.
+
+        :param index: Index of the shard.
+        :returns: The shard writer.
+        """
+        writer = self.writers.get(index)
+        if writer is None:
+            path = self.get_shard_path(index)
+            writer = self.writer_cls(
+                path, encoding=self.encoding, **self.writer_options
+            )
+            self.writers[index] = writer
+            self.shard_paths.append(path)
+        return writer
+
+    def _get_size(self, writer: StreamingWriter) -> int:
+        """Return the size of the output of a shard writer.
+
+        :param writer: The shard writer.
+        :returns: The number of written bytes or the file size if it is not counted.
+        """
+        size = writer.bytes_written
+        if size is None:
+            return writer.file_path.stat().st_size
+        return size
+
+    def flush_node(self, node: Node) -> None:
+        """Write a top-level node to its shard.
+
+        :param node: The node to write.
+        """
+        if self.shards is not None:
+            value = node.get(str(self.key)) or ""
+            index = zlib.crc32(value.encode(self.encoding)) % self.shards
+            self._get_writer(index).flush_node(node)
+            return
+        writer = self._get_writer(self.current)
+        writer.flush_node(node)
+        self.current_records += 1
+        if (self.records and self.current_records >= self.records) or (
+            self.size and self._get_size(writer) >= self.size
+        ):
+            writer.close()
+            del self.writers[self.current]
+            self.current += 1
+            self.current_records = 0
+
+    def close(self) -> None:
+        """Finish all open shards."""
+        if not self.writers and self.shards is None and self.current == 0:
+            self._get_writer(0)
+        for writer in self.writers.values():
+            writer.close()
+        self.writers = {}
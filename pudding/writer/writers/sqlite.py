@@ -0,0 +1,167 @@
+"""Module defining sqlite writer class."""
+
+import sqlite3
+from pathlib import Path
+
+from ..node import Node
+from .writer import RecordWriter
+
+ROW_ID = "_rowid"
+
+
+def _quote(name: str) -> str:
+    """Quote an sql identifier.
+
+    :param name: The identifier.
+    :returns: The quoted identifier.
+    """
+    return '"{}"'.format(name.replace('"', '""'))
+
+
+class Sqlite(RecordWriter):
+    """Writer class for sqlite database output.
+
+    If a record path is given, the records are inserted as rows into a table named
+    like the record nodes, which has an integer primary key named "_rowid". The
+    columns are the keys of the flattened records (see `Node.to_record`) and are
+    added to the table when they first appear. Like in sqlite, column names are
+    case-insensitive, so keys only differing in case share a column. Otherwise all
+    nodes are inserted into a generic schema::
+
+        nodes(id, parent, name, text)
+        attributes(node, name, value)
+
+    Rows are inserted in batches in a single transaction, which is committed when
+    the output is finished.
+
+    :var batch_size: Number of rows inserted at once.
+    """
+
+    def __init__(
+        self,
+        file_path: Path,
+        *,
+        encoding: str = "utf-8",
+        root_name: str = "root",
+        record_path: str | None = None,
+        batch_size: int = 1000,
+    ) -> None:
+        """Init for Sqlite class.
+
+        An existing database at the file path is replaced.
+
+        :param batch_size: Number of rows inserted at once.
+        """
+        super().__init__(
+            file_path, encoding=encoding, root_name=root_name, record_path=record_path
+        )
+        self.batch_size = batch_size
+        self.table = self.record_path[-1] if self.record_path else None
+        self.columns: list[str] = []
+        self.column_names: dict[str, str] = {}
+        self.rows: list[dict[str, str]] = []
+        self.nodes: list[tuple[int, int | None, str, str | None]] = []
+        self.attributes: list[tuple[int, str, str]] = []
+        self.next_id = 1
+        for suffix in ("", "-wal", "-shm"):
+            Path(f"{file_path}{suffix}").unlink(missing_ok=True)
+        self.connection = sqlite3.connect(file_path, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        if self.table is None:
+            self.connection.execute(
+                "CREATE TABLE nodes (id INTEGER PRIMARY KEY, parent INTEGER, "
+                "name TEXT NOT NULL, text TEXT)"
+            )
+            self.connection.execute(
+                "CREATE TABLE attributes (node INTEGER NOT NULL, name TEXT NOT NULL, "
+                "value TEXT)"
+            )
+        else:
+            self.connection.execute(
+                f"CREATE TABLE {_quote(self.table)} ({ROW_ID} INTEGER PRIMARY KEY)"
+            )
+        self.connection.execute("BEGIN")
+
+    def _to_row(self, record: dict[str, str]) -> dict[str, str]:
+        """Map the keys of a record to columns and add missing columns to the table.
+
+        :param record: The flattened record.
+        :returns: The values by column name.
+        :raises ValueError: If a key is the name of the primary key.
+        """
+        row: dict[str, str] = {}
+        for key, value in record.items():
+            folded = key.casefold()
+            column = self.column_names.get(folded)
+            if column is None:
+                if folded == ROW_ID:
+                    raise ValueError(f"Column name {repr(key)} is reserved")
+                table = _quote(str(self.table))
+                self.connection.execute(
+                    f"ALTER TABLE {table} ADD COLUMN {_quote(key)} TEXT"
+                )
+                column = self.column_names[folded] = key
+                self.columns.append(column)
+            row.setdefault(column, value)
+        return row
+
+    def _insert_rows(self) -> None:
+        """Insert the buffered rows."""
+        if self.rows:
+            table = _quote(str(self.table))
+            if not self.columns:
+                for _ in self.rows:
+                    self.connection.execute(f"INSERT INTO {table} DEFAULT VALUES")
+            else:
+                columns = ", ".join(_quote(col) for col in self.columns)
+                values = ", ".join("?" * len(self.columns))
+                self.connection.executemany(
+                    f"INSERT INTO {table} ({columns}) VALUES ({values})",
+                    ([row.get(col) for col in self.columns] for row in self.rows),
+                )
+            self.rows = []
+        if self.nodes:
+            self.connection.executemany(
+                "INSERT INTO nodes VALUES (?, ?, ?, ?)", self.nodes
+            )
+            self.nodes = []
+        if self.attributes:
+            self.connection.executemany(
+                "INSERT INTO attributes VALUES (?, ?, ?)", self.attributes
+            )
+            self.attributes = []
+
+    def _add_nodes(self, node: Node) -> None:
+        """Add a node and its descendants to the generic schema.
+
+        :param node: The top-level node.
+        """
+        stack: list[tuple[Node, int | None]] = [(node, None)]
+        while stack:
+            elem, parent = stack.pop()
+            node_id = self.next_id
+            self.next_id += 1
+            text = None if elem.text is None else str(elem.text)
+            self.nodes.append((node_id, parent, elem.name, text))
+            for name, value in elem.attribs.items():
+                self.attributes.append((node_id, name, value))
+            for child in reversed(elem.get_children()):
+                stack.append((child, node_id))
+
+    def write_record(self, record: Node) -> None:
+        """Add a record to the current batch.
+
+        :param record: The record node.
+        """
+        if self.table is None:
+            self._add_nodes(record)
+        else:
+            self.rows.append(self._to_row(record.to_record()))
+        if len(self.rows) + len(self.nodes) >= self.batch_size:
+            self._insert_rows()
+
+    def close(self) -> None:
+        """Insert the remaining rows, commit and close the database."""
+        self._insert_rows()
+        self.connection.execute("COMMIT")
+        self.connection.close()
@@ -0,0 +1,109 @@
+"""Module defining tabular writer classes."""
+
+import csv
+import logging
+from pathlib import Path
+
+from ..node import Node
+from .writer import RecordWriter
+
+logger = logging.getLogger(__name__)
+
+
+class Csv(RecordWriter):
+    """Writer class for csv output.
+
+    Every node at the record path is written as a row as soon as its top-level node
+    is completed. The values of a row are looked up in the flattened record (see
+    `Node.to_record`) by the column paths, e.g. "@id", "#text", "name" or
+    "name/@lang". If no columns are given, they are inferred from the first records.
+    Values of later records in other columns are dropped and a warning is logged
+    for the first such record.
+
+    :var dialect: The csv dialect used for writing.
+    """
+
+    dialect = "excel"
+
+    def __init__(
+        self,
+        file_path: Path,
+        *,
+        encoding: str = "utf-8",
+        root_name: str = "root",
+        record_path: str | None = None,
+        columns: list[str] | None = None,
+        infer_records: int = 100,
+    ) -> None:
+        """Init for Csv class.
+
+        :param columns: Column paths relative to a record.
+        :param infer_records: Number of records to buffer for inferring the columns,
+            if no columns are given.
+        """
+        super().__init__(
+            file_path, encoding=encoding, root_name=root_name, record_path=record_path
+        )
+        self.columns = columns
+        self.infer_records = infer_records
+        self.pending: list[dict[str, str]] = []
+        self.inferred = False
+        self.warned = False
+        self.file = self.open_text(newline="")
+        self.csv_writer = csv.writer(self.file, dialect=self.dialect)
+        if columns is not None:
+            self.csv_writer.writerow(columns)
+
+    def _write_pending(self) -> None:
+        """Infer the columns from the pending records and write them."""
+        columns: dict[str, None] = {}
+        for record in self.pending:
+            columns.update(dict.fromkeys(record))
+        self.columns = list(columns)
+        self.inferred = True
+        self.csv_writer.writerow(self.columns)
+        for record in self.pending:
+            self._write_record(record)
+        self.pending = []
+
+    def _write_record(self, record: dict[str, str]) -> None:
+        """Write the columns of a record as a row.
+
+        :param record: The flattened record.
+        """
+        if self.columns is None:
+            self.pending.append(record)
+            if len(self.pending) >= self.infer_records:
+                self._write_pending()
+            return
+        if self.inferred and not self.warned:
+            extra = record.keys() - set(self.columns)
+            if extra:
+                self.warned = True
+                logger.warning(
+                    "Dropping columns %s of a record in %s, which were not in the "
+                    "first %d records. Use the columns option to write them.",
+                    ", ".join(sorted(extra)),
+                    self.file_path,
+                    self.infer_records,
+                )
+        self.csv_writer.writerow([record.get(col, "") for col in self.columns])
+
+    def write_record(self, record: Node) -> None:
+        """Write a record as a row.
+
+        :param record: The record node.
+        """
+        self._write_record(record.to_record())
+
+    def close(self) -> None:
+        """Write the pending records and close the file."""
+        if self.pending:
+            self._write_pending()
+        self.file.close()
+
+
+class Tsv(Csv):
+    """Writer class for tab separated output."""
+
+    dialect = "excel-tab"
@@ -1,8 +1,13 @@
 """Module defining base writer class."""
 
+import io
+import shutil
+import tempfile
+from collections.abc import Callable
 from pathlib import Path
-from typing import Any
+from typing import IO, Any, BinaryIO, TextIO, cast
 
+from ...reader.span import Text
 from ..node import Node
 
 
@@ -35,7 +40,7 @@ class Writer:
         """
         raise NotImplementedError
 
-    def create_element(self, path: str, value: str | None = None) -> Any:
+    def create_element(self, path: str, value: Text | None = None) -> Any:
         """Add an element to the current node.
 
         :param path: Path of the element.
@@ -44,7 +49,7 @@ class Writer:
         """
         raise NotImplementedError
 
-    def add_element(self, path: str, value: str | None = None) -> Any:
+    def add_element(self, path: str, value: Text | None = None) -> Any:
         """Add an element if it not already exists.
 
         Otherwise it appends the string to the already existing element.
@@ -55,7 +60,7 @@ class Writer:
         """
         raise NotImplementedError
 
-    def enter_path(self, path: str, value: str | None = None) -> None:
+    def enter_path(self, path: str, value: Text | None = None) -> None:
         """Enter a node and create elements in the path if they do not already exist.
 
         :param path: Path to the element.
@@ -63,7 +68,7 @@ class Writer:
         """
         raise NotImplementedError
 
-    def open_path(self, path: str, value: str | None = None) -> None:
+    def open_path(self, path: str, value: Text | None = None) -> None:
         """Enter a node and create elements in the path if they do not already exist.
 
         Always creates the last node.
@@ -87,7 +92,7 @@ class Writer:
         """
         raise NotImplementedError
 
-    def replace_element(self, path: str, value: str | None = None) -> None:
+    def replace_element(self, path: str, value: Text | None = None) -> None:
         """Replace an element.
 
         :param path: Path of the element.
@@ -113,6 +118,7 @@ class BufferedWriter(Writer):
 
     :var attrib_re: Regex for node attributes.
     :var node_re: Regex for a node path.
+    :var node_count: Number of nodes created by this writer.
     """
 
     def __init__(
@@ -127,6 +133,18 @@ class BufferedWriter(Writer):
         super().__init__(file_path, encoding=encoding, root_name=root_name)
         self.prev_roots: list[Node] = []
         self.root = Node(root_name)
+        self.node_count = 0
+
+    def _add_child(self, parent: Node, path: str, value: Text | None = None) -> Node:
+        """Create a child node.
+
+        :param parent: Node to add the child to.
+        :param path: Path of the child node.
+        :param value: Value of the element or None if it has no value.
+        :returns: The created node.
+        """
+        self.node_count += 1
+        return parent.add_child(path, value)
 
     def _get_element(self, path: str) -> Node:
         """Get first Node at given path.
@@ -158,7 +176,7 @@ class BufferedWriter(Writer):
             if elem is not None:
                 target = elem
             else:
-                target = target.add_child(node_path)
+                target = self._add_child(target, node_path)
         return target
 
     def add_attribute(self, path: str, name: str, value: str) -> None:
@@ -170,7 +188,7 @@ class BufferedWriter(Writer):
         """
         self._get_element(path).set(name, value)
 
-    def create_element(self, path: str, value: str | None = None) -> Node:
+    def create_element(self, path: str, value: Text | None = None) -> Node:
         """Add an element and always create the last element in the path.
 
         :param path: Path of the element.
@@ -194,9 +212,9 @@ class BufferedWriter(Writer):
                 parent_path = "".join((path[0] for path in parent_paths))
                 parent = self._get_or_create_element(parent_path, self.root)
                 child_node = child_path[0]
-        return parent.add_child(child_node, value)
+        return self._add_child(parent, child_node, value)
 
-    def add_element(self, path: str, value: str | None = None) -> Node:
+    def add_element(self, path: str, value: Text | None = None) -> Node:
         """Add an element if it not already exists.
 
         Otherwise it appends the string to the already existing element.
@@ -206,12 +224,15 @@ class BufferedWriter(Writer):
         :returns: The added/modified SubElement.
         """
         elem = self._get_or_create_element(path, self.root)
-        text = elem.text or ""
-        if value is not None:
-            elem.text = f"{text}{value}"
+        if value is None:
+            return elem
+        if elem.text:
+            elem.text = f"{elem.text}{value}"
+        else:
+            elem.text = value
         return elem
 
-    def enter_path(self, path: str, value: str | None = None) -> None:
+    def enter_path(self, path: str, value: Text | None = None) -> None:
         """Enter a node and create elements in the path if they do not already exist.
 
         :param path: Path to the element.
@@ -222,7 +243,7 @@ class BufferedWriter(Writer):
         self.prev_roots.append(self.root)
         self.root = elem
 
-    def open_path(self, path: str, value: str | None = None) -> None:
+    def open_path(self, path: str, value: Text | None = None) -> None:
         """Enter a node and create elements in the path if they do not already exist.
 
         Always creates the last node.
@@ -254,7 +275,7 @@ class BufferedWriter(Writer):
             parent.children.get(elem.node_path, []).remove(elem)
         del elem
 
-    def replace_element(self, path: str, value: str | None = None) -> None:
+    def replace_element(self, path: str, value: Text | None = None) -> None:
         """Replace an element.
 
         :param path: Path of the element.
@@ -262,3 +283,252 @@ class BufferedWriter(Writer):
         """
         elem = self._get_element(path)
         elem.text = value
+
+
+class CountingBuffer(io.BufferedWriter):
+    """Buffered binary file counting the bytes written to it.
+
+    :var bytes_written: Number of bytes passed to `write`, including the bytes
+        still in the buffer.
+    """
+
+    def __init__(self, raw: io.RawIOBase, buffer_size: int) -> None:
+        """Init for CountingBuffer class.
+
+        :param raw: The unbuffered file.
+        :param buffer_size: Size of the buffer in bytes.
+        """
+        super().__init__(raw, buffer_size)
+        self.bytes_written = 0
+
+    def write(self, data: Any) -> int:
+        """Write bytes to the buffer and count them."""
+        self.bytes_written += memoryview(data).nbytes
+        return super().write(data)
+
+
+class SpillFile:
+    """Temporary file collecting serialized top-level nodes grouped by name.
+
+    Streaming writers grouping the top-level nodes by name like the buffered output
+    write the nodes of other names than the first one to a single spill file. The
+    ranges of each name are kept, so its nodes can be copied when the writer is
+    closed.
+
+    :var size: Number of bytes written to the file.
+    """
+
+    def __init__(self) -> None:
+        """Init for SpillFile class."""
+        self.file = tempfile.TemporaryFile()
+        self.ranges: dict[str, list[tuple[int, int]]] = {}
+        self.size = 0
+
+    def write(self, name: str, data: bytes) -> None:
+        """Append serialized nodes of a name.
+
+        :param name: The top-level name.
+        :param data: The serialized nodes.
+        """
+        start = self.size
+        self.file.write(data)
+        self.size += len(data)
+        ranges = self.ranges.setdefault(name, [])
+        if ranges and ranges[-1][1] == start:
+            ranges[-1] = (ranges[-1][0], self.size)
+        else:
+            ranges.append((start, self.size))
+
+    def copy(self, name: str, file: IO[bytes]) -> None:
+        """Copy the serialized nodes of a name to a file.
+
+        :param name: The top-level name.
+        :param file: File to write to.
+        """
+        self.file.flush()
+        for start, end in self.ranges.get(name, []):
+            self.file.seek(start)
+            while start < end:
+                chunk = self.file.read(min(end - start, io.DEFAULT_BUFFER_SIZE * 16))
+                file.write(chunk)
+                start += len(chunk)
+        self.file.seek(0, io.SEEK_END)
+
+    def read(self, name: str) -> bytes:
+        """Return the serialized nodes of a name.
+
+        :param name: The top-level name.
+        :returns: The serialized nodes.
+        """
+        buffer = io.BytesIO()
+        self.copy(name, buffer)
+        return buffer.getvalue()
+
+    def close(self) -> None:
+        """Close and delete the file."""
+        self.file.close()
+
+
+class StreamingWriter(BufferedWriter):
+    """Base writer class for output streamed by top-level nodes.
+
+    Nodes are buffered like in the BufferedWriter, but as soon as all entered paths
+    have been left, the children of the root node are passed to `flush_node` and
+    removed from the tree. Therefore nodes can only be modified until they are
+    flushed, which is sufficient for syntaxes only changing the current subtree.
+    """
+
+    counter: CountingBuffer | None = None
+    spill: SpillFile | None = None
+
+    def open_binary(self, buffer_size: int = io.DEFAULT_BUFFER_SIZE) -> BinaryIO:
+        """Open the output file for writing bytes and count the written bytes.
+
+        :param buffer_size: Size of the file buffer in bytes.
+        :returns: The opened file.
+        """
+        self.counter = CountingBuffer(io.FileIO(self.file_path, "w"), buffer_size)
+        return cast(BinaryIO, self.counter)
+
+    def open_text(self, newline: str | None = None) -> TextIO:
+        """Open the output file for writing text and count the written bytes.
+
+        :param newline: How newlines are translated, see `open`.
+        :returns: The opened file.
+        """
+        return io.TextIOWrapper(
+            self.open_binary(),
+            encoding=self.encoding,
+            newline=newline,
+            write_through=True,
+        )
+
+    @property
+    def bytes_written(self) -> int | None:
+        """Number of bytes written to the output file or None if not counted.
+
+        Nodes in the spill file are included, as they are copied to the output file
+        when closing. Content buffered by the writer itself, e.g. by lxml, is not.
+        """
+        if self.counter is None:
+            return None
+        spilled = 0 if self.spill is None else self.spill.size
+        return self.counter.bytes_written + spilled
+
+    def insert(self, start: int, write: Callable[[], None]) -> None:
+        """Insert content into the output file opened by `open_binary`.
+
+        The file is copied from the start position to a temporary file, which is
+        appended again after the inserted content.
+
+        :param start: Position to insert the content at.
+        :param write: Function writing the content to the end of the file.
+        """
+        assert self.counter is not None
+        self.counter.flush()
+        with tempfile.TemporaryFile() as tail:
+            with open(self.file_path, "rb") as f:
+                f.seek(start)
+                shutil.copyfileobj(f, tail)
+            self.counter.seek(start)
+            self.counter.truncate()
+            self.counter.bytes_written = start
+            write()
+            tail.seek(0)
+            shutil.copyfileobj(tail, self.counter)
+
+    def flush(self) -> None:
+        """Flush all children of the root node sorted by name."""
+        children = self.root.get_sorted_children()
+        self.root.children = {}
+        for node in children:
+            node.parent = None
+            self.flush_node(node)
+
+    def flush_node(self, node: Node) -> None:
+        """Write a completed top-level node.
+
+        :param node: The node to write.
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Finish the output after the last node has been flushed."""
+        raise NotImplementedError
+
+    def leave_paths(self, amount: int = 1) -> None:
+        """Set the current root object to the previous one.
+
+        Flushes the top-level nodes if the root node has been reached again.
+
+        :param amount: Amount of paths to leave.
+        """
+        super().leave_paths(amount)
+        if amount > 0 and not self.prev_roots:
+            self.flush()
+
+    def write_output(self) -> None:
+        """Flush the remaining nodes and finish the output."""
+        self.leave_paths(len(self.prev_roots))
+        self.flush()
+        self.close()
+
+
+class RecordWriter(StreamingWriter):
+    """Base writer class for output consisting of records.
+
+    Records are the nodes at the record path in the completed top-level nodes.
+    """
+
+    def __init__(
+        self,
+        file_path: Path,
+        *,
+        encoding: str = "utf-8",
+        root_name: str = "root",
+        record_path: str | None = None,
+    ) -> None:
+        """Initialize record writer.
+
+        :param file_path: Path of the output file.
+        :param encoding: Encoding of the output file.
+        :param root_name: Name of the root element, if it exists.
+        :param record_path: Path of the record nodes from the root. Every top-level
+            node is a record if None.
+        """
+        super().__init__(file_path, encoding=encoding, root_name=root_name)
+        self.record_path = (
+            [Node.parse_node_path(p)[0] for p in record_path.strip("/").split("/")]
+            if record_path
+            else []
+        )
+
+    def get_records(self, node: Node) -> list[Node]:
+        """Return the record nodes in a top-level node.
+
+        :param node: The top-level node.
+        :returns: Nodes at the record path.
+        """
+        if not self.record_path:
+            return [node]
+        if node.name != self.record_path[0]:
+            return []
+        nodes = [node]
+        for name in self.record_path[1:]:
+            nodes = [c for n in nodes for c in n.get_children() if c.name == name]
+        return nodes
+
+    def write_record(self, record: Node) -> None:
+        """Write a record.
+
+        :param record: The record node.
+        """
+        raise NotImplementedError
+
+    def flush_node(self, node: Node) -> None:
+        """Write the records of a top-level node.
+
+        :param node: The node to write.
+        """
+        for record in self.get_records(node):
+            self.write_record(record)
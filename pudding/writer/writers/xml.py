@@ -1,56 +1,102 @@
 """Module defining xml writer class."""
 
+from contextlib import ExitStack
 from pathlib import Path
+from typing import cast
 
 from lxml import etree
 
+from ...reader.span import Text
 from ..node import Node
-from .writer import BufferedWriter, Writer
+from .writer import BufferedWriter, SpillFile, StreamingWriter
 
 
-class SliXml(Writer):
-    """Writer class for slim xml output."""
+def _to_element(node: Node, release: bool = False) -> etree._Element:
+    """Convert node object to etree element.
+
+    The nodes are converted in a single non-recursive pass, so the depth of the
+    tree is not limited by the recursion limit.
+
+    :param node: The node to convert.
+    :param release: Remove the children of each converted node, so the node tree
+        is freed while the element tree is built.
+    :returns: The created element.
+    """
+
+    def pop_children(node: Node) -> list[Node]:
+        """Return children in reversed order to push them on the stack."""
+        children = node.get_sorted_children()
+        if release:
+            node.children = {}
+        children.reverse()
+        return children
+
+    root = etree.Element(node.name, node.attribs)
+    if node.text is not None:
+        root.text = str(node.text)
+    stack = [(child, root) for child in pop_children(node)]
+    while stack:
+        node, parent = stack.pop()
+        elem = etree.SubElement(parent, node.name, node.attribs)
+        if node.text is not None:
+            elem.text = str(node.text)
+        stack.extend((child, elem) for child in pop_children(node))
+    return root
+
+
+def _indent(root: etree._Element, level: int = 0) -> None:
+    """Indent an element like the pretty print of libxml2.
+
+    Like libxml2, elements containing text are not indented any further.
+
+    :param root: The element to indent.
+    :param level: Indentation level of the element.
+    """
+    stack = [(root, level)]
+    while stack:
+        elem, level = stack.pop()
+        if elem.text is not None or len(elem) == 0:
+            continue
+        elem.text = f"\n{'  ' * (level + 1)}"
+        for child in elem:
+            child.tail = elem.text
+            stack.append((child, level + 1))
+        elem[-1].tail = f"\n{'  ' * level}"
+
+
+class SliXml(BufferedWriter):
+    """Writer class for slim xml output.
+
+    Nodes are written in the order they were created. Nodes which have not been
+    written yet are kept in a window, where they can still be modified like in the
+    BufferedWriter. The window is written to the file each time the root node is
+    reached again after leaving entered paths, or if it contains more than
+    `window_size` nodes. Modifying a node that was already written raises a
+    ValueError. The paths of the written children of started nodes below the root
+    are kept, so adding to or entering such a path raises a ValueError instead of
+    silently creating a second node. Top-level paths can be entered again after the
+    root has been reached, which creates a new top-level node.
+
+    :var window_size: Maximum number of unwritten nodes.
+    """
+
+    window_size = 10000
 
     def __init__(
         self, file_path: Path, *, encoding: str = "utf-8", root_name: str = "xml"
     ) -> None:
         """Init for SliXml class."""
         super().__init__(file_path, encoding=encoding, root_name=root_name)
-        self.last_single = False
-        self.last_closing = False
-        self.last_indent = 0
-        self.indent = 1
         self.file = open(file_path, "w", encoding=encoding)
-        self.last_node: Node = Node(root_name)
-        self.prev_roots: list[str] = [root_name]
-
-    def _writenode(
-        self, node: Node, single: bool = False, closing: bool = False
-    ) -> None:
-        """Write node to file."""
-        self._writeline(
-            self._to_tag(
-                self.last_node.name,
-                self.last_node.attribs,
-                self.last_node.text,
-                single=self.last_single,
-                closing=self.last_closing,
-            )
-        )
-        self.last_indent = self.indent
-        self.last_node = node
-        self.last_single = single
-        self.last_closing = closing
-
-    def _writeline(self, line: str) -> None:
-        """Write line with indent to output."""
-        self.file.write(f"{'  '*self.last_indent}{line}\n")
+        self.written_count = 0
+        self.started: list[Node] = []
+        self.written_paths: list[set[str]] = []
 
     def _to_tag(
         self,
         name: str,
         attributes: dict[str, str],
-        value: str | None = None,
+        value: Text | None = None,
         single: bool = False,
         closing: bool = False,
     ) -> str:
@@ -59,7 +105,8 @@ class SliXml(Writer):
         :param name: Name of the tag.
         :param attributes: Attributes of the tag.
         :param value: Text of this tag.
-        :param open: If no value is set, this determines if a tag is closed or not.
+        :param single: If no value is set, this determines if a tag is closed or not.
+        :param closing: Create a closing tag.
         :returns str: XML-Tag as a string.
         """
         tag = name.casefold()
@@ -69,98 +116,252 @@ class SliXml(Writer):
             return f"<{xml}>{value}</{tag}>"
         return f"<{'/'*(closing)}{xml}{'/'*(single and not closing)}>"
 
-    def create_element(self, path: str, value: str | None = None) -> None:
-        """Add an element to the current node.
+    def _writeline(self, line: str, level: int) -> None:
+        """Write line with indent to output."""
+        self.file.write(f"{'  '*level}{line}\n")
+
+    def _start_node(self, node: Node, level: int) -> None:
+        """Write the start tag and text of an open node.
+
+        :param node: The node to start.
+        :param level: Indentation level of the node.
+        """
+        text = "" if node.text is None else node.text
+        self._writeline(f"{self._to_tag(node.name, node.attribs)}{text}", level)
+        self.written_count += 1
+        self.started.append(node)
+        self.written_paths.append(set())
+
+    def _write_node(self, root: Node, level: int) -> None:
+        """Write a node including its children.
+
+        :param root: The node to write.
+        :param level: Indentation level of the node.
+        """
+        stack: list[tuple[Node, int, bool]] = [(root, level, False)]
+        while stack:
+            node, level, closing = stack.pop()
+            if closing:
+                self._writeline(self._to_tag(node.name, {}, closing=True), level)
+                continue
+            self.written_count += 1
+            children = node.get_children()
+            if not children:
+                tag = self._to_tag(node.name, node.attribs, node.text, single=True)
+                self._writeline(tag, level)
+                continue
+            text = "" if node.text is None else node.text
+            self._writeline(f"{self._to_tag(node.name, node.attribs)}{text}", level)
+            stack.append((node, level, True))
+            stack.extend((child, level + 1, False) for child in reversed(children))
+
+    def _write_children(self, node: Node, level: int, until: Node | None) -> None:
+        """Write and remove the children of a started node.
+
+        :param node: The started node.
+        :param level: Indentation level of the node.
+        :param until: Open child of the node. Children created before it are written
+            and it is removed from the children, but later children are kept.
+        """
+        children = node.get_children()
+        self.written_paths[level].update(node.children)
+        node.children = {}
+        for i, child in enumerate(children):
+            if child is until:
+                for later in children[i + 1 :]:
+                    node.children.setdefault(later.node_path, []).append(later)
+                return
+            self._write_node(child, level + 1)
+
+    def _get_open_nodes(self) -> list[Node]:
+        """Return the nodes from the root to the current node."""
+        nodes = [self.root]
+        while nodes[-1].parent is not None:
+            nodes.append(nodes[-1].parent)
+        nodes.reverse()
+        return nodes
+
+    def _check_unwritten(self, node: Node, path: str) -> Node:
+        """Check if a node can still be modified.
+
+        :param node: The node to check.
+        :param path: Path of the node.
+        :returns: The given node.
+        :raises ValueError: If the node has already been written.
+        """
+        if any(node is started for started in self.started):
+            raise ValueError(f"Node at path {repr(path)} was already written.")
+        return node
+
+    def _check_not_written(self, path: str) -> None:
+        """Check if a path does not lead to a written node.
+
+        :param path: Path of the node.
+        :raises ValueError: If a node in the path has already been written.
+        """
+        if path == ".":
+            return
+        node = self.root
+        for node_path, _, _, _ in Node.split_path(path):
+            node_path = node_path.lstrip("./")
+            children = node.children.get(node_path)
+            if children:
+                node = children[0]
+                continue
+            for started, written in zip(self.started[1:], self.written_paths[1:]):
+                if started is node and node_path in written:
+                    raise ValueError(f"Node at path {repr(path)} was already written.")
+            return
+
+    def _get_element(self, path: str) -> Node:
+        """Get first unwritten Node at given path.
+
+        :param path: Path from root element.
+        :returns: Node at the given path.
+        :raises ValueError: If no element is found or it was already written.
+        """
+        elem = self.root.find(path)
+        if elem is not None:
+            return self._check_unwritten(elem, path)
+        if self.started:
+            raise ValueError(
+                f"Node at path {repr(path)} does not exist or was already written."
+            )
+        raise ValueError(f"Node at path {repr(path)} does not exist")
+
+    def flush(self) -> None:
+        """Write all unwritten nodes, keeping the nodes after open nodes."""
+        open_nodes = self._get_open_nodes()
+        if not self.started:
+            self._start_node(open_nodes[0], 0)
+        for next_open in open_nodes[len(self.started) :]:
+            level = len(self.started) - 1
+            self._write_children(self.started[-1], level, until=next_open)
+            self._start_node(next_open, level + 1)
+        self._write_children(self.started[-1], len(self.started) - 1, until=None)
+
+    def add_attribute(self, path: str, name: str, value: str) -> None:
+        """Add an attribute to an unwritten element.
+
+        :param path: Path of the element.
+        :param name: Name of the attribute.
+        :param value: Value of the attribute.
+        """
+        super().add_attribute(path, name, value)
+        self._check_window()
+
+    def create_element(self, path: str, value: Text | None = None) -> Node:
+        """Add an element and always create the last element in the path.
 
         :param path: Path of the element.
         :param value: Value of the element or None if it has no value.
+        :returns: The created Node.
         """
-        paths = Node.split_path(path)
-        match len(paths):
-            case 0:
-                raise ValueError(f"Invalid path {repr(path)}.")
-            case 1:
-                node = Node.from_path(paths[0][0], value)
-                self._writenode(node, single=True)
-            case _:
-                for sub_paths in paths[:-1]:
-                    self._writenode(Node.from_path(sub_paths[0], value))
-                self._writenode(Node.from_path(paths[-1][0], value), single=True)
-                for sub_paths in reversed(paths[:-1]):
-                    self._writenode(Node.from_path(sub_paths[2], value), closing=True)
-
-    def add_element(self, path: str, value: str | None = None) -> None:
-        """Add an element if its not the current element.
+        elem = super().create_element(path, value)
+        self._check_window()
+        return elem
+
+    def add_element(self, path: str, value: Text | None = None) -> Node:
+        """Add an element if it not already exists.
 
         Otherwise it appends the string to the already existing element.
 
         :param path: Path to the element.
         :param value: Value of the element or None if it has no value.
+        :returns: The added/modified Node.
+        :raises ValueError: If the node has already been written.
         """
-        if self.last_node == Node.from_path(path):
-            if not value:
-                return
-            if not self.last_node.text:
-                self.last_node.text = value
-            else:
-                self.last_node.text += value
-        else:
-            self.create_element(path, value)
+        if value is not None and self.root.find(path) is not None:
+            self._get_element(path)
+        self._check_not_written(path)
+        elem = super().add_element(path, value)
+        self._check_window()
+        return elem
 
-    def enter_path(self, path: str, value: str | None = None) -> None:
-        """Enter a node and create elements in the path.
+    def enter_path(self, path: str, value: Text | None = None) -> None:
+        """Enter a node and create elements in the path if they do not already exist.
 
         :param path: Path to the element.
         :param value: Value of the element or None if it has no value.
+        :raises ValueError: If the node has already been written.
         """
-        paths = Node.split_path(path)
-        for node_path, _, _, _ in paths:
-            self._writenode(Node.from_path(node_path))
-            self.indent += 1
-        self.last_node.text = value
-        self.prev_roots.append("/".join([p[2] for p in paths]))
+        if self.root.find(path) is not None:
+            self._get_element(path)
+        self._check_not_written(path)
+        super().enter_path(path, value)
+        self._check_window()
 
-    def open_path(self, path: str, value: str | None = None) -> None:
-        """Enter a node and create elements in the path.
+    def open_path(self, path: str, value: Text | None = None) -> None:
+        """Enter a node and create elements in the path if they do not already exist.
 
         Always creates the last node.
 
         :param path: Path to the element.
         :param value: Value of the element or None if it has no value.
         """
-        return self.enter_path(path, value)
+        super().open_path(path, value)
+        self._check_window()
 
     def leave_paths(self, amount: int = 1) -> None:
-        """Leave the previously entered path."""
-        for _ in range(amount):
-            last_root = self.prev_roots.pop()
-            for node in reversed(last_root.split("/")):
-                self.indent -= 1
-                self._writenode(Node(node), closing=True)
+        """Leave the previously entered paths.
+
+        Started nodes which are left are completed and closed. If the root node is
+        reached again, all unwritten nodes are written.
+
+        :param amount: Amount of paths to leave.
+        """
+        super().leave_paths(amount)
+        if amount <= 0:
+            return
+        open_nodes = self._get_open_nodes()
+        while self.started and not any(self.started[-1] is n for n in open_nodes):
+            node = self.started.pop()
+            self._write_children(node, len(self.started), until=None)
+            self.written_paths.pop()
+            closing = self._to_tag(node.name, {}, closing=True)
+            self._writeline(closing, len(self.started))
+        if not self.prev_roots:
+            self.flush()
+
+    def _check_window(self) -> None:
+        """Flush the window if it contains too many nodes."""
+        if self.node_count - self.written_count > self.window_size:
+            self.flush()
 
     def write_output(self) -> None:
-        """Write last open nodes to file."""
+        """Write remaining nodes and close the file."""
         self.leave_paths(len(self.prev_roots))
-        # write last node again because it buffers the last node
-        self._writenode(self.last_node, closing=True)
+        if self.started:
+            self.flush()
+            self._writeline(self._to_tag(self.root.name, {}, closing=True), 0)
+        else:
+            self._write_node(self.root, 0)
+        self.file.close()
 
 
 class Xml(BufferedWriter):
-    """Writer class for xml output."""
+    """Writer class for xml output.
+
+    :var release_nodes: Free the node tree while writing the output. Must be
+        disabled if the tree is shared with other writers.
+    """
 
     def __init__(
         self, file_path: Path, *, encoding: str = "utf-8", root_name: str = "xml"
     ) -> None:
         """Init XML writer."""
         super().__init__(file_path, encoding=encoding, root_name=root_name)
+        self.release_nodes = True
+
+    def serialize_node(self, node: Node, release: bool = False) -> etree._Element:
+        """Convert node object to etree element.
 
-    def serialize_node(self, node: Node) -> etree.Element:
-        """Convert node object to etree element."""
-        root = etree.Element(node.name, node.attribs)
-        root.text = node.text
-        for child in node.get_sorted_children():
-            root.append(self.serialize_node(child))
-        return root
+        :param node: The node to convert.
+        :param release: Remove the children of each converted node, so the node tree
+            is freed while the element tree is built.
+        :returns: The created element.
+        """
+        return _to_element(node, release)
 
     def generate_output(self) -> str:
         """Generate output in specified format."""
@@ -169,11 +370,105 @@ class Xml(BufferedWriter):
         return etree.tostring(tree, pretty_print=True, encoding=str)
 
     def write_output(self) -> None:
-        """Write generated output to file."""
+        """Write generated output to file.
+
+        If `release_nodes` is set, the node tree is released while converting, so
+        the writer can not generate output again afterwards.
+        """
         self.root.name = self.root_name
-        etree.ElementTree(self.serialize_node(self.root)).write(
+        root = self.serialize_node(self.root, release=self.release_nodes)
+        etree.ElementTree(root).write(
             self.file_path,
             encoding=self.encoding,
             pretty_print=True,
             xml_declaration=False,
         )
+
+
+class IncXml(StreamingWriter):
+    """Writer class for incremental xml output.
+
+    Top-level nodes are converted to elements and written to the file using lxml
+    as soon as all entered paths have been left. The output is escaped by lxml and
+    written to the file in large blocks. Like in the xml output, the elements are
+    grouped by name and the names are sorted. Elements with the name of the first
+    top-level node are written to the file directly, others to a spill file, which
+    is copied to the file when the writer is closed.
+
+    :var buffer_size: Size of the file buffer in bytes.
+    """
+
+    buffer_size = 1024 * 1024
+
+    def __init__(
+        self, file_path: Path, *, encoding: str = "utf-8", root_name: str = "xml"
+    ) -> None:
+        """Init for IncXml class."""
+        super().__init__(file_path, encoding=encoding, root_name=root_name)
+        self.file = self.open_binary(self.buffer_size)
+        self.exit_stack = ExitStack()
+        self.xmlfile = self.exit_stack.enter_context(
+            etree.xmlfile(self.file, encoding=encoding, buffered=True)
+        )
+        self.first: str | None = None
+        self.names: set[str] = set()
+        self.start = 0
+
+    def _start_root(self) -> None:
+        """Write the start tag of the root element."""
+        self.exit_stack.enter_context(
+            self.xmlfile.element(self.root_name, self.root.attribs)
+        )
+        if self.root.text is not None:
+            self.xmlfile.write(str(self.root.text))
+        self.xmlfile.flush()
+        assert self.counter is not None
+        self.start = self.counter.bytes_written
+
+    def flush_node(self, node: Node) -> None:
+        """Write a top-level node to the file or the spill file.
+
+        :param node: The node to write.
+        """
+        if self.first is None:
+            self._start_root()
+            self.first = node.name
+        self.names.add(node.name)
+        elem = _to_element(node, release=True)
+        _indent(elem, level=1)
+        if node.name == self.first:
+            self.xmlfile.write("\n  ")
+            self.xmlfile.write(elem)
+            return
+        if self.spill is None:
+            self.spill = SpillFile()
+        data = etree.tostring(elem, encoding=self.encoding, xml_declaration=False)
+        self.spill.write(node.name, b"\n  " + cast(bytes, data))
+
+    def close(self) -> None:
+        """Write the spilled elements, the end tag of the root and close the file."""
+        if self.first is None:
+            self.root.name = self.root_name
+            self.xmlfile.write(_to_element(self.root))
+        else:
+            spill = self.spill
+            if spill is not None:
+                self.xmlfile.flush()
+                names = sorted(self.names)
+                index = names.index(self.first)
+                for name in names[index + 1 :]:
+                    spill.copy(name, self.file)
+                if index:
+
+                    def prepend() -> None:
+                        """Write the elements of names sorting before the first one."""
+                        for name in names[:index]:
+                            spill.copy(name, self.file)
+
+                    self.insert(self.start, prepend)
+                spill.close()
+                self.spill = None
+            self.xmlfile.write("\n")
+        self.exit_stack.close()
+        self.file.write(b"\n")
+        self.file.close()
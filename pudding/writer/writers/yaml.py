@@ -1,15 +1,54 @@
-"""Module defining base writer class."""
+"""Module defining yaml writer class."""
+
+import io
+from itertools import groupby
+from typing import TextIO
 
 import yaml
-from .json import Json, JsonType
+
+from .json import Json, _to_json
+
+try:
+    from yaml import CSafeDumper as Dumper
+except ImportError:  # pyyaml was built without libyaml
+    from yaml import SafeDumper as Dumper  # type: ignore[assignment]
 
 
 class Yaml(Json):
-    """Base writer class."""
+    """Writer class for yaml output.
+
+    Uses the libyaml emitter if available. Top-level entries are dumped one by one,
+    so only a single entry has to be converted at a time.
+    """
+
+    def write_entries(self, stream: TextIO) -> None:
+        """Write the top-level entries to a stream.
+
+        Nodes with the same name are written as a list, one item at a time.
+
+        :param stream: The stream to write to.
+        """
+        children = self.root.get_sorted_children()
+        if not children:
+            yaml.dump({}, stream, Dumper=Dumper)
+            return
+        for name, group in groupby(children, key=lambda node: node.name):
+            first = next(group)
+            rest = list(group)
+            if not rest:
+                yaml.dump({name: _to_json(first)}, stream, Dumper=Dumper)
+                continue
+            yaml.dump({name: [_to_json(first)]}, stream, Dumper=Dumper)
+            for node in rest:
+                yaml.dump([_to_json(node)], stream, Dumper=Dumper)
 
     def generate_output(self) -> str:
         """Generate output in specified format."""
-        base: JsonType = {}
-        for child in self.root.get_sorted_children():
-            base = self.serialize_node(child, base)
-        return yaml.dump(base)
+        stream = io.StringIO()
+        self.write_entries(stream)
+        return stream.getvalue()
+
+    def write_output(self) -> None:
+        """Write generated output to file."""
+        with open(self.file_path, "w", encoding=self.encoding) as f:
+            self.write_entries(f)
@@ -0,0 +1,20 @@
+"""Fixtures shared by the test modules."""
+
+from pathlib import Path
+
+import pytest
+
+from .test_util import CONTENT, SYNTAX
+
+
+@pytest.fixture
+def user_files(tmp_path: Path) -> tuple[Path, Path]:
+    """Write the user syntax and its input to the temporary directory.
+
+    :returns: The paths of the ".pud" file and the input file.
+    """
+    pud_file = tmp_path / "user.pud"
+    pud_file.write_text(SYNTAX)
+    input_file = tmp_path / "input.txt"
+    input_file.write_text(CONTENT)
+    return pud_file, input_file
@@ -1,10 +1,21 @@
 """Test module for cli functions."""
 
 import json
+import os
+import threading
+from pathlib import Path
 
+import pytest
+
+from pudding import convert_string
 from pudding._cli import main
+from pudding.client import _UnixHTTPConnection, send_request, token_path
+from pudding.compiler import Compiler
+from pudding.processor.grammar import Grammar
+from pudding.processor.trace import Trace, TraceRecorder
+from pudding.server import MAX_REQUEST_SIZE, ConversionServer
 
-from .test_util import DATA_DIR, INPUT_FILE
+from .test_util import CONTENT, DATA_DIR, INPUT_FILE, RESULT, SYNTAX
 
 
 def test_main() -> None:
@@ -14,3 +25,163 @@ def test_main() -> None:
     assert json.load(open(DATA_DIR / "input.json")) == json.load(
         open(DATA_DIR / "expected.json")
     )
+
+
+def test_main_multiple_formats(tmp_path: Path, user_files: tuple[Path, Path]) -> None:
+    """Test main function with multiple output formats."""
+    pud_file, input_file = user_files
+    main(["-s", str(pud_file), str(input_file), "-f", "json,xml,yaml", "--parallel"])
+    assert (tmp_path / "input.xml").read_text() == RESULT
+    assert (tmp_path / "input.json").read_text() == convert_string(
+        SYNTAX, CONTENT, "json"
+    )
+    assert (tmp_path / "input.yaml").read_text() == convert_string(
+        SYNTAX, CONTENT, "yaml"
+    )
+
+
+def test_main_unshareable_formats(
+    user_files: tuple[Path, Path], capsys: pytest.CaptureFixture[str]
+) -> None:
+    """Test rejecting multiple formats which can not share the node tree."""
+    pud_file, input_file = user_files
+    for formats in ("xml,csv", "json,slixml", "ndjson,yaml"):
+        with pytest.raises(SystemExit):
+            main(["-s", str(pud_file), str(input_file), "-f", formats])
+        assert "multiple formats must be json, xml or yaml" in (capsys.readouterr().err)
+
+
+def test_main_shards_without_key(
+    user_files: tuple[Path, Path], capsys: pytest.CaptureFixture[str]
+) -> None:
+    """Test rejecting shards by hash without a key."""
+    pud_file, input_file = user_files
+    with pytest.raises(SystemExit):
+        main(["-s", str(pud_file), str(input_file), "--shards", "2"])
+    assert "--shards requires --shard-key" in capsys.readouterr().err
+
+
+def test_main_shard_formats(
+    tmp_path: Path, user_files: tuple[Path, Path], capsys: pytest.CaptureFixture[str]
+) -> None:
+    """Test rejecting formats which can not be sharded and parsing shard sizes."""
+    pud_file, input_file = user_files
+    for formats in ("yaml", "slixml", "json,xml"):
+        with pytest.raises(SystemExit):
+            main(
+                ["-s", str(pud_file), str(input_file), "-f", formats]
+                + ["--shard-records", "1"]
+            )
+        assert "sharding requires one of the formats" in capsys.readouterr().err
+    args = ["-s", str(pud_file), str(input_file), "-f", "ndjson"]
+    assert main([*args, "--shard-size", "1K"]) == 0
+    assert [path.name for path in tmp_path.glob("input*.ndjson")] == [
+        "input.00000.ndjson"
+    ]
+
+
+def test_serve_remote_host(capsys: pytest.CaptureFixture[str]) -> None:
+    """Test rejecting a server listening on other hosts than loopback addresses."""
+    with pytest.raises(SystemExit):
+        main(["serve", "--host", "0.0.0.0"])
+    assert "--host must be a loopback address" in capsys.readouterr().err
+    with pytest.raises(ValueError, match="not a loopback address"):
+        ConversionServer(("0.0.0.0", 0))
+
+
+def test_trace(
+    tmp_path: Path, user_files: tuple[Path, Path], capsys: pytest.CaptureFixture[str]
+) -> None:
+    """Test recording and summarizing a trace."""
+    pud_file, input_file = user_files
+    trace_file = tmp_path / "conversion.trace"
+    main(["-s", str(pud_file), str(input_file), "--trace", str(trace_file)])
+    assert main(["trace", "summarize", str(trace_file), "--json"]) == 0
+    summary = json.loads(capsys.readouterr().out)
+    statements = [entry["statement"] for entry in summary["hot"]]
+    assert f"{pud_file}:9  match 'Name:' ws value field_end:" in statements
+    restarts = {entry["grammar"]: entry["restarts"] for entry in summary["restarts"]}
+    assert restarts[f"{pud_file}:8  grammar user:"] == 8
+    assert summary["positions"][-1]["end"] == len(CONTENT)
+    with pytest.raises(SystemExit):
+        main(
+            ["-s", str(pud_file), str(input_file), str(input_file)]
+            + ["--trace", str(trace_file)]
+        )
+    assert "--trace requires a single input file" in capsys.readouterr().err
+    recorder = TraceRecorder(trace_file)
+    grammar = Compiler().compile_file(pud_file)[-1]
+    assert isinstance(grammar, Grammar)
+    recorder.on_grammar_enter(grammar, 1)
+    recorder.on_grammar_exit(grammar, 2**33, 0)
+    recorder.close()
+    assert [record[2:4] for record in Trace(trace_file).records] == [(1, 2**33 - 1)]
+
+
+def test_serve(tmp_path: Path, user_files: tuple[Path, Path]) -> None:
+    """Test converting files with a server."""
+    pud_file, input_file = user_files
+    socket_path = str(tmp_path / "pudding.sock")
+    server = ConversionServer(socket_path, workers=1)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    try:
+        argv = ["--connect", socket_path, "-s", str(pud_file), str(input_file)]
+        assert main([*argv, "-f", "xml"]) == 0
+        assert (tmp_path / "input.xml").read_text() == RESULT
+        pud_file.write_text(SYNTAX.replace("user", "person"))
+        os.utime(pud_file, ns=(0, pud_file.stat().st_mtime_ns + 1))
+        assert main([*argv, "-f", "json"]) == 0
+        assert (tmp_path / "input.json").read_text() == convert_string(
+            SYNTAX.replace("user", "person"), CONTENT, "json"
+        )
+        input_file.write_text(CONTENT + "%")
+        assert main([*argv, "-f", "json"]) == 1
+        assert main([*argv, "-f", "json", "--keep-going"]) == 1
+        assert token_path(socket_path).stat().st_mode & 0o777 == 0o600
+        assert os.stat(socket_path).st_mode & 0o777 == 0o600
+        request = {
+            "syntax": pud_file.name,
+            "inputs": [str(input_file)],
+            "outputs": [str(tmp_path / "input.json")],
+            "format": "json",
+        }
+        with pytest.raises(RuntimeError, match="Invalid token"):
+            send_request(socket_path, request, token="invalid")
+        with pytest.raises(RuntimeError, match="is not absolute"):
+            send_request(socket_path, request)
+        with pytest.raises(RuntimeError, match="Unsupported option 'encoding'"):
+            send_request(
+                socket_path,
+                {**request, "options": {"writer_options": {"encoding": "ascii"}}},
+            )
+        token = token_path(socket_path).read_text()
+        for headers, status in [
+            ({"Host": "example.com"}, 403),
+            ({"Host": "0.0.0.0:8765"}, 403),
+            ({"Host": "[::1]:8765"}, 500),
+            ({"Content-Type": "text/plain"}, 415),
+            ({"Content-Length": "-1"}, 400),
+            ({"Content-Length": str(MAX_REQUEST_SIZE + 1)}, 413),
+        ]:
+            connection = _UnixHTTPConnection(socket_path)
+            connection.putrequest("POST", "/convert", skip_host=True)
+            headers = {
+                "Host": "localhost:8765",
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {token}",
+                "Content-Length": str(len(json.dumps(request))),
+                **headers,
+            }
+            for header, value in headers.items():
+                connection.putheader(header, value)
+            try:
+                connection.endheaders(json.dumps(request).encode("utf-8"))
+            except BrokenPipeError:
+                pass  # the server rejected the request without reading the body
+            assert connection.getresponse().status == status
+            connection.close()
+    finally:
+        server.shutdown()
+        thread.join()
+        server.close()
@@ -0,0 +1,173 @@
+"""Test module for the compiler package."""
+
+import json
+import random
+import re
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+from pudding import convert_string, convert_to_node
+from pudding.compiler import Compiler
+from pudding.compiler.analysis import OutputAnalysis, get_streaming_format
+from pudding.compiler.backtracking import BacktrackingAnalysis, check_backtracking
+from pudding.compiler.generator import InputGenerator, RegexGenerator
+from pudding.compiler.patterns import (
+    MatchReorderer,
+    is_exclusive,
+    load_profile,
+    reorder_source,
+)
+from pudding.processor.context import Context
+from pudding.processor.grammar import Grammar
+from pudding.processor.processor import Processor
+from pudding.reader import Reader
+from pudding.writer.writers.writer import Writer
+
+from .test_util import CONTENT, DATA_DIR, STREAMING_SYNTAX, SYNTAX
+
+
+def test_streaming_analysis() -> None:
+    """Test detecting syntaxes which allow streamed output."""
+    syntax = Compiler().compile(STREAMING_SYNTAX)
+    assert OutputAnalysis(syntax).analyse() == []
+    assert get_streaming_format(syntax, "xml") == "incxml"
+    assert get_streaming_format(syntax, "json") == "slijson"
+    assert get_streaming_format(syntax, "yaml") == "yaml"
+
+
+def test_buffering_analysis() -> None:
+    """Test detecting syntaxes which need buffered output."""
+    syntax = Compiler().compile_file(DATA_DIR / "test.pud")
+    reasons = OutputAnalysis(syntax).analyse()
+    assert "out.enter() in line 45 may change already written top-level nodes" in (
+        reasons
+    )
+    assert get_streaming_format(syntax, "xml") == "xml"
+    assert OutputAnalysis(Compiler().compile(SYNTAX)).analyse() == [
+        "out.add_attribute() in line 10 changes the path of a top-level node",
+        "out.add_attribute() in line 12 changes the path of a top-level node",
+    ]
+    syntax = Compiler().compile(
+        STREAMING_SYNTAX.replace("out.create('empty')", "out.create('user?id=\"1\"')")
+    )
+    assert OutputAnalysis(syntax).analyse() == [
+        "top-level nodes 'user' have different attributes"
+    ]
+
+
+def test_exclusive_patterns() -> None:
+    """Test proving that patterns can not match at the same position."""
+    assert is_exclusive(re.compile("Name:"), re.compile("Lastname:"))
+    assert is_exclusive(re.compile("Office"), re.compile("Other"))
+    assert is_exclusive(re.compile(r"[\w ]+:"), re.compile(r"[\r\n]"))
+    assert is_exclusive(re.compile("a"), re.compile("A"))
+    assert not is_exclusive(re.compile("a", re.IGNORECASE), re.compile("A"))
+    assert not is_exclusive(re.compile("k", re.IGNORECASE), re.compile("K"))
+    assert not is_exclusive(re.compile("Office"), re.compile("Off"))
+    assert not is_exclusive(re.compile("x*"), re.compile("y"))
+    assert not is_exclusive(re.compile(r"\d+"), re.compile(r"\w"))
+
+
+def test_reorder_matches() -> None:
+    """Test reordering exclusive match statements by their matches."""
+    syntax = Compiler().compile(SYNTAX)
+    expected = convert_string(syntax, CONTENT, "xml")
+    hits = {("<string>", 9): 2, ("<string>", 13): 2, ("<string>", 15): 10}
+    reorderings = MatchReorderer(syntax, hits).reorder()
+    assert [(r.grammar.name, r.before, r.after) for r in reorderings] == [
+        ("user", [9, 11, 13, 15], [15, 9, 11, 13])
+    ]
+    assert convert_string(syntax, CONTENT, "xml") == expected
+    content = reorder_source(SYNTAX, "<string>", reorderings)
+    lines = content.splitlines()
+    assert lines[8:10] == ["    match nl:", "        do.return()"]
+    grammar = Compiler().compile(content)[5]
+    assert isinstance(grammar, Grammar)
+    assert isinstance(grammar.tokens[0], tuple)
+    assert grammar.tokens[0][0].lineno == 9
+
+
+def test_load_profile(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test matching profile entries to statements compiled from another path."""
+    pud_file = tmp_path / "user.pud"
+    pud_file.write_text(SYNTAX)
+    profile = tmp_path / "profile.json"
+    profile.write_text(json.dumps([{"file": "user.pud", "line": 15, "matches": 3}]))
+    monkeypatch.chdir(tmp_path)
+    hits = load_profile(profile)
+    syntax = Compiler().compile_file(tmp_path / "." / "user.pud")
+    reorderings = MatchReorderer(syntax, hits).reorder()
+    assert [(r.before, r.after) for r in reorderings] == [
+        ([9, 11, 13, 15], [15, 9, 11, 13])
+    ]
+
+
+def test_generate_input() -> None:
+    """Test generating random input matching a syntax."""
+    syntax = Compiler().compile(SYNTAX)
+    content = "".join(InputGenerator(syntax, seed=1).generate(5000))
+    assert len(content) >= 5000
+    assert content == "".join(InputGenerator(syntax, seed=1).generate(5000))
+    root = convert_to_node(syntax, content)
+    assert root.get_children()
+    assert {child.name for child in root.get_children()} == {"user"}
+    regex = RegexGenerator(random.Random(0))
+    for pattern in (r"\d{4}-\d\d", r"[^\r\n,]+", r"(ab|cd)+\1", r"[\w ]+:"):
+        compiled = re.compile(pattern)
+        assert compiled.fullmatch(regex.generate(compiled))
+
+
+def test_generate_input_data() -> None:
+    """Test that generated input is matched by the grammars of the test data.
+
+    The output is ignored, as the paths used by output functions are not tracked.
+    """
+    for pud_file in sorted(DATA_DIR.glob("*.pud")):
+        syntax = Compiler().compile_file(pud_file)
+        if not any(isinstance(obj, Grammar) and obj.name == "input" for obj in syntax):
+            continue
+        for seed in range(10):
+            content = "".join(InputGenerator(syntax, seed=seed).generate(500))
+            writer = mock.Mock(spec=Writer)
+            Processor(Context(Reader(content), writer), syntax).convert()
+
+
+def test_backtracking_analysis() -> None:
+    """Test detecting patterns which can backtrack catastrophically."""
+    assert BacktrackingAnalysis(Compiler().compile(SYNTAX)).analyse() == []
+    syntax = Compiler().compile(
+        "define word /(\\w+\\s?)+:/\n"
+        "define number /(\\d+\\.)+/\n"
+        'define string /"(?:\\\\"|[^"])+"/\n'
+        "grammar input:\n"
+        "    match /(x|\\w\\w)+/ word:\n"
+        "        out.add('$0')\n"
+    )
+    issues = BacktrackingAnalysis(syntax).analyse()
+    assert [issue.split(":")[1] for issue in issues] == ["1", "5"]
+    assert "nested quantifiers" in issues[0]
+    assert "alternatives" in issues[1]
+    with pytest.raises(SyntaxError):
+        check_backtracking(syntax, strict=True)
+    syntax = Compiler().compile(
+        "define open /(\\w+/\n"
+        "define words open /\\s?)+:/\n"
+        "define pair /([a-z]|[A-Z]\\w)+:/\n"
+        "grammar input:\n"
+        "    match words:\n"
+        "        out.add('$0')\n"
+        "    imatch pair:\n"
+        "        out.add('$0')\n"
+    )
+    issues = BacktrackingAnalysis(syntax).analyse()
+    assert [issue.split(":")[1] for issue in issues] == ["2", "7"]
+    assert "/(\\w+\\s?)+:/" in issues[0]
+    with pytest.raises(SyntaxError):
+        convert_string(syntax, "x", "xml", strict=True)
+    for pattern in ("(a|aa)+b", "(\\w|\\w\\w)+:"):
+        syntax = Compiler().compile(f"define nullable /{pattern}/\n")
+        issues = BacktrackingAnalysis(syntax).analyse()
+        assert len(issues) == 1
+        assert "alternatives" in issues[0]
@@ -1,12 +1,28 @@
 """Test module for pudding.util."""
 
 import json
+import threading
+import time
 from pathlib import Path
 
+import pytest
 import yaml
 from lxml import etree
 
-from pudding import convert_file, convert_string
+from pudding import (
+    convert_file,
+    convert_files,
+    convert_string,
+    convert_to_dict,
+    convert_to_node,
+    iter_events,
+    iter_records,
+)
+from pudding.compiler import Compiler
+from pudding.processor.limits import LimitExceeded, Limits
+from pudding.processor.profiler import Profiler
+from pudding.writer.node import Node
+from pudding.writer.writers.event import Event, EventType
 
 DATA_DIR = Path(__file__).parent / "data"
 INPUT_FILE = DATA_DIR / "input.txt"
@@ -23,7 +39,7 @@ def test_convert_file_json() -> None:
     )
 
 
-def elements_equal(elem1: etree.Element, elem2: etree.Element) -> bool:
+def elements_equal(elem1: etree._Element, elem2: etree._Element) -> bool:
     """Compare two lxml.Element objects."""
     if (
         elem1.tag != elem2.tag
@@ -88,6 +104,13 @@ grammar input:
         user()
 """
 
+STREAMING_SYNTAX = (
+    SYNTAX.replace(
+        "out.add_attribute('.', 'firstname', '$2')", "out.add('firstname', '$2')"
+    ).replace("out.add_attribute('.', 'lastname',  '$2')", "out.add('lastname', '$2')")
+    + "    match nl:\n        out.create('empty')\n"
+)
+
 CONTENT = """User
 ----
 Name: John, Lastname: Doe
@@ -118,3 +141,200 @@ def test_convert_string() -> None:
     """Test convert_string function."""
     result = convert_string(SYNTAX, CONTENT, "xml")
     assert result == RESULT
+
+
+def test_convert_string_backslash() -> None:
+    """Test replacing variables with matched text containing backslashes."""
+    content = CONTENT.replace("1st Ave", r"1st \q Ave\1")
+    result = convert_string(SYNTAX, content, "xml")
+    assert r"<office>1st \q Ave\1</office>" in result
+
+
+def test_convert_string_lazy_text() -> None:
+    """Test convert_string function with lazy text values."""
+    assert convert_string(SYNTAX, CONTENT, "xml", lazy_text=True) == RESULT
+    assert json.loads(convert_string(SYNTAX, CONTENT, "json", lazy_text=True)) == (
+        json.loads(convert_string(SYNTAX, CONTENT, "json"))
+    )
+
+
+def test_convert_file_slijson(tmp_path: Path, user_files: tuple[Path, Path]) -> None:
+    """Test convert_file function for streamed JSON output."""
+    pud_file, input_file = user_files
+    convert_file(pud_file, input_file, tmp_path / "result.json", "slijson")
+    result = (tmp_path / "result.json").read_text()
+    assert result == convert_string(SYNTAX, CONTENT, "json")
+
+
+def test_convert_file_auto_stream(
+    tmp_path: Path, user_files: tuple[Path, Path]
+) -> None:
+    """Test that automatically streamed output equals the buffered output."""
+    pud_file, input_file = user_files
+    content = CONTENT + "\n" + CONTENT.split("\n\n")[0] + "\n"
+    input_file.write_text(content)
+    for syntax in (SYNTAX, STREAMING_SYNTAX):
+        pud_file.write_text(syntax)
+        for output_format in ("json", "xml"):
+            result = tmp_path / f"result.{output_format}"
+            expected = tmp_path / f"expected.{output_format}"
+            convert_file(pud_file, input_file, result, output_format)
+            convert_file(
+                pud_file, input_file, expected, output_format, auto_stream=False
+            )
+            assert result.read_text() == expected.read_text()
+    users = json.loads((tmp_path / "result.json").read_text())["user"]
+    assert [user["firstname"]["#text"] for user in users] == ["John", "Jane", "John"]
+
+
+def test_convert_file_ndjson(tmp_path: Path, user_files: tuple[Path, Path]) -> None:
+    """Test convert_file function for newline delimited JSON output."""
+    pud_file, input_file = user_files
+    convert_file(pud_file, input_file, tmp_path / "result.ndjson", "ndjson")
+    lines = (tmp_path / "result.ndjson").read_text().splitlines()
+    expected = json.loads(convert_string(SYNTAX, CONTENT, "json"))["user"]
+    assert [json.loads(line) for line in lines] == [{"user": u} for u in expected]
+
+
+def test_convert_to_dict() -> None:
+    """Test convert_to_dict function with a compiled syntax."""
+    syntax = Compiler().compile(SYNTAX)
+    result = convert_to_dict(syntax, CONTENT)
+    assert result == json.loads(convert_string(SYNTAX, CONTENT, "json"))
+    assert convert_to_dict(syntax, CONTENT) == result
+
+
+def test_convert_to_node() -> None:
+    """Test convert_to_node function."""
+    root = convert_to_node(SYNTAX, CONTENT)
+    users = root.get_children()
+    assert [user.get("firstname") for user in users] == ["John", "Jane"]
+    assert users[1].to_record()["office"] == "2nd Ave"
+
+
+def test_iter_events() -> None:
+    """Test iter_events function."""
+    events = list(iter_events(SYNTAX, CONTENT, queue_size=1))
+    assert events[0] == Event(EventType.START, "user", attributes={})
+    assert events[-1] == Event(EventType.END, "user")
+    texts = [event.value for event in events if event.type == EventType.TEXT]
+    assert texts == ["1st Ave", "1978-01-01", "2nd Ave", "1970-01-01"]
+    iterator = iter_events(SYNTAX, CONTENT * 100, queue_size=1)
+    assert next(iterator).type == EventType.START
+    iterator.close()
+
+
+def test_iter_records(tmp_path: Path) -> None:
+    """Test iter_records function."""
+    input_file = tmp_path / "input.txt"
+    input_file.write_text(CONTENT)
+    records = list(iter_records(SYNTAX, input_file, as_dict=True))
+    expected = json.loads(convert_string(SYNTAX, CONTENT, "json"))["user"]
+    assert records == [{"user": user} for user in expected]
+    for record in iter_records(SYNTAX, CONTENT):
+        assert isinstance(record, Node)
+        assert record.parent is None
+
+
+def test_iter_records_close() -> None:
+    """Test closing the iterator while the finished producer waits for the queue."""
+    iterator = iter_records(SYNTAX, CONTENT, queue_size=1)
+    assert isinstance(next(iterator), Node)
+    time.sleep(0.5)
+    thread = threading.Thread(target=iterator.close, daemon=True)
+    thread.start()
+    thread.join(5)
+    assert not thread.is_alive()
+
+
+def test_convert_file_profile(tmp_path: Path, user_files: tuple[Path, Path]) -> None:
+    """Test collecting execution statistics while converting a file."""
+    pud_file, input_file = user_files
+    profiler = Profiler()
+    output_file = tmp_path / "out.xml"
+    convert_file(pud_file, input_file, output_file, "xml", listeners=[profiler])
+    stats = {(s.lineno, s.name): s for s in profiler.stats.values()}
+    assert stats[(18, "grammar input")].consumed_chars == len(CONTENT)
+    assert 0 < stats[(9, "match")].regex_time < stats[(18, "grammar input")].time
+    assert stats[(18, "grammar input")].filename == str(pud_file)
+    name_stats = stats[(9, "match")]
+    assert (name_stats.calls, name_stats.matches, name_stats.misses) == (10, 2, 8)
+    assert stats[(14, "out.add")].calls == 4
+    assert "grammar user" in profiler.report()
+
+
+def test_convert_file_stats(tmp_path: Path, user_files: tuple[Path, Path]) -> None:
+    """Test statistics returned by convert_file."""
+    pud_file, input_file = user_files
+    output_file = tmp_path / "out.json"
+    stats = convert_file(pud_file, input_file, output_file, "json", measure_memory=True)
+    file_stats = stats.files[0]
+    assert file_stats.input_bytes == len(CONTENT)
+    assert file_stats.output_bytes == output_file.stat().st_size
+    assert file_stats.node_count == 6
+    assert file_stats.grammar_calls == 3
+    assert file_stats.restarts == 10
+    assert file_stats.peak_memory is not None and file_stats.peak_memory > 0
+    assert json.loads(json.dumps(stats.to_dict()))["files"][0]["node_count"] == 6
+
+
+def test_convert_files_limits(tmp_path: Path) -> None:
+    """Test limits and continuing after a failed file."""
+    pud_file = tmp_path / "limits.pud"
+    pud_file.write_text(
+        "grammar input:\n"
+        "    match /(x+x+)+y/:\n"
+        "        out.add('slow', '$0')\n"
+        "    match /\\w+/:\n"
+        "        out.add('word', '$0')\n"
+        "    skip /\\s+/\n"
+        "    when /!/:\n"
+        "        out.add('loop', '$0')\n"
+    )
+    contents = ["a b\n", "a\nb !\n", "a\n" + "x" * 40 + "\n", "a\n%\n"]
+    inputs = []
+    for index, content in enumerate(contents):
+        inputs.append(tmp_path / f"input{index}.txt")
+        inputs[-1].write_text(content)
+    outputs = [path.with_suffix(".json") for path in inputs]
+    with pytest.raises(LimitExceeded, match="Token limit"):
+        convert_files(pud_file, inputs[:2], outputs, "json", limits=Limits(tokens=100))
+    stats = convert_files(
+        pud_file,
+        inputs,
+        outputs,
+        "json",
+        limits=Limits(time=1, tokens=100),
+        keep_going=True,
+    )
+    assert [f.input_file for f in stats.failures] == inputs[1:]
+    assert [(f.line, f.position) for f in stats.failures] == [(2, 4), (2, 2), (2, 2)]
+    errors = [f.error or "" for f in stats.failures]
+    assert errors[0].startswith("LimitExceeded: Token limit of 100 exceeded")
+    assert errors[1] == "LimitExceeded: Time limit of 1s exceeded"
+    assert errors[2].startswith("RuntimeError: Unmatched text in line 2")
+    assert json.loads(outputs[0].read_text()) == {"word": {"#text": "ab"}}
+    assert stats.to_dict()["failures"] == 3
+    stats = convert_files(pud_file, inputs[3:], outputs[3:], "json", keep_going=True)
+    assert [(f.line, f.position) for f in stats.failures] == [(2, 2)]
+    stats = convert_files(
+        pud_file,
+        inputs[2:3],
+        outputs[2:3],
+        "json",
+        limits=Limits(time=1),
+        keep_going=True,
+    )
+    assert [(f.line, f.position) for f in stats.failures] == [(2, 2)]
+    assert stats.failures[0].error == "LimitExceeded: Time limit of 1s exceeded"
+
+
+def test_convert_files_limits_without_fork(
+    tmp_path: Path, user_files: tuple[Path, Path], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test rejecting time limits if processes can not be forked."""
+    monkeypatch.setattr("pudding.util.FORK_SUPPORTED", False)
+    pud_file, input_file = user_files
+    output_file = tmp_path / "input.json"
+    with pytest.raises(ValueError, match="not supported"):
+        convert_file(pud_file, input_file, output_file, "json", limits=Limits(time=1))
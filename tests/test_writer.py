@@ -0,0 +1,311 @@
+"""Test module for writer classes."""
+
+import json
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+
+import pytest
+from lxml import etree
+
+from pudding import convert_file
+from pudding.writer import Json, Xml
+from pudding.writer.writers.event import Event, EventType, EventWriter
+from pudding.writer.writers.json import SliJson
+from pudding.writer.writers.sharded import ShardedWriter
+from pudding.writer.writers.sqlite import Sqlite
+from pudding.writer.writers.table import Tsv
+from pudding.writer.writers.xml import IncXml, SliXml
+
+from .test_util import CONTENT, RESULT
+
+
+def test_xml_deep_tree(tmp_path: Path) -> None:
+    """Test writing a tree deeper than the recursion limit."""
+    writer = Xml(tmp_path / "deep.xml")
+    for _ in range(1500):
+        writer.open_path("node")
+    writer.add_element("leaf", "value")
+    writer.leave_paths(1500)
+    writer.write_output()
+    tree = etree.parse(tmp_path / "deep.xml", etree.XMLParser(huge_tree=True))
+    assert tree.getroot().tag == "xml"
+    assert tree.xpath("count(//node)") == 1500
+    assert tree.xpath("string(//leaf)") == "value"
+
+
+def test_incxml(tmp_path: Path, user_files: tuple[Path, Path]) -> None:
+    """Test incremental xml output equals the xml output."""
+    pud_file, input_file = user_files
+    input_file.write_text(CONTENT.replace("1st Ave", "1st & <Ave>"))
+    convert_file(pud_file, input_file, tmp_path / "result.xml", "incxml")
+    convert_file(pud_file, input_file, tmp_path / "expected.xml", "xml")
+    result = (tmp_path / "result.xml").read_text()
+    assert result == (tmp_path / "expected.xml").read_text()
+    assert result == RESULT.replace("1st Ave", "1st &amp; &lt;Ave&gt;")
+
+
+def test_incxml_interleaved_names(tmp_path: Path) -> None:
+    """Test incremental xml output of top-level nodes with interleaved names."""
+    for names in (["user", "group", "user"], ["b", "c", "b", "a", "d", "a"]):
+        incxml = IncXml(tmp_path / "result.xml")
+        expected = Xml(tmp_path / "expected.xml")
+        for index, name in enumerate(names):
+            for writer in (incxml, expected):
+                writer.open_path(name)
+                writer.add_element("index", str(index))
+                writer.add_element("nested/value", "<&>")
+                writer.leave_paths()
+        incxml.write_output()
+        expected.write_output()
+        result = (tmp_path / "result.xml").read_text()
+        assert result == (tmp_path / "expected.xml").read_text()
+
+
+def test_slixml_window(tmp_path: Path) -> None:
+    """Test modifying unwritten nodes with the slixml writer."""
+    writer = SliXml(tmp_path / "result.xml")
+    writer.open_path("user")
+    writer.add_element("name", "John")
+    writer.add_element("office", "1st Ave")
+    writer.add_element("tmp")
+    writer.add_attribute(".", "id", "1")
+    writer.replace_element("office", "2nd Ave")
+    writer.delete_element("tmp")
+    writer.leave_paths()
+    writer.create_element("user/name", "Jane")
+    with pytest.raises(ValueError, match="already written"):
+        writer.open_path("user")
+        writer.add_element("child")
+        writer.flush()
+        writer.add_attribute(".", "id", "2")
+    writer.write_output()
+    assert (tmp_path / "result.xml").read_text() == (
+        "<xml>\n"
+        '  <user id="1">\n'
+        "    <name>John</name>\n"
+        "    <office>2nd Ave</office>\n"
+        "  </user>\n"
+        "  <user>\n"
+        "    <name>Jane</name>\n"
+        "  </user>\n"
+        "  <user>\n"
+        "    <child/>\n"
+        "  </user>\n"
+        "</xml>\n"
+    )
+
+
+def test_slixml_written_path(tmp_path: Path) -> None:
+    """Test adding to a path written by the slixml window."""
+    writer = SliXml(tmp_path / "result.xml")
+    writer.window_size = 2
+    writer.open_path("user")
+    writer.add_element("name", "Jo")
+    for name in ("a", "b", "c"):
+        writer.add_element(name)
+    with pytest.raises(ValueError, match="already written"):
+        writer.add_element("name", "hn")
+    with pytest.raises(ValueError, match="already written"):
+        writer.enter_path("name")
+    writer.write_output()
+
+
+def test_slixml_window_boundary(tmp_path: Path) -> None:
+    """Test that the slixml window is flushed after `window_size` nodes."""
+    writer = SliXml(tmp_path / "result.xml")
+    writer.window_size = 3
+    writer.open_path("user")
+    writer.add_element("a")
+    writer.add_element("b")
+    writer.add_attribute(".", "id", "1")
+    writer.add_element("a", "x")
+    writer.add_element("c")
+    with pytest.raises(ValueError, match="already written"):
+        writer.add_element("a", "y")
+    writer.write_output()
+    assert (tmp_path / "result.xml").read_text() == (
+        "<xml>\n"
+        '  <user id="1">\n'
+        "    <a>x</a>\n"
+        "    <b/>\n"
+        "    <c/>\n"
+        "  </user>\n"
+        "</xml>\n"
+    )
+
+
+def test_slijson_interleaved_names(tmp_path: Path) -> None:
+    """Test slim json output of top-level nodes with interleaved names."""
+    many = [f"n{index % 40:02}" for index in range(100, 0, -1)]
+    for names in (
+        ["b", "c", "b", "a", "d", "a"],
+        ["a", "b", "a"],
+        ["b", "a"],
+        ["b", "a", "c", "b"],
+        many,
+    ):
+        slijson = SliJson(tmp_path / "result.json")
+        expected = Json(tmp_path / "expected.json")
+        for index, name in enumerate(names):
+            for writer in (slijson, expected):
+                writer.open_path(name)
+                writer.add_element("index", str(index))
+                writer.leave_paths()
+        assert slijson.spill is not None
+        assert slijson.counter is not None
+        spilled = slijson.spill.size
+        assert slijson.bytes_written == slijson.counter.bytes_written + spilled
+        slijson.write_output()
+        expected.write_output()
+        result = (tmp_path / "result.json").read_text()
+        assert result == (tmp_path / "expected.json").read_text()
+
+
+def test_csv(tmp_path: Path, user_files: tuple[Path, Path]) -> None:
+    """Test csv output with given columns."""
+    pud_file, input_file = user_files
+    convert_file(
+        pud_file,
+        input_file,
+        tmp_path / "result.csv",
+        "csv",
+        writer_options={"columns": ["@lastname", "office", "missing"]},
+    )
+    assert (tmp_path / "result.csv").read_text() == (
+        "@lastname,office,missing\nDoe,1st Ave,\nFoo,2nd Ave,\n"
+    )
+
+
+def test_tsv_inferred_columns(tmp_path: Path, caplog: pytest.LogCaptureFixture) -> None:
+    """Test tsv output with columns inferred from the records."""
+    writer = Tsv(tmp_path / "result.tsv", record_path="users/user", infer_records=1)
+    writer.enter_path("users")
+    writer.open_path("user")
+    writer.add_attribute(".", "id", "1")
+    writer.add_element("name", "John")
+    writer.leave_paths()
+    writer.open_path("user")
+    writer.add_element("name/first", "Jane")
+    writer.add_element("office", "2nd Ave")
+    writer.leave_paths()
+    writer.create_element("other")
+    writer.leave_paths()
+    writer.write_output()
+    assert (tmp_path / "result.tsv").read_text() == "@id\tname\n1\tJohn\n\t\n"
+    assert caplog.messages == [
+        "Dropping columns name/first, office of a record in "
+        f"{tmp_path / 'result.tsv'}, which were not in the first 1 records. Use the "
+        "columns option to write them."
+    ]
+
+
+def test_sqlite_records(tmp_path: Path, user_files: tuple[Path, Path]) -> None:
+    """Test sqlite output with records inserted as rows."""
+    pud_file, input_file = user_files
+    db_file = tmp_path / "result.sqlite"
+    convert_file(
+        pud_file,
+        input_file,
+        db_file,
+        "sqlite",
+        writer_options={"record_path": "user", "batch_size": 1},
+    )
+    with closing(sqlite3.connect(db_file)) as connection:
+        rows = connection.execute(
+            'SELECT _rowid, "@firstname", "office", "birth-date" FROM user '
+            "ORDER BY _rowid"
+        ).fetchall()
+    assert rows == [
+        (1, "John", "1st Ave", "1978-01-01"),
+        (2, "Jane", "2nd Ave", "1970-01-01"),
+    ]
+
+
+def test_sqlite_record_columns(tmp_path: Path) -> None:
+    """Test sqlite columns named like the primary key or only differing in case."""
+    db_file = tmp_path / "result.sqlite"
+    writer = Sqlite(db_file, record_path="user")
+    writer.open_path("user")
+    writer.add_element("id", "7")
+    writer.add_attribute(".", "Lang", "en")
+    writer.leave_paths()
+    writer.open_path("user")
+    writer.add_attribute(".", "lang", "de")
+    writer.leave_paths()
+    writer.write_output()
+    with closing(sqlite3.connect(db_file)) as connection:
+        rows = connection.execute("SELECT * FROM user ORDER BY _rowid").fetchall()
+    assert rows == [(1, "en", "7"), (2, "de", None)]
+
+
+def test_sqlite_nodes(tmp_path: Path) -> None:
+    """Test sqlite output with the generic node schema."""
+    db_file = tmp_path / "result.sqlite"
+    writer = Sqlite(db_file)
+    writer.open_path("user")
+    writer.add_attribute(".", "id", "1")
+    writer.add_element("name", "John")
+    writer.leave_paths()
+    writer.write_output()
+    with closing(sqlite3.connect(db_file)) as connection:
+        nodes = connection.execute("SELECT * FROM nodes ORDER BY id").fetchall()
+        attributes = connection.execute("SELECT * FROM attributes").fetchall()
+    assert nodes == [(1, None, "user", None), (2, 1, "name", "John")]
+    assert attributes == [(1, "id", "1")]
+
+
+def test_event_writer() -> None:
+    """Test events emitted by the event writer."""
+    events: list[Event] = []
+    writer = EventWriter(events.append)
+    writer.open_path('user?id="1"')
+    writer.add_attribute(".", "name", "John")
+    writer.create_element("address/office", "1st Ave")
+    writer.add_element(".", "text")
+    writer.write_output()
+    assert events == [
+        Event(EventType.START, "user", attributes={"id": "1"}),
+        Event(EventType.ATTRIBUTE, "name", "John"),
+        Event(EventType.START, "address", attributes={}),
+        Event(EventType.START, "office", attributes={}),
+        Event(EventType.TEXT, "office", "1st Ave"),
+        Event(EventType.END, "office"),
+        Event(EventType.END, "address"),
+        Event(EventType.TEXT, "user", "text"),
+        Event(EventType.END, "user"),
+    ]
+
+
+def test_sharded_writer(tmp_path: Path, user_files: tuple[Path, Path]) -> None:
+    """Test splitting the output into shards."""
+    pud_file, input_file = user_files
+    input_file.write_text(CONTENT * 3)
+    output_file = tmp_path / "result.xml"
+    convert_file(pud_file, input_file, output_file, "xml", shard_options={"records": 4})
+    shards = sorted(tmp_path.glob("result.*.xml"))
+    assert [path.name for path in shards] == ["result.00000.xml", "result.00001.xml"]
+    users = [etree.parse(path).getroot().findall("user") for path in shards]
+    assert [len(u) for u in users] == [4, 2]
+
+    output_file = tmp_path / "result.ndjson"
+    writer = ShardedWriter(output_file, output_format="ndjson", shards=4, key="id")
+    for user_id in ("1", "2", "1", "3", "2"):
+        writer.open_path(f'user?id="{user_id}"')
+        writer.leave_paths()
+    writer.write_output()
+    ids: dict[str, set[Path]] = {}
+    for path in tmp_path.glob("result.*.ndjson"):
+        for line in path.read_text().splitlines():
+            ids.setdefault(json.loads(line)["user"]["@id"], set()).add(path)
+    assert sorted(ids) == ["1", "2", "3"]
+    assert all(len(paths) == 1 for paths in ids.values())
+
+    output_file = tmp_path / "sized.ndjson"
+    writer = ShardedWriter(output_file, output_format="ndjson", size=30)
+    for user_id in "12345":
+        writer.open_path(f'user?id="{user_id}"')
+        writer.leave_paths()
+    writer.write_output()
+    shards = sorted(tmp_path.glob("sized.*.ndjson"))
+    assert [len(path.read_text().splitlines()) for path in shards] == [2, 2, 1]